@@ -0,0 +1,134 @@
+"""
+Benchmark: model-deserialized vs raw-JSON pod listing.
+
+Builds a synthetic PodList response and measures the time to turn it into
+the K8sService pod dicts through the kubernetes client models
+(ApiClient.deserialize + pod_to_dict) and through the raw fast path
+(orjson/json + raw_pod_to_dict).
+
+Usage:
+    python benchmarks/bench_raw_list.py [--pods 10000] [--repeat 5]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from kubernetes.client import ApiClient
+
+from k8s_service import pod_to_dict
+from services.raw_list import loads, raw_pod_to_dict
+
+
+def make_pod(i: int) -> dict:
+    name = f"web-{i // 100}-{i:06d}"
+    return {
+        "apiVersion": "v1",
+        "kind": "Pod",
+        "metadata": {
+            "name": name,
+            "namespace": f"team-{i % 40}",
+            "uid": f"00000000-0000-0000-0000-{i:012d}",
+            "resourceVersion": str(100000 + i),
+            "creationTimestamp": "2024-01-01T10:00:00Z",
+            "labels": {"app": f"web-{i // 100}", "tier": "frontend", "pod-template-hash": "7d4b8c8d9f"},
+            "annotations": {"kubectl.kubernetes.io/restartedAt": "2024-01-01T09:59:00Z"},
+            "ownerReferences": [{
+                "apiVersion": "apps/v1", "kind": "ReplicaSet", "name": f"web-{i // 100}-7d4b8c8d9f",
+                "uid": "11111111-2222-3333-4444-555555555555", "controller": True, "blockOwnerDeletion": True
+            }]
+        },
+        "spec": {
+            "nodeName": f"node-{i % 200}",
+            "serviceAccountName": "default",
+            "restartPolicy": "Always",
+            "containers": [{
+                "name": "app",
+                "image": "registry.example.com/web:1.4.2",
+                "ports": [{"containerPort": 8080, "protocol": "TCP"}],
+                "env": [{"name": f"VAR_{k}", "value": str(k)} for k in range(8)],
+                "resources": {"limits": {"cpu": "500m", "memory": "512Mi"}, "requests": {"cpu": "100m", "memory": "128Mi"}},
+                "volumeMounts": [{"name": "kube-api-access", "mountPath": "/var/run/secrets/kubernetes.io/serviceaccount", "readOnly": True}]
+            }, {
+                "name": "sidecar",
+                "image": "registry.example.com/proxy:2.0.0",
+                "resources": {"limits": {"cpu": "100m", "memory": "64Mi"}}
+            }],
+            "tolerations": [
+                {"key": "node.kubernetes.io/not-ready", "operator": "Exists", "effect": "NoExecute", "tolerationSeconds": 300}
+            ]
+        },
+        "status": {
+            "phase": "Running",
+            "podIP": f"10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}",
+            "startTime": "2024-01-01T10:00:01Z",
+            "conditions": [
+                {"type": "Ready", "status": "True", "lastTransitionTime": "2024-01-01T10:00:05Z"},
+                {"type": "ContainersReady", "status": "True", "lastTransitionTime": "2024-01-01T10:00:05Z"}
+            ],
+            "containerStatuses": [
+                {"name": "app", "ready": True, "restartCount": i % 3, "image": "registry.example.com/web:1.4.2",
+                 "imageID": "sha256:abc", "started": True, "state": {"running": {"startedAt": "2024-01-01T10:00:03Z"}}},
+                {"name": "sidecar", "ready": True, "restartCount": 0, "image": "registry.example.com/proxy:2.0.0",
+                 "imageID": "sha256:def", "started": True, "state": {"running": {"startedAt": "2024-01-01T10:00:03Z"}}}
+            ]
+        }
+    }
+
+
+def make_pod_list(count: int) -> bytes:
+    return json.dumps({
+        "apiVersion": "v1",
+        "kind": "PodList",
+        "metadata": {"resourceVersion": "200000"},
+        "items": [make_pod(i) for i in range(count)]
+    }).encode()
+
+
+class FakeResponse:
+    def __init__(self, data: bytes):
+        self.data = data
+
+
+def model_path(api_client: ApiClient, body: bytes):
+    pod_list = api_client.deserialize(FakeResponse(body), "V1PodList")
+    return [pod_to_dict(pod) for pod in pod_list.items]
+
+
+def raw_path(body: bytes):
+    return [raw_pod_to_dict(pod) for pod in loads(body)["items"]]
+
+
+def best_of(func, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pods", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    body = make_pod_list(args.pods)
+    api_client = ApiClient()
+    assert model_path(api_client, body) == raw_path(body), "fast path must match the model path"
+
+    model = best_of(lambda: model_path(api_client, body), args.repeat)
+    raw = best_of(lambda: raw_path(body), args.repeat)
+
+    print(f"pods:        {args.pods} ({len(body) / 1e6:.1f} MB JSON)")
+    print(f"model path:  {model * 1000:8.1f} ms")
+    print(f"raw path:    {raw * 1000:8.1f} ms")
+    print(f"speedup:     {model / raw:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
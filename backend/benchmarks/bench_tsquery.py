@@ -0,0 +1,63 @@
+"""
+Benchmark: time-series query operations across a fleet.
+
+Builds a (clusters x series, steps) matrix with some missing samples, as
+returned by TimeSeriesStore.query_matrix for each cluster and stacked, and
+times each services.tsquery operation over the whole matrix.
+
+Usage:
+    python benchmarks/bench_tsquery.py [--clusters 150] [--series 1000] [--steps 60] [--repeat 5]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import tsquery
+
+
+def timed(func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clusters", type=int, default=150)
+    parser.add_argument("--series", type=int, default=1000)
+    parser.add_argument("--steps", type=int, default=60)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    rows = args.clusters * args.series
+    values = rng.uniform(0, 100, size=(rows, args.steps))
+    values[rng.random(values.shape) < 0.01] = np.nan
+    timestamps = np.arange(args.steps, dtype=np.float64) * 60
+    latest = tsquery.last(values)
+
+    print(f"{rows} series x {args.steps} steps, best of {args.repeat}")
+    operations = {
+        "last": lambda: tsquery.last(values),
+        "topk(10) of latest": lambda: tsquery.topk(latest, 10),
+        "topk(10) by avg": lambda: tsquery.topk(values, 10, by="avg"),
+        "delta": lambda: tsquery.delta(values),
+        "rate": lambda: tsquery.rate(timestamps, values),
+        "moving_average(5)": lambda: tsquery.moving_average(values, 5),
+        "p95 per series": lambda: tsquery.percentile(values, 95),
+        "p95 of latest": lambda: tsquery.percentile(latest, 95)
+    }
+    for name, operation in operations.items():
+        print(f"  {name:<20} {timed(operation, args.repeat):9.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+from typing import Iterator
+
+from fastapi import HTTPException
+
+from k8s_service import K8sService
+from services.async_kube import AsyncK8sService
+from services.cluster_registry import cluster_registry, UnknownClusterError
+
+def get_k8s_service(cluster_id: str) -> Iterator[K8sService]:
+    """Dependency resolving the Kubernetes client for the cluster in the path, held until the request ends"""
+    try:
+        with cluster_registry.hold(cluster_id) as service:
+            yield service
+    except UnknownClusterError:
+        raise HTTPException(status_code=404, detail=f"Cluster {cluster_id} not found")
+
+def get_async_k8s_service(cluster_id: str) -> AsyncK8sService:
+    """Resolve the awaitable Kubernetes client for a cluster"""
+    try:
+        return cluster_registry.get_async(cluster_id)
+    except UnknownClusterError:
+        raise HTTPException(status_code=404, detail=f"Cluster {cluster_id} not found")
@@ -1,39 +1,145 @@
 from kubernetes import client, config
 from kubernetes.client.rest import ApiException
-from typing import List, Dict, Any, Optional
+from typing import Callable, List, Dict, Any, Optional
 import yaml
 import json
 import logging
 from datetime import datetime
 import os
+import threading
+from collections import Counter, deque
+
+from services.informer import Informer
+from services.metrics_collector import MetricsCollector, quantity
+from services.timeseries import TimeSeriesStore
+from services.alert_manager import AlertManager, default_notifiers
+from services.events import EventLog, event_to_dict
+from services.logs import LogMultiplexer, PodLogStream, MAX_LOG_STREAMS, LOG_TAIL_MAX_LINES, extract_level
+from services.log_store import LogStore, LogCapture, LOG_STORE_DIR, LOG_CAPTURE_NAMESPACES
+from services.client_provider import get_api_client
+from services.connectivity import ConnectivityMonitor, PROBE_TIMEOUT_SECONDS
+from services.selectors import selector_predicate, selector_kwargs, UnsupportedSelector
+from services.raw_list import (
+    list_projected, raw_namespace_to_dict, raw_pod_to_dict,
+    raw_service_to_dict, raw_deployment_to_dict
+)
 
 logger = logging.getLogger(__name__)
 
+# Serve list getters from watch-backed informer caches instead of a LIST per call
+INFORMERS_ENABLED = os.getenv("K8S_INFORMERS_ENABLED", "true").lower() == "true"
+# Parse direct LIST responses as raw JSON instead of building V1* model objects
+RAW_LIST_ENABLED = os.getenv("K8S_RAW_LIST", "true").lower() == "true"
+
+def _timestamp(value) -> Optional[str]:
+    return value.isoformat() if value else None
+
+def namespace_to_dict(ns) -> Dict[str, Any]:
+    return {
+        "name": ns.metadata.name,
+        "status": ns.status.phase,
+        "created": _timestamp(ns.metadata.creation_timestamp),
+        "labels": ns.metadata.labels or {}
+    }
+
+def pod_to_dict(pod) -> Dict[str, Any]:
+    return {
+        "name": pod.metadata.name,
+        "namespace": pod.metadata.namespace,
+        "status": pod.status.phase,
+        "node": pod.spec.node_name,
+        "created": _timestamp(pod.metadata.creation_timestamp),
+        "ready": sum(1 for c in (pod.status.container_statuses or []) if c.ready),
+        "total_containers": len(pod.spec.containers),
+        "containers": [c.name for c in pod.spec.containers],
+        "restarts": sum(c.restart_count for c in (pod.status.container_statuses or [])),
+        "labels": pod.metadata.labels or {}
+    }
+
+def service_to_dict(svc) -> Dict[str, Any]:
+    return {
+        "name": svc.metadata.name,
+        "namespace": svc.metadata.namespace,
+        "type": svc.spec.type,
+        "cluster_ip": svc.spec.cluster_ip,
+        "external_ips": svc.spec.external_ips or [],
+        "ports": [
+            {
+                "port": port.port,
+                "target_port": str(port.target_port),
+                "protocol": port.protocol
+            }
+            for port in (svc.spec.ports or [])
+        ],
+        "selector": svc.spec.selector or {},
+        "created": _timestamp(svc.metadata.creation_timestamp)
+    }
+
+def deployment_to_dict(dep) -> Dict[str, Any]:
+    return {
+        "name": dep.metadata.name,
+        "namespace": dep.metadata.namespace,
+        "replicas": dep.spec.replicas,
+        "ready_replicas": dep.status.ready_replicas or 0,
+        "available_replicas": dep.status.available_replicas or 0,
+        "updated_replicas": dep.status.updated_replicas or 0,
+        "strategy": dep.spec.strategy.type if dep.spec.strategy else "RollingUpdate",
+        "created": _timestamp(dep.metadata.creation_timestamp),
+        "labels": dep.metadata.labels or {}
+    }
+
+def node_to_dict(node) -> Dict[str, Any]:
+    return {
+        "name": node.metadata.name,
+        "namespace": None,
+        "status": "Ready" if any(
+            c.type == "Ready" and c.status == "True"
+            for c in (node.status.conditions or [])
+        ) else "NotReady",
+        "cpu_allocatable": quantity((node.status.allocatable or {}).get("cpu")),
+        "memory_allocatable": quantity((node.status.allocatable or {}).get("memory")),
+        "version": node.status.node_info.kubelet_version if node.status.node_info else None,
+        "os": node.status.node_info.os_image if node.status.node_info else None,
+        "kernel": node.status.node_info.kernel_version if node.status.node_info else None,
+        "runtime": node.status.node_info.container_runtime_version if node.status.node_info else None,
+        "roles": sorted(
+            label.split("/", 1)[1] for label in (node.metadata.labels or {})
+            if label.startswith("node-role.kubernetes.io/")
+        ) or ["worker"],
+        "conditions": [{"type": c.type, "status": c.status} for c in (node.status.conditions or [])],
+        "created": _timestamp(node.metadata.creation_timestamp),
+        "labels": node.metadata.labels or {}
+    }
+
 class K8sService:
     """Service for interacting with Kubernetes clusters"""
     
-    def __init__(self):
-        try:
-            config.load_kube_config()
-            logger.info("Loaded kubernetes config from kubeconfig")
-        except Exception as e:
-            logger.warning(f"Could not load Kubernetes config: {e}")
-                try:
-                    config.load_incluster_config()
-                logger.info("Loaded in-cluster kubernetes config")
-            except Exception as e2:
-                logger.warning(f"Could not load in-cluster config: {e2}")
-                # Create a mock client for development
-                self._use_mock = True
-                logger.info("Using mock k8s client for development")
-                return
+    def __init__(self, api_client: Optional[client.ApiClient] = None, name: str = "default"):
+        self.name = name
+        self._informers: Dict[str, Informer] = {}
+        self._informers_lock = threading.Lock()
+        self._metrics_collector: Optional[MetricsCollector] = None
+        self._event_log: Optional[EventLog] = None
+        self._log_store: Optional[LogStore] = None
+        self._log_capture: Optional[LogCapture] = None
+        # A dedicated client is closed with the service; the shared default is not
+        self._owns_client = api_client is not None
+        if api_client is None:
+            api_client = get_api_client()
+        self.api_client = api_client
+        self._use_mock = api_client is None
+        if self._use_mock:
+            logger.info("Using mock k8s client for development")
+            return
         
-        self._use_mock = False
-            self.v1 = client.CoreV1Api()
-            self.apps_v1 = client.AppsV1Api()
-            self.networking_v1 = client.NetworkingV1Api()
-            self.rbac_v1 = client.RbacAuthorizationV1Api()
-            
+        self.v1 = client.CoreV1Api(api_client)
+        self.apps_v1 = client.AppsV1Api(api_client)
+        self.networking_v1 = client.NetworkingV1Api(api_client)
+        self.rbac_v1 = client.RbacAuthorizationV1Api(api_client)
+        self.version_api = client.VersionApi(api_client)
+        self.events_v1 = client.EventsV1Api(api_client)
+        self.connectivity = ConnectivityMonitor(self._probe)
+    
     def _mock_response(self, resource_type="mock"):
         """Return mock data for development when k8s is not available"""
         return {
@@ -42,30 +148,165 @@ class K8sService:
             "mock": True
         }
     
-    def is_connected(self) -> bool:
-        """Check if connected to Kubernetes cluster"""
+    def _informer(self, kind: str) -> Optional[Informer]:
+        """Return the synced informer for a resource kind, starting it on first use"""
+        if self._use_mock or not INFORMERS_ENABLED:
+            return None
+        informer = self._informers.get(kind)
+        if informer is None:
+            with self._informers_lock:
+                informer = self._informers.get(kind)
+                if informer is None:
+                    list_funcs = {
+                        "namespaces": (self.v1.list_namespace, namespace_to_dict),
+                        "pods": (self.v1.list_pod_for_all_namespaces, pod_to_dict),
+                        "services": (self.v1.list_service_for_all_namespaces, service_to_dict),
+                        "deployments": (self.apps_v1.list_deployment_for_all_namespaces, deployment_to_dict),
+                        "nodes": (self.v1.list_node, node_to_dict)
+                    }
+                    list_func, transform = list_funcs[kind]
+                    informer = Informer(kind, list_func, transform)
+                    informer.start()
+                    self._informers[kind] = informer
+        # Until the initial LIST lands, callers fall back to a direct request
+        return informer if informer.has_synced() else None
+    
+    def informer(self, kind: str, timeout: Optional[float] = None) -> Optional[Informer]:
+        """Return the informer for a kind, waiting up to timeout for its initial LIST"""
+        informer = self._informer(kind)
+        if informer is None and kind in self._informers:
+            self._informers[kind].wait_for_sync(timeout)
+            informer = self._informer(kind)
+        return informer
+    
+    def metrics_collector(self) -> Optional[MetricsCollector]:
+        """Return the metrics collector once its informers have synced, starting it on first use"""
+        if self._use_mock or not INFORMERS_ENABLED:
+            return None
+        if self._metrics_collector is None:
+            pods, nodes = self._informer("pods"), self._informer("nodes")
+            if pods is None or nodes is None:
+                return None
+            with self._informers_lock:
+                if self._metrics_collector is None:
+                    collector = MetricsCollector(self.api_client, pods, nodes)
+                    for notifier in default_notifiers(self.name):
+                        collector.alert_manager.add_notifier(notifier)
+                    collector.start()
+                    self._metrics_collector = collector
+        return self._metrics_collector
+    
+    def event_log(self) -> Optional[EventLog]:
+        """Return the events history once the events watch has listed, starting it on first use"""
+        if self._use_mock or not INFORMERS_ENABLED:
+            return None
+        informer = self._informers.get("events")
+        if informer is None:
+            with self._informers_lock:
+                informer = self._informers.get("events")
+                if informer is None:
+                    # Events are only consumed as a stream; the log is their bounded store
+                    self._event_log = EventLog()
+                    informer = Informer("events", self.events_v1.list_event_for_all_namespaces, event_to_dict, keep_store=False)
+                    informer.add_handler(self._event_log)
+                    informer.start()
+                    self._informers["events"] = informer
+        return self._event_log if informer.has_synced() else None
+    
+    def log_store(self) -> Optional[LogStore]:
+        """Return the local log store, starting capture of the configured namespaces on first use"""
+        if self._use_mock or not LOG_STORE_DIR:
+            return None
+        if self._log_store is None:
+            with self._informers_lock:
+                if self._log_store is None:
+                    store = LogStore(os.path.join(LOG_STORE_DIR, self.name))
+                    if LOG_CAPTURE_NAMESPACES:
+                        self._log_capture = LogCapture(self, store, LOG_CAPTURE_NAMESPACES)
+                        self._log_capture.start()
+                    self._log_store = store
+        return self._log_store
+    
+    def stop_informers(self):
+        """Stop all running informers and the metrics collector"""
+        with self._informers_lock:
+            if self._metrics_collector is not None:
+                self._metrics_collector.stop()
+                self._metrics_collector = None
+            self._event_log = None
+            for informer in self._informers.values():
+                informer.stop()
+            self._informers.clear()
+    
+    def close(self):
+        """Stop informers and log capture, and release the HTTP connection pool of a dedicated client"""
+        self.stop_informers()
+        if self._log_capture is not None:
+            self._log_capture.stop()
+            self._log_capture = None
+        if self._owns_client:
+            self.api_client.close()
+    
+    def _probe(self):
+        """Cheapest apiserver round trip, bounded so an unreachable cluster fails fast"""
+        self.version_api.get_code(_request_timeout=PROBE_TIMEOUT_SECONDS)
+    
+    def _track(self, func, *args, **kwargs):
+        """Call the apiserver and report the outcome to the connectivity monitor"""
         try:
-            if self.v1:
-                self.v1.get_api_version()
-                return True
-        except Exception:
-            pass
-        return False
+            result = func(*args, **kwargs)
+        except ApiException as e:
+            # A 4xx answer still proves the apiserver is reachable
+            if e.status and e.status < 500:
+                self.connectivity.record_success()
+            else:
+                self.connectivity.record_failure(e)
+            raise
+        except Exception as e:
+            self.connectivity.record_failure(e)
+            raise
+        self.connectivity.record_success()
+        return result
+    
+    def _list(self, list_func, project_raw, project_model, *args, **kwargs) -> Dict[str, Any]:
+        """Run a LIST and project its items, skipping model deserialization when enabled"""
+        if RAW_LIST_ENABLED:
+            return self._track(list_projected, list_func, project_raw, *args, **kwargs)
+        result = self._track(list_func, *args, **kwargs)
+        return {
+            "items": [project_model(item) for item in result.items],
+            "continue": result.metadata._continue or None,
+            "resource_version": result.metadata.resource_version
+        }
+    
+    @property
+    def is_mock(self) -> bool:
+        """True when serving mock data because no cluster client was configured"""
+        return self._use_mock
+
+    def is_connected(self) -> bool:
+        """
+        Check if connected to Kubernetes cluster.
+        Answers from cached state; an open circuit returns False without a round trip.
+        """
+        if self._use_mock:
+            return False
+        return self.connectivity.available()
     
     def get_cluster_info(self) -> Dict[str, Any]:
         """Get basic cluster information"""
         if self._use_mock:
             return self._mock_response("cluster_info")
         if not self.is_connected():
-            return {"status": "disconnected", "mock": True}
+            return {"status": "degraded", "connectivity": self.connectivity.snapshot()}
             
         try:
-            version = self.v1.get_api_version()
-            nodes = self.v1.list_node()
+            version = self._track(self.version_api.get_code)
+            nodes = self._track(self.v1.list_node)
             
             return {
                 "status": "connected",
-                "version": version,
+                "version": version.git_version,
                 "node_count": len(nodes.items),
                 "nodes": [
                     {
@@ -84,166 +325,318 @@ class K8sService:
             logger.error(f"Error getting cluster info: {e}")
             return {"status": "error", "error": str(e)}
     
-    def get_namespaces(self) -> List[Dict[str, Any]]:
+    def get_cluster_health(self, fetch_nodes: Optional[Callable[[], List[Dict[str, Any]]]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Get cluster health from cached connectivity state and node readiness.
+        fetch_nodes replaces fetch_nodes() so callers can share one node listing.
+        """
+        if self._use_mock:
+            return None
+        if not self.is_connected():
+            return {
+                "status": "degraded",
+                "components": {"api_server": "unreachable"},
+                "connectivity": self.connectivity.snapshot()
+            }
+        
+        try:
+            nodes = (fetch_nodes or self.fetch_nodes)()
+        except ApiException as e:
+            logger.error(f"Error getting cluster health: {e}")
+            return {
+                "status": "degraded",
+                "components": {"api_server": "error"},
+                "connectivity": self.connectivity.snapshot()
+            }
+        ready_nodes = len([n for n in nodes if n["status"] == "Ready"])
+        return {
+            "status": "healthy" if ready_nodes == len(nodes) else "warning",
+            "components": {"api_server": "healthy"},
+            "node_count": len(nodes),
+            "ready_nodes": ready_nodes,
+            "connectivity": self.connectivity.snapshot()
+        }
+    
+    def _cached(
+        self,
+        kind: str,
+        namespace: Optional[str] = None,
+        label_selector: Optional[str] = None,
+        field_selector: Optional[str] = None
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Serve a listing from the informer cache, or None when it has to go to the apiserver"""
+        informer = self._informer(kind)
+        if informer is None:
+            return None
+        try:
+            predicate = selector_predicate(label_selector, field_selector)
+        except UnsupportedSelector:
+            return None
+        return informer.list(namespace, predicate)
+    
+    def get_namespaces(self, label_selector: Optional[str] = None, field_selector: Optional[str] = None) -> List[Dict[str, Any]]:
         """Get all namespaces"""
         if self._use_mock:
             return self._mock_response("namespaces")
+        cached = self._cached("namespaces", None, label_selector, field_selector)
+        if cached is not None:
+            return cached
         if not self.is_connected():
             return self._mock_namespaces()
             
         try:
-            namespaces = self.v1.list_namespace()
-            return [
-                {
-                    "name": ns.metadata.name,
-                    "status": ns.status.phase,
-                    "created": ns.metadata.creation_timestamp.isoformat() if ns.metadata.creation_timestamp else None,
-                    "labels": ns.metadata.labels or {}
-                }
-                for ns in namespaces.items
-            ]
+            return self._list(
+                self.v1.list_namespace, raw_namespace_to_dict, namespace_to_dict,
+                **selector_kwargs(label_selector, field_selector)
+            )["items"]
         except ApiException as e:
             logger.error(f"Error getting namespaces: {e}")
             return []
     
-    def get_pods(self, namespace: Optional[str] = None) -> List[Dict[str, Any]]:
+    def get_pods(
+        self,
+        namespace: Optional[str] = None,
+        label_selector: Optional[str] = None,
+        field_selector: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
         """Get pods in cluster or specific namespace"""
         if self._use_mock:
-            return self._mock_pods()
+            return self._filter_mock(self._mock_pods(), namespace, label_selector, field_selector)
+        cached = self._cached("pods", namespace, label_selector, field_selector)
+        if cached is not None:
+            return cached
         if not self.is_connected():
-            return self._mock_pods()
-            
-        try:
-            if namespace:
-                pods = self.v1.list_namespaced_pod(namespace)
-            else:
-                pods = self.v1.list_pod_for_all_namespaces()
-                
-            return [
-                {
-                    "name": pod.metadata.name,
-                    "namespace": pod.metadata.namespace,
-                    "status": pod.status.phase,
-                    "node": pod.spec.node_name,
-                    "created": pod.metadata.creation_timestamp.isoformat() if pod.metadata.creation_timestamp else None,
-                    "ready": sum(1 for c in (pod.status.container_statuses or []) if c.ready),
-                    "total_containers": len(pod.spec.containers),
-                    "restarts": sum(c.restart_count for c in (pod.status.container_statuses or [])),
-                    "labels": pod.metadata.labels or {}
-                }
-                for pod in pods.items
-            ]
-        except ApiException as e:
-            logger.error(f"Error getting pods: {e}")
-            return []
+            return self._filter_mock(self._mock_pods(), namespace, label_selector, field_selector)
+
+        # API errors propagate, so callers can tell a failure from no pods
+        selectors = selector_kwargs(label_selector, field_selector)
+        if namespace:
+            pods = self._list(self.v1.list_namespaced_pod, raw_pod_to_dict, pod_to_dict, namespace, **selectors)
+        else:
+            pods = self._list(self.v1.list_pod_for_all_namespaces, raw_pod_to_dict, pod_to_dict, **selectors)
+        return pods["items"]
     
-    def get_services(self, namespace: Optional[str] = None) -> List[Dict[str, Any]]:
+    def get_services(
+        self,
+        namespace: Optional[str] = None,
+        label_selector: Optional[str] = None,
+        field_selector: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
         """Get services in cluster or specific namespace"""
         if self._use_mock:
-            return self._mock_services()
+            return self._filter_mock(self._mock_services(), namespace, label_selector, field_selector)
+        cached = self._cached("services", namespace, label_selector, field_selector)
+        if cached is not None:
+            return cached
         if not self.is_connected():
-            return self._mock_services()
-            
-        try:
-            if namespace:
-                services = self.v1.list_namespaced_service(namespace)
-            else:
-                services = self.v1.list_service_for_all_namespaces()
-                
-            return [
-                {
-                    "name": svc.metadata.name,
-                    "namespace": svc.metadata.namespace,
-                    "type": svc.spec.type,
-                    "cluster_ip": svc.spec.cluster_ip,
-                    "external_ips": svc.spec.external_i_ps or [],
-                    "ports": [
-                        {
-                            "port": port.port,
-                            "target_port": str(port.target_port),
-                            "protocol": port.protocol
-                        }
-                        for port in (svc.spec.ports or [])
-                    ],
-                    "selector": svc.spec.selector or {},
-                    "created": svc.metadata.creation_timestamp.isoformat() if svc.metadata.creation_timestamp else None
-                }
-                for svc in services.items
-            ]
-        except ApiException as e:
-            logger.error(f"Error getting services: {e}")
-            return []
+            return self._filter_mock(self._mock_services(), namespace, label_selector, field_selector)
+
+        # API errors propagate, so callers can tell a failure from no services
+        selectors = selector_kwargs(label_selector, field_selector)
+        if namespace:
+            services = self._list(self.v1.list_namespaced_service, raw_service_to_dict, service_to_dict, namespace, **selectors)
+        else:
+            services = self._list(self.v1.list_service_for_all_namespaces, raw_service_to_dict, service_to_dict, **selectors)
+        return services["items"]
     
-    def get_deployments(self, namespace: Optional[str] = None) -> List[Dict[str, Any]]:
+    def get_deployments(
+        self,
+        namespace: Optional[str] = None,
+        label_selector: Optional[str] = None,
+        field_selector: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
         """Get deployments in cluster or specific namespace"""
         if self._use_mock:
-            return self._mock_deployments()
+            return self._filter_mock(self._mock_deployments(), namespace, label_selector, field_selector)
+        cached = self._cached("deployments", namespace, label_selector, field_selector)
+        if cached is not None:
+            return cached
         if not self.is_connected():
-            return self._mock_deployments()
-            
-        try:
-            if namespace:
-                deployments = self.apps_v1.list_namespaced_deployment(namespace)
-            else:
-                deployments = self.apps_v1.list_deployment_for_all_namespaces()
-                
-            return [
-                {
-                    "name": dep.metadata.name,
-                    "namespace": dep.metadata.namespace,
-                    "replicas": dep.spec.replicas,
-                    "ready_replicas": dep.status.ready_replicas or 0,
-                    "available_replicas": dep.status.available_replicas or 0,
-                    "updated_replicas": dep.status.updated_replicas or 0,
-                    "strategy": dep.spec.strategy.type if dep.spec.strategy else "RollingUpdate",
-                    "created": dep.metadata.creation_timestamp.isoformat() if dep.metadata.creation_timestamp else None,
-                    "labels": dep.metadata.labels or {}
-                }
-                for dep in deployments.items
-            ]
-        except ApiException as e:
-            logger.error(f"Error getting deployments: {e}")
-            return []
+            return self._filter_mock(self._mock_deployments(), namespace, label_selector, field_selector)
+
+        # API errors propagate, so callers can tell a failure from no deployments
+        selectors = selector_kwargs(label_selector, field_selector)
+        if namespace:
+            deployments = self._list(self.apps_v1.list_namespaced_deployment, raw_deployment_to_dict, deployment_to_dict, namespace, **selectors)
+        else:
+            deployments = self._list(self.apps_v1.list_deployment_for_all_namespaces, raw_deployment_to_dict, deployment_to_dict, **selectors)
+        return deployments["items"]
     
-    def get_cluster_metrics(self) -> Dict[str, Any]:
-        """Get cluster resource metrics"""
+    def get_cluster_metrics(self, fetch_nodes: Optional[Callable[[], List[Dict[str, Any]]]] = None) -> Dict[str, Any]:
+        """Get cluster resource metrics; fetch_nodes as in get_cluster_health"""
         if self._use_mock:
             return self._mock_metrics()
+        collector = self.metrics_collector()
+        if collector is not None:
+            return collector.snapshot()
         if not self.is_connected():
             return self._mock_metrics()
             
         try:
-            nodes = self.v1.list_node()
-            pods = self.v1.list_pod_for_all_namespaces()
-            
-            # Calculate basic metrics
-            total_pods = len(pods.items)
-            running_pods = len([p for p in pods.items if p.status.phase == "Running"])
-            pending_pods = len([p for p in pods.items if p.status.phase == "Pending"])
+            # Informers are still syncing; answer from one direct LIST each
+            nodes = (fetch_nodes or self.fetch_nodes)()
+            pods = self._list(self.v1.list_pod_for_all_namespaces, raw_pod_to_dict, pod_to_dict)["items"]
+            phases = Counter(pod["status"] or "Unknown" for pod in pods)
             
             return {
                 "nodes": {
-                    "total": len(nodes.items),
-                    "ready": len([n for n in nodes.items if any(
-                        c.type == "Ready" and c.status == "True" 
-                        for c in n.status.conditions
-                    )])
+                    "total": len(nodes),
+                    "ready": len([n for n in nodes if n["status"] == "Ready"])
                 },
                 "pods": {
-                    "total": total_pods,
-                    "running": running_pods,
-                    "pending": pending_pods,
-                    "failed": total_pods - running_pods - pending_pods
+                    "total": len(pods),
+                    "running": phases["Running"],
+                    "pending": phases["Pending"],
+                    "failed": phases["Failed"],
+                    "phases": dict(phases)
                 },
-                "cpu_usage": 65.5,  # Mock values - would integrate with metrics server
-                "memory_usage": 72.3,
-                "storage_usage": 45.8,
+                # Usage comes from metrics.k8s.io once the collector is running
+                "cpu_usage": None,
+                "memory_usage": None,
+                "storage_usage": None,
+                "metrics_available": False,
                 "timestamp": datetime.utcnow().isoformat()
             }
         except ApiException as e:
             logger.error(f"Error getting cluster metrics: {e}")
             return self._mock_metrics()
     
+    def metrics_store(self) -> Optional[TimeSeriesStore]:
+        """Recorded history of collected metrics, or None before the collector runs"""
+        collector = self.metrics_collector()
+        return collector.timeseries if collector is not None else None
+    
+    def alert_manager(self) -> Optional[AlertManager]:
+        """Grouped, silenceable alert state for this cluster, or None before the collector runs"""
+        collector = self.metrics_collector()
+        return collector.alert_manager if collector is not None else None
+    
+    def running_alert_manager(self) -> Optional[AlertManager]:
+        """The alert manager if the collector already runs; unlike alert_manager() it never starts anything"""
+        collector = self._metrics_collector
+        return collector.alert_manager if collector is not None else None
+    
+    def get_nodes(self) -> List[Dict[str, Any]]:
+        """Get cluster nodes"""
+        if self._use_mock:
+            return []
+        cached = self._cached("nodes")
+        if cached is not None:
+            return cached
+        if not self.is_connected():
+            return []
+        
+        try:
+            return self.fetch_nodes()
+        except ApiException as e:
+            logger.error(f"Error getting nodes: {e}")
+            return []
+    
+    def get_events(
+        self,
+        namespace: Optional[str] = None,
+        involved_object: Optional[str] = None,
+        reason: Optional[str] = None,
+        event_type: Optional[str] = None,
+        before: Optional[int] = None,
+        after: Optional[int] = None,
+        limit: int = 50
+    ) -> Optional[Dict[str, Any]]:
+        """Page of recent events from the event log, or None in mock mode"""
+        if self._use_mock:
+            return None
+        log = self.event_log()
+        if log is not None:
+            return log.page(namespace, involved_object, reason, event_type, before, after, limit)
+        if not self.is_connected():
+            return None
+        
+        # The watch is still listing; answer from one bounded LIST without cursors
+        kwargs = {"namespace": namespace, "limit": limit} if namespace else {"limit": limit}
+        list_func = self.events_v1.list_namespaced_event if namespace else self.events_v1.list_event_for_all_namespaces
+        try:
+            events = [event_to_dict(event) for event in self._track(list_func, **kwargs).items]
+        except ApiException as e:
+            logger.error(f"Error getting events: {e}")
+            return None
+        filters = {"object": involved_object, "reason": reason, "type": event_type}
+        events = [e for e in events if all(v is None or e.get(k) == v for k, v in filters.items())]
+        return {"events": sorted(events, key=lambda e: e["timestamp"] or "", reverse=True), "next_cursor": None, "latest": None}
+    
+    def stream_logs(
+        self,
+        namespace: str,
+        pod_name: Optional[str] = None,
+        label_selector: Optional[str] = None,
+        container: Optional[str] = None,
+        follow: bool = False,
+        tail_lines: Optional[int] = None,
+        since_seconds: Optional[int] = None
+    ) -> Optional[LogMultiplexer]:
+        """
+        Started multiplexer over the logs of one pod, or of every pod matching
+        label_selector. Without container every container of each pod is
+        streamed. None in mock mode or when the cluster is unreachable.
+        """
+        if self._use_mock or not self.is_connected():
+            return None
+        if pod_name:
+            pods = self.get_pods(namespace, field_selector=f"metadata.name={pod_name}")
+        else:
+            pods = self.get_pods(namespace, label_selector=label_selector)
+        streams = [
+            PodLogStream(self.v1, namespace, pod["name"], name, follow, tail_lines, since_seconds)
+            for pod in pods
+            for name in ([container] if container else pod.get("containers") or [None])
+        ]
+        if len(streams) > MAX_LOG_STREAMS:
+            logger.warning(f"Log stream for {namespace}/{label_selector} limited to {MAX_LOG_STREAMS} of {len(streams)} containers")
+            streams = streams[:MAX_LOG_STREAMS]
+        return LogMultiplexer(streams).start()
+    
+    def get_logs(
+        self,
+        namespace: Optional[str] = None,
+        pod_name: Optional[str] = None,
+        limit: int = 100
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Last limit log lines of a pod, or of every pod in a namespace, oldest first"""
+        if not namespace:
+            return None
+        limit = max(1, min(limit, LOG_TAIL_MAX_LINES))
+        logs = self.stream_logs(namespace, pod_name, tail_lines=limit)
+        if logs is None:
+            return None
+        # Every pod sends up to limit lines; only the last limit of them are kept
+        lines = deque(logs, maxlen=limit)
+        return [
+            {**line, "source": line["pod"], "level": extract_level(line.get("message", ""))}
+            for line in lines
+        ]
+    
+    def fetch_nodes(self) -> List[Dict[str, Any]]:
+        """Nodes from the informer cache, else one LIST; unlike get_nodes, API errors propagate"""
+        cached = self._cached("nodes")
+        if cached is not None:
+            return cached
+        return [node_to_dict(node) for node in self._track(self.v1.list_node).items]
+    
+    def _filter_mock(
+        self,
+        items: List[Dict[str, Any]],
+        namespace: Optional[str] = None,
+        label_selector: Optional[str] = None,
+        field_selector: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Apply the filters the apiserver would have applied to mock data"""
+        if namespace:
+            items = [item for item in items if item.get("namespace") == namespace]
+        try:
+            predicate = selector_predicate(label_selector, field_selector)
+        except UnsupportedSelector:
+            return items
+        return [item for item in items if predicate(item)] if predicate else items
+    
     def _mock_namespaces(self) -> List[Dict[str, Any]]:
         """Mock namespaces for development/testing"""
         return [
@@ -265,6 +658,7 @@ class K8sService:
                 "created": "2024-01-01T10:00:00Z",
                 "ready": 1,
                 "total_containers": 1,
+                "containers": ["web-app"],
                 "restarts": 0,
                 "labels": {"app": "web-app", "env": "production"}
             },
@@ -276,6 +670,7 @@ class K8sService:
                 "created": "2024-01-01T10:05:00Z",
                 "ready": 1,
                 "total_containers": 1,
+                "containers": ["api-service"],
                 "restarts": 2,
                 "labels": {"app": "api-service", "env": "production"}
             }
@@ -1,8 +1,10 @@
-from fastapi import FastAPI, Depends, HTTPException, WebSocket, WebSocketDisconnect, Request, status
+from fastapi import FastAPI, Depends, HTTPException, WebSocket, WebSocketDisconnect, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 from typing import List, Optional, Union, Dict, Any
+from kubernetes.client.rest import ApiException
 from datetime import datetime, timedelta
 import os
 import jwt
@@ -12,16 +14,24 @@ import asyncio
 import json
 import logging
 import traceback
+from contextlib import asynccontextmanager
 
-from database import get_db, engine, Base
+from database import get_db, engine, Base, SessionLocal
 from models import User, Cluster, Workload
 from schemas import (
     UserCreate, UserResponse, ClusterCreate, ClusterResponse,
     WorkloadCreate, WorkloadResponse, DashboardStats, LoginResponse
 )
-from services.kubernetes_service import KubernetesService
 from services.auth import get_current_user
-from services.kube import get_kubernetes_client, list_namespaces, list_pods
+from services.kube import get_kubernetes_client, iter_pods, decode_cursor, CursorError, DEFAULT_PAGE_SIZE
+from services.async_kube import run_blocking, list_namespaces, list_pods, list_pods_page
+from services.client_provider import close_api_client
+from services.cluster_registry import cluster_registry
+from services.ws_hub import Payload, WebSocketHub
+from services.topics import TopicFeed, TopicError
+from services.broker import create_broker
+from services.sse import EventChannel, parse_event_id
+from models.kubernetes import KubernetesResource
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -30,7 +40,21 @@ logger = logging.getLogger(__name__)
 # Create database tables
 Base.metadata.create_all(bind=engine)
 
-app = FastAPI(title="K8s Dash API", version="1.0.0", description="Kubernetes Dashboard API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Kubernetes clients are built lazily on first use, so startup does no
+    # kubeconfig parsing; shutdown stops informers and closes connection pools
+    await topic_feed.start()
+    feed_task = asyncio.create_task(topic_feed.run())
+    dashboard_task = asyncio.create_task(publish_dashboard_events())
+    yield
+    dashboard_task.cancel()
+    feed_task.cancel()
+    await topic_feed.close()
+    cluster_registry.close()
+    close_api_client()
+
+app = FastAPI(title="K8s Dash API", version="1.0.0", description="Kubernetes Dashboard API", lifespan=lifespan)
 
 # Set development mode flag for bypassing authentication
 DEV_MODE = os.environ.get("DEV_MODE", "false").lower() == "true"
@@ -64,23 +88,11 @@ SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-here")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "1440"))
 
-# WebSocket connection manager
-class ConnectionManager:
-    def __init__(self):
-        self.active_connections: List[WebSocket] = []
-
-    async def connect(self, websocket: WebSocket):
-        await websocket.accept()
-        self.active_connections.append(websocket)
-
-    def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
-
-    async def broadcast(self, message: str):
-        for connection in self.active_connections:
-            await connection.send_text(message)
-
-manager = ConnectionManager()
+# WebSocket connections, each with its own bounded send queue
+manager = WebSocketHub()
+# Topic subscriptions over those connections, fed by the cluster watches and
+# shared with the other workers through the broker
+topic_feed = TopicFeed(manager, cluster_registry.get, create_broker())
 
 # Authentication functions
 def verify_password(plain_password, hashed_password):
@@ -173,8 +185,7 @@ async def register(user: UserCreate, db: Session = Depends(get_db)):
     return UserResponse.from_orm(db_user)
 
 # Dashboard endpoints
-@app.get("/api/dashboard/stats", response_model=DashboardStats)
-async def get_dashboard_stats(current_user: User = Depends(get_current_user_maybe_bypass), db: Session = Depends(get_db)):
+def dashboard_stats() -> Dict[str, Any]:
     # Return hardcoded mock data
     # No database queries at all to avoid schema issues
         return {
@@ -233,8 +244,11 @@ async def get_dashboard_stats(current_user: User = Depends(get_current_user_mayb
         ]
     }
 
-@app.get("/api/dashboard/activity")
-async def get_recent_activity(current_user: User = Depends(get_current_user)):
+@app.get("/api/dashboard/stats", response_model=DashboardStats)
+async def get_dashboard_stats(current_user: User = Depends(get_current_user_maybe_bypass), db: Session = Depends(get_db)):
+    return dashboard_stats()
+
+def recent_activity() -> List[Dict[str, Any]]:
     # Mock activity data
     return [
         {
@@ -260,6 +274,49 @@ async def get_recent_activity(current_user: User = Depends(get_current_user)):
         }
     ]
 
+@app.get("/api/dashboard/activity")
+async def get_recent_activity(current_user: User = Depends(get_current_user)):
+    return recent_activity()
+
+# Dashboard state is re-read once per interval for all SSE clients, and only changes are pushed
+DASHBOARD_EVENTS_INTERVAL_SECONDS = float(os.getenv("DASHBOARD_EVENTS_INTERVAL_SECONDS", "10"))
+dashboard_events = EventChannel()
+
+async def publish_dashboard_events():
+    while True:
+        try:
+            dashboard_events.publish("stats", json.dumps(dashboard_stats()))
+            dashboard_events.publish("activity", json.dumps(recent_activity()))
+        except Exception as e:
+            logger.warning(f"Dashboard events update failed: {e}")
+        await asyncio.sleep(DASHBOARD_EVENTS_INTERVAL_SECONDS)
+
+@app.get("/api/dashboard/events")
+async def dashboard_event_stream(
+    request: Request,
+    token: Optional[str] = None,
+    last_event_id: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Server-sent "stats" and "activity" events. EventSource cannot set
+    headers, so the token may be passed as a query parameter; on reconnect
+    the browser sends Last-Event-ID and only missed changes are replayed.
+    """
+    if token is None:
+        scheme, _, credentials = request.headers.get("Authorization", "").partition(" ")
+        token = credentials if scheme.lower() == "bearer" else None
+    if not token:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
+    await get_current_user(token, db)
+    resume_from = parse_event_id(request.headers.get("Last-Event-ID") or last_event_id)
+    return StreamingResponse(
+        dashboard_events.stream(resume_from),
+        media_type="text/event-stream",
+        # Proxies must neither buffer nor cache the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 # Cluster endpoints
 @app.get("/api/clusters", response_model=List[ClusterResponse])
 async def get_clusters(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
@@ -319,7 +376,7 @@ async def create_cluster(cluster: ClusterCreate, current_user: User = Depends(ge
     db.refresh(db_cluster)
     
     # Broadcast update via WebSocket
-    await manager.broadcast(json.dumps({
+    manager.broadcast(Payload({
         "type": "cluster_created",
         "data": {"id": db_cluster.id, "name": db_cluster.name}
     }))
@@ -430,9 +487,34 @@ async def get_metrics(
         "timestamp": datetime.utcnow().isoformat()
     }
 
+def collect_alerts() -> List[Dict[str, Any]]:
+    """Alerts of every cluster with a live client, one entry per cluster and fingerprint"""
+    alerts = {}
+    for cluster_id, service in cluster_registry.services():
+        # Listing alerts must not start informers and a collector on every cached cluster
+        manager = service.running_alert_manager()
+        if manager is None:
+            continue
+        for alert in manager.alerts():
+            alerts[(cluster_id, alert["id"])] = {
+                "id": alert["id"],
+                "cluster": cluster_id,
+                "severity": alert["severity"],
+                "title": alert["title"],
+                "message": alert["description"],
+                "status": alert["status"],
+                "timestamp": alert["timestamp"],
+                "acknowledged": alert["silenced_by"] is not None,
+                "labels": alert["labels"]
+            }
+    return list(alerts.values())
+
 @app.get("/api/monitoring/alerts")
 async def get_alerts(current_user: User = Depends(get_current_user)):
-    # Mock alerts data
+    alerts = await run_blocking(collect_alerts)
+    if alerts:
+        return alerts
+    # Mock alerts data until a cluster's metrics collector is running
     return [
         {
             "id": 1,
@@ -472,34 +554,82 @@ async def get_cost_data(
         ]
     }
 
+async def authenticate_websocket(token: Optional[str]) -> bool:
+    """Apply the REST routes' token check to a WebSocket, which browsers open without headers"""
+    if not token:
+        return False
+    db = SessionLocal()
+    try:
+        await get_current_user(token, db)
+        return True
+    except HTTPException:
+        return False
+    finally:
+        db.close()
+
 # WebSocket endpoint
 @app.websocket("/ws")
-async def websocket_endpoint(websocket: WebSocket, token: Optional[str] = None):
-    await manager.connect(websocket)
+async def websocket_endpoint(websocket: WebSocket, token: Optional[str] = None, encoding: str = "json"):
+    """
+    Real-time updates by topic. Clients send
+    {"type": "subscribe" | "unsubscribe", "data": {"topic": "<cluster>/<kind>[/<namespace>]"}}
+    as JSON text and get a snapshot of the topic followed by delta messages.
+    With encoding=msgpack those arrive as MessagePack binary frames.
+    """
+    if not await authenticate_websocket(token):
+        logger.info("Rejected WebSocket: not authenticated")
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    try:
+        connection = await manager.connect(websocket, encoding=encoding)
+    except ValueError as e:
+        logger.info(f"Rejected WebSocket: {e}")
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    # Building a snapshot can take seconds, so subscriptions run as tasks
+    # and do not hold up later messages on the socket
+    subscribing: Dict[str, asyncio.Task] = {}
+
+    async def subscribe(topic: str):
+        try:
+            await topic_feed.subscribe(connection, topic)
+        except TopicError as e:
+            connection.send(Payload({"type": "error", "topic": topic, "message": str(e)}))
+        finally:
+            subscribing.pop(topic, None)
+
     try:
         # Send initial connection message
-        await websocket.send_text(json.dumps({
+        connection.send(Payload({
             "type": "connection",
             "message": "Connected to real-time updates"
         }))
-        
-        # Keep connection alive and send periodic updates
-        while True:
-            # Wait for messages or send periodic updates
-            await asyncio.sleep(30)
-            
-            # Send mock metric update
-            await websocket.send_text(json.dumps({
-                "type": "metrics_update",
-                "data": {
-                    "cpu": 45 + (await asyncio.get_event_loop().run_in_executor(None, __import__('random').randint, -5, 5)),
-                    "memory": 62 + (await asyncio.get_event_loop().run_in_executor(None, __import__('random').randint, -3, 3)),
-                    "timestamp": datetime.utcnow().isoformat()
-                }
-            }))
-            
-    except WebSocketDisconnect:
-        manager.disconnect(websocket)
+        while not connection.closed:
+            try:
+                request = json.loads(await websocket.receive_text())
+                action = request.get("type")
+                topic = (request.get("data") or {}).get("topic")
+            except (ValueError, AttributeError):
+                connection.send(Payload({"type": "error", "message": "Messages must be JSON objects"}))
+                continue
+            if action not in ("subscribe", "unsubscribe") or not isinstance(topic, str):
+                continue
+            if action == "subscribe":
+                # A repeated subscribe while the first is pending gets that snapshot
+                if topic not in subscribing:
+                    subscribing[topic] = asyncio.create_task(subscribe(topic))
+                continue
+            pending = subscribing.pop(topic, None)
+            if pending is not None:
+                pending.cancel()
+                await asyncio.wait([pending])
+            topic_feed.unsubscribe(connection, topic)
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        for pending in list(subscribing.values()):
+            pending.cancel()
+        manager.disconnect(connection)
 
 # Development mode endpoint to bypass authentication
 @app.get("/api/dev/login", response_model=LoginResponse, include_in_schema=DEV_MODE)
@@ -627,17 +757,74 @@ async def global_exception_handler(request, exc):
 
 # Kubernetes API endpoints
 @app.get("/api/namespaces", response_model=List[KubernetesResource])
-async def get_namespaces(current_user: User = Depends(get_current_user)):
-    client = get_kubernetes_client()
-    namespaces = list_namespaces(client)
+async def get_namespaces(
+    label_selector: Optional[str] = None,
+    field_selector: Optional[str] = None,
+    current_user: User = Depends(get_current_user)
+):
+    client = await run_blocking(get_kubernetes_client)
+    namespaces = await list_namespaces(client, label_selector, field_selector)
     return namespaces
 
 @app.get("/api/namespaces/{namespace}/pods", response_model=List[KubernetesResource])
-async def get_pods(namespace: str, current_user: User = Depends(get_current_user)):
-    client = get_kubernetes_client()
-    pods = list_pods(client, namespace)
+async def get_pods(
+    namespace: str,
+    response: Response,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    metadata_only: bool = False,
+    label_selector: Optional[str] = None,
+    field_selector: Optional[str] = None,
+    current_user: User = Depends(get_current_user)
+):
+    client = await run_blocking(get_kubernetes_client)
+    if limit is None and cursor is None:
+        return await list_pods(client, namespace, metadata_only, label_selector, field_selector)
+    
+    # Paginated mode: the next page's cursor is returned in X-Next-Cursor
+    try:
+        decode_cursor(cursor)
+    except CursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        pods, next_cursor = await list_pods_page(
+            client, namespace, limit or DEFAULT_PAGE_SIZE, cursor, label_selector, field_selector
+        )
+    except ApiException as e:
+        if e.status == 410:
+            raise HTTPException(status_code=410, detail="Cursor expired, restart the listing without a cursor")
+        raise
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     return pods
 
+@app.get("/api/namespaces/{namespace}/pods/stream")
+async def stream_pods(
+    namespace: str,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    label_selector: Optional[str] = None,
+    field_selector: Optional[str] = None,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Stream pods as NDJSON, one line per pod, fetching pages as the client
+    reads. A listing that fails part way ends with an {"error": ...} line,
+    so a truncated stream is never mistaken for a complete one.
+    """
+    client = await run_blocking(get_kubernetes_client)
+    
+    def generate():
+        try:
+            for pod in iter_pods(client, namespace, page_size, label_selector, field_selector):
+                yield pod.json() + "\n"
+        except ApiException as e:
+            # The status line is already sent; report the failure in the body
+            logger.warning(f"Pod stream for namespace {namespace} failed: {e.status} {e.reason}")
+            message = "Listing expired, restart the stream" if e.status == 410 else e.reason or "Listing failed"
+            yield json.dumps({"error": message, "status": e.status}) + "\n"
+    
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
 # User profile endpoint
 @app.get("/api/user/profile", response_model=User)
 async def get_user_profile(current_user: User = Depends(get_current_user)):
@@ -645,4 +832,4 @@ async def get_user_profile(current_user: User = Depends(get_current_user)):
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
+    uvicorn.run(app, host="0.0.0.0", port=8000, reload=True, ws="websockets", ws_per_message_deflate=True)
\ No newline at end of file
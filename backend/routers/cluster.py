@@ -10,9 +10,12 @@ import crud
 import models
 from k8s_service import K8sService
 from auth_service import AuthService
+from dependencies import get_k8s_service, get_async_k8s_service
+from services.async_kube import AsyncK8sService
+from services.fanout import fan_out_async
+from services.selectors import validate_selectors, SelectorError
 
 router = APIRouter(prefix="/cluster", tags=["cluster"])
-k8s_service = K8sService()
 auth_service = AuthService()
 
 def get_current_user(credentials = Depends(auth_service.get_current_user)):
@@ -99,7 +102,7 @@ def scale_cluster(cluster_id: str, scale_config: dict, db: Session = Depends(get
     return {"status": f"Cluster {cluster_id} scaled to {node_count} nodes"}
 
 @router.get("/{cluster_id}/namespaces")
-def list_namespaces(cluster_id: str, db: Session = Depends(get_db), current_user: dict = Depends(get_current_user)):
+def list_namespaces(cluster_id: str, db: Session = Depends(get_db), current_user: dict = Depends(get_current_user), k8s_service: K8sService = Depends(get_k8s_service)):
     """List namespaces in a cluster"""
     try:
         # Try to get real namespaces from Kubernetes
@@ -119,7 +122,7 @@ def list_namespaces(cluster_id: str, db: Session = Depends(get_db), current_user
         raise HTTPException(status_code=500, detail=f"Failed to list namespaces: {str(e)}")
 
 @router.post("/{cluster_id}/namespaces")
-def create_namespace(cluster_id: str, namespace_data: dict, db: Session = Depends(get_db), current_user: dict = Depends(get_current_user)):
+def create_namespace(cluster_id: str, namespace_data: dict, db: Session = Depends(get_db), current_user: dict = Depends(get_current_user), k8s_service: K8sService = Depends(get_k8s_service)):
     """Create namespace in a cluster"""
     namespace_name = namespace_data.get('name')
     if not namespace_name:
@@ -143,7 +146,7 @@ def create_namespace(cluster_id: str, namespace_data: dict, db: Session = Depend
         raise HTTPException(status_code=500, detail=f"Failed to create namespace: {str(e)}")
 
 @router.delete("/{cluster_id}/namespaces/{namespace}")
-def delete_namespace(cluster_id: str, namespace: str, current_user: dict = Depends(get_current_user)):
+def delete_namespace(cluster_id: str, namespace: str, current_user: dict = Depends(get_current_user), k8s_service: K8sService = Depends(get_k8s_service)):
     """Delete namespace from a cluster"""
     try:
         # Try to delete namespace from Kubernetes
@@ -157,46 +160,38 @@ def delete_namespace(cluster_id: str, namespace: str, current_user: dict = Depen
         raise HTTPException(status_code=500, detail=f"Failed to delete namespace: {str(e)}")
 
 @router.get("/{cluster_id}/workloads")
-def list_workloads(cluster_id: str, namespace: str = None, current_user: dict = Depends(get_current_user)):
+async def list_workloads(
+    cluster_id: str,
+    namespace: str = None,
+    label_selector: Optional[str] = None,
+    field_selector: Optional[str] = None,
+    current_user: dict = Depends(get_current_user),
+    k8s_service: AsyncK8sService = Depends(get_async_k8s_service)
+):
     """List workloads (pods, services, ingress) in a cluster"""
     try:
-        # Try to get real workloads from Kubernetes
-        pods = k8s_service.list_pods(namespace)
-        services = k8s_service.list_services(namespace)
-        deployments = k8s_service.list_deployments(namespace)
-        
-        # If we get real data, use it; otherwise use mock data
-        if pods or services or deployments:
-            workloads = {
-                "pods": pods or [],
-                "services": services or [],
-                "deployments": deployments or []
-            }
-        else:
-            # Fallback to mock data if K8s not available
-            workloads = {
-                "pods": [
-                    {"name": "nginx-deployment-abc123", "namespace": "default", "status": "Running", "cpu": "100m", "memory": "128Mi"},
-                    {"name": "redis-xyz789", "namespace": "default", "status": "Running", "cpu": "50m", "memory": "64Mi"}
-                ],
-                "services": [
-                    {"name": "nginx-service", "namespace": "default", "type": "ClusterIP", "cluster_ip": "10.0.0.1"},
-                    {"name": "redis-service", "namespace": "default", "type": "ClusterIP", "cluster_ip": "10.0.0.2"}
-                ],
-                "deployments": [
-                    {"name": "nginx-deployment", "namespace": "default", "replicas": 3, "ready": 3},
-                    {"name": "redis-deployment", "namespace": "default", "replicas": 1, "ready": 1}
-                ]
-            }
-        
-        if namespace:
-            # Filter by namespace if specified
-            for workload_type in workloads:
-                workloads[workload_type] = [w for w in workloads[workload_type] if w.get('namespace') == namespace]
-        
-        return {"workloads": workloads}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to list workloads: {str(e)}")
+        validate_selectors(label_selector, field_selector)
+    except SelectorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    # Mock data is for clusters without a client; a real cluster that cannot
+    # be reached is reported as such
+    if not k8s_service.is_mock and not await k8s_service.is_connected():
+        raise HTTPException(status_code=503, detail=f"Cluster {cluster_id} is not available")
+
+    # Fetch all kinds concurrently; a slow or failing kind is reported in
+    # "errors" instead of delaying or failing the whole response.
+    # Namespace and selectors are applied by the apiserver or informer cache
+    selectors = {"label_selector": label_selector, "field_selector": field_selector}
+    results, errors = await fan_out_async({
+        "pods": k8s_service.get_pods(namespace, **selectors),
+        "services": k8s_service.get_services(namespace, **selectors),
+        "deployments": k8s_service.get_deployments(namespace, **selectors)
+    })
+    workloads = {kind: results.get(kind) or [] for kind in ("pods", "services", "deployments")}
+    
+    if errors:
+        return {"workloads": workloads, "errors": errors, "partial": True}
+    return {"workloads": workloads}
 
 @router.post("/{cluster_id}/workloads")
 def create_workload(cluster_id: str, workload_data: dict, db: Session = Depends(get_db)):
@@ -5,11 +5,10 @@ import json
 import yaml
 from datetime import datetime
 
-from k8s_service import K8sService
 from auth_service import AuthService
+from dependencies import get_async_k8s_service
 
 router = APIRouter(prefix="/deployment", tags=["deployment"])
-k8s_service = K8sService()
 auth_service = AuthService()
 
 def get_current_user(credentials = Depends(auth_service.get_current_user)):
@@ -78,9 +77,10 @@ def add_to_history(deployment_type: str, details: Dict[str, Any]):
 @router.post("/helm")
 async def helm_deploy(deployment: HelmDeployment, current_user: dict = Depends(get_current_user)):
     """Deploy application using Helm chart"""
+    k8s_service = get_async_k8s_service(deployment.cluster_context)
     try:
         # Try to deploy using actual Helm if available
-        deployment_result = k8s_service.deploy_helm_chart(
+        deployment_result = await k8s_service.deploy_helm_chart(
             chart_name=deployment.chart_name,
             release_name=deployment.release_name,
             namespace=deployment.namespace,
@@ -154,9 +154,10 @@ async def helm_deploy(deployment: HelmDeployment, current_user: dict = Depends(g
 @router.post("/manifest")
 async def manifest_deploy(deployment: ManifestDeployment, current_user: dict = Depends(get_current_user)):
     """Deploy using raw Kubernetes manifests"""
+    k8s_service = get_async_k8s_service(deployment.cluster_context)
     try:
         # Try to deploy using actual Kubernetes if available
-        deployment_result = k8s_service.apply_manifests(
+        deployment_result = await k8s_service.apply_manifests(
             manifests=deployment.manifests,
             namespace=deployment.namespace,
             dry_run=deployment.dry_run
@@ -1,25 +1,48 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import StreamingResponse
+import asyncio
+import json
 import random
-from datetime import datetime, timedelta
-from typing import Optional
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+from kubernetes.client.rest import ApiException
+from pydantic import BaseModel, Field
 
 from k8s_service import K8sService
+from services import tsquery
+from services.alerts import summarize_alerts
+from services.alert_manager import AlertManager, MAX_SILENCE_SECONDS
+from services.dashboard import dashboard_aggregator
+from services.events import MAX_EVENT_PAGE
+from services.logs import LogMultiplexer, LogSearch, extract_level, normalize_timestamp, read_batches, LOG_SEARCH_MAX_LINES, LOG_SEARCH_MAX_BYTES, LOG_TAIL_MAX_LINES
+from services.async_kube import run_blocking
+from services.selectors import parse_label_selector, SelectorError
 from auth_service import AuthService
+from dependencies import get_k8s_service
+from services.cluster_registry import cluster_registry
 
 router = APIRouter(prefix="/monitoring", tags=["monitoring"])
-k8s_service = K8sService()
 auth_service = AuthService()
 
 def get_current_user(credentials = Depends(auth_service.get_current_user)):
     """Dependency to get current authenticated user"""
     return credentials
 
+NodesFetcher = Callable[[], List[Dict[str, Any]]]
+
 @router.get("/health/{cluster_id}")
-def cluster_health(cluster_id: str, current_user: dict = Depends(get_current_user)):
+def cluster_health(cluster_id: str, current_user: dict = Depends(get_current_user), k8s_service: K8sService = Depends(get_k8s_service)):
     """Get real-time cluster health status"""
+    return health_report(cluster_id, k8s_service)
+
+def health_report(cluster_id: str, k8s_service: K8sService, fetch_nodes: Optional[NodesFetcher] = None) -> dict:
+    """Body of cluster_health; fetch_nodes lets the dashboard share one node listing"""
     try:
         # Try to get real cluster health from Kubernetes
-        health_data = k8s_service.get_cluster_health()
+        health_data = k8s_service.get_cluster_health(fetch_nodes)
         
         if health_data:
             return {
@@ -28,7 +51,8 @@ def cluster_health(cluster_id: str, current_user: dict = Depends(get_current_use
                 "timestamp": datetime.utcnow().isoformat(),
                 "components": health_data.get("components", {}),
                 "node_count": health_data.get("node_count", 0),
-                "ready_nodes": health_data.get("ready_nodes", 0)
+                "ready_nodes": health_data.get("ready_nodes", 0),
+                "connectivity": health_data.get("connectivity")
             }
         else:
             # Fallback to mock data if K8s not available
@@ -52,13 +76,38 @@ def cluster_health(cluster_id: str, current_user: dict = Depends(get_current_use
         raise HTTPException(status_code=500, detail=f"Failed to get cluster health: {str(e)}")
 
 @router.get("/metrics/{cluster_id}")
-def cluster_metrics(cluster_id: str, current_user: dict = Depends(get_current_user)):
-    """Get comprehensive cluster metrics"""
+def cluster_metrics(
+    cluster_id: str,
+    window: int = Query(3600, ge=60, le=30 * 24 * 3600),
+    step: int = Query(60, ge=30),
+    current_user: dict = Depends(get_current_user),
+    k8s_service: K8sService = Depends(get_k8s_service)
+):
+    """Get comprehensive cluster metrics, with history over the last window seconds"""
+    return metrics_report(cluster_id, k8s_service, window, step)
+
+def metrics_report(
+    cluster_id: str,
+    k8s_service: K8sService,
+    window: int,
+    step: int,
+    fetch_nodes: Optional[NodesFetcher] = None
+) -> dict:
+    """Body of cluster_metrics; fetch_nodes as in health_report"""
     try:
         # Try to get real metrics from Kubernetes
-        metrics_data = k8s_service.get_cluster_metrics()
+        metrics_data = k8s_service.get_cluster_metrics(fetch_nodes)
         
         if metrics_data:
+            store = k8s_service.metrics_store()
+            if store is not None:
+                end = time.time()
+                timeseries, summary = {}, {}
+                for name in ("cpu_usage", "memory_usage", "pods_running"):
+                    timestamps, values = store.query(name, end - window, end, step)
+                    timeseries[name] = tsquery.points(timestamps, values)
+                    summary[name] = tsquery.summarize(values)
+                metrics_data = {**metrics_data, "timeseries": timeseries, "summary": summary}
             return {"metrics": metrics_data}
         else:
             # Fallback to mock data if K8s metrics not available
@@ -111,8 +160,25 @@ def cluster_metrics(cluster_id: str, current_user: dict = Depends(get_current_us
         raise HTTPException(status_code=500, detail=f"Failed to get cluster metrics: {str(e)}")
 
 @router.get("/logs/{cluster_id}")
-def cluster_logs(cluster_id: str, namespace: Optional[str] = None, pod_name: Optional[str] = None, limit: int = 100, current_user: dict = Depends(get_current_user)):
-    """Get pod/node logs from cluster"""
+def cluster_logs(
+    cluster_id: str,
+    namespace: Optional[str] = None,
+    pod_name: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=LOG_TAIL_MAX_LINES),
+    source: str = Query("live", pattern="^(live|stored)$"),
+    container: Optional[str] = None,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    current_user: dict = Depends(get_current_user),
+    k8s_service: K8sService = Depends(get_k8s_service)
+):
+    """
+    Get pod/node logs from cluster. source=stored reads the local log
+    store instead, which keeps logs of deleted pods and supports a
+    start/end time range.
+    """
+    if source == "stored":
+        return stored_logs(k8s_service, namespace, pod_name, container, start, end, limit)
     try:
         # Try to get real logs from Kubernetes
         logs = k8s_service.get_logs(namespace=namespace, pod_name=pod_name, limit=limit)
@@ -168,10 +234,216 @@ def cluster_logs(cluster_id: str, namespace: Optional[str] = None, pod_name: Opt
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get cluster logs: {str(e)}")
 
+def stored_logs(
+    k8s_service: K8sService,
+    namespace: Optional[str],
+    pod_name: Optional[str],
+    container: Optional[str],
+    start: Optional[str],
+    end: Optional[str],
+    limit: int
+) -> Dict[str, Any]:
+    """Last limit lines of the local log store in the range, oldest first"""
+    store = k8s_service.log_store()
+    if store is None:
+        raise HTTPException(status_code=404, detail="Log retention is not enabled for this cluster")
+    start_at = normalize_timestamp(_log_timestamp(_parse_time(start, "start"))) if start else None
+    end_at = normalize_timestamp(_log_timestamp(_parse_time(end, "end"))) if end else None
+    lines = store.query(namespace, pod_name, container, start_at, end_at, limit)
+    logs = [
+        {**line, "source": line["pod"], "level": extract_level(line["message"])}
+        for line in lines
+    ]
+    return {"logs": logs, "total_count": len(logs)}
+
+# Lines sent per NDJSON chunk or WebSocket message
+LOG_BATCH_LINES = 500
+
+async def open_log_stream(
+    k8s_service: K8sService,
+    namespace: str,
+    pod: Optional[str],
+    label_selector: Optional[str],
+    container: Optional[str],
+    follow: bool,
+    tail_lines: Optional[int],
+    since_seconds: Optional[int]
+) -> LogMultiplexer:
+    """Resolve the pods to stream and start reading their logs"""
+    if not pod and not label_selector:
+        raise HTTPException(status_code=400, detail="Either pod or label_selector is required")
+    try:
+        if label_selector:
+            parse_label_selector(label_selector)
+    except SelectorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        logs = await run_blocking(
+            k8s_service.stream_logs, namespace, pod, label_selector, container, follow, tail_lines, since_seconds
+        )
+    except ApiException as e:
+        raise HTTPException(status_code=502, detail=f"Failed to list pods for log streaming: {e.reason}")
+    if logs is None:
+        raise HTTPException(status_code=503, detail="Cluster is not available for log streaming")
+    return logs
+
+@router.get("/logs/{cluster_id}/stream")
+async def stream_cluster_logs(
+    cluster_id: str,
+    namespace: str,
+    pod: Optional[str] = None,
+    label_selector: Optional[str] = None,
+    container: Optional[str] = None,
+    follow: bool = False,
+    tail_lines: Optional[int] = Query(None, ge=0, le=100000),
+    since_seconds: Optional[int] = Query(None, ge=1),
+    current_user: dict = Depends(get_current_user),
+    k8s_service: K8sService = Depends(get_k8s_service)
+):
+    """
+    Stream pod logs as NDJSON, one line per log line, merged by timestamp
+    across every pod matching label_selector. Lines are read from the
+    apiserver only as fast as the client consumes them.
+    """
+    logs = await open_log_stream(k8s_service, namespace, pod, label_selector, container, follow, tail_lines, since_seconds)
+    # The dependency lets go of the client before the body streams
+    release = cluster_registry.retain(k8s_service)
+    
+    async def generate():
+        try:
+            async for lines in read_batches(logs, LOG_BATCH_LINES):
+                yield "".join(json.dumps(line) + "\n" for line in lines)
+        finally:
+            logs.close()
+            release()
+    
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+def _parse_time(value: str, name: str) -> datetime:
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"{name} must be an RFC 3339 timestamp")
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+def _log_timestamp(value: datetime) -> str:
+    """Kubelet log timestamp format, for comparing against log lines"""
+    return value.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+@router.get("/logs/{cluster_id}/search")
+async def search_cluster_logs(
+    cluster_id: str,
+    namespace: str,
+    query: Optional[str] = None,
+    regex: bool = False,
+    case_sensitive: bool = False,
+    level: Optional[List[str]] = Query(None),
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    pod: Optional[str] = None,
+    label_selector: Optional[str] = None,
+    container: Optional[str] = None,
+    follow: bool = False,
+    tail_lines: Optional[int] = Query(None, ge=0, le=100000),
+    max_lines: int = Query(1000, ge=1, le=LOG_SEARCH_MAX_LINES),
+    max_bytes: int = Query(1024 * 1024, ge=1, le=LOG_SEARCH_MAX_BYTES),
+    current_user: dict = Depends(get_current_user),
+    k8s_service: K8sService = Depends(get_k8s_service)
+):
+    """
+    Search pod logs on the server and stream only the matches as NDJSON.
+    query is a substring, or a regular expression with regex=true; level
+    may be repeated; start/end bound the time window. The last line is a
+    {"summary": {...}} object saying how much was scanned and whether a
+    budget cut the results short.
+    """
+    start_time = _parse_time(start, "start") if start else None
+    end_time = _parse_time(end, "end") if end else None
+    try:
+        search = LogSearch(
+            query, regex, case_sensitive, level,
+            _log_timestamp(start_time) if start_time else None,
+            _log_timestamp(end_time) if end_time else None,
+            max_lines, max_bytes
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    # Only ask the apiserver for the window being searched
+    since_seconds = None
+    if start_time:
+        since_seconds = max(1, int((datetime.now(timezone.utc) - start_time).total_seconds()) + 1)
+    logs = await open_log_stream(k8s_service, namespace, pod, label_selector, container, follow, tail_lines, since_seconds)
+    release = cluster_registry.retain(k8s_service)
+    
+    async def generate():
+        try:
+            async for lines in read_batches(logs, LOG_BATCH_LINES):
+                # Matching user-supplied patterns is CPU work; keep it off the event loop
+                matches = await asyncio.to_thread(search.feed, lines)
+                if matches:
+                    yield matches
+                if search.done:
+                    break
+            yield json.dumps({"summary": search.summary()}) + "\n"
+        finally:
+            logs.close()
+            release()
+    
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+@router.websocket("/logs/{cluster_id}/ws")
+async def stream_cluster_logs_ws(
+    websocket: WebSocket,
+    cluster_id: str,
+    namespace: str,
+    token: str,
+    pod: Optional[str] = None,
+    label_selector: Optional[str] = None,
+    container: Optional[str] = None,
+    follow: bool = True,
+    tail_lines: Optional[int] = Query(None, ge=0, le=100000),
+    since_seconds: Optional[int] = Query(None, ge=1),
+    k8s_service: K8sService = Depends(get_k8s_service)
+):
+    """WebSocket variant of stream_cluster_logs: {"type": "logs", "lines": [...]} messages, then {"type": "end"}"""
+    try:
+        auth_service.verify_token(token)
+        logs = await open_log_stream(k8s_service, namespace, pod, label_selector, container, follow, tail_lines, since_seconds)
+    except HTTPException as e:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=str(e.detail))
+        return
+    await websocket.accept()
+    try:
+        async for lines in read_batches(logs, LOG_BATCH_LINES):
+            # send_text waits for the client, which is what throttles the readers
+            await websocket.send_text(json.dumps({"type": "logs", "lines": lines}))
+        await websocket.send_text(json.dumps({"type": "end"}))
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        logs.close()
+
+class SilenceRequest(BaseModel):
+    matchers: Dict[str, str]
+    duration_seconds: int = Field(3600, gt=0, le=MAX_SILENCE_SECONDS)
+    comment: str = ""
+
+def get_alert_manager(k8s_service: K8sService = Depends(get_k8s_service)) -> AlertManager:
+    """Alert state of a cluster whose metrics collector is running"""
+    manager = k8s_service.alert_manager()
+    if manager is None:
+        raise HTTPException(status_code=503, detail="Alerting is not available for this cluster yet")
+    return manager
+
 @router.get("/alerts/{cluster_id}")
-def cluster_alerts(cluster_id: str):
+def cluster_alerts(cluster_id: str, k8s_service: K8sService = Depends(get_k8s_service)):
     """Get active alerts for cluster"""
-    # TODO: Integrate with AlertManager/Prometheus alerts
+    manager = k8s_service.alert_manager()
+    if manager is not None:
+        # Served from in-memory state; the summary is kept up to date on every alert transition
+        return {"alerts": manager.alerts(), "groups": manager.groups(), "summary": manager.summary()}
+    
     sample_alerts = [
         {
             "id": "alert-001",
@@ -211,14 +483,69 @@ def cluster_alerts(cluster_id: str):
         }
     ]
     
+    return {"alerts": sample_alerts, "summary": summarize_alerts(sample_alerts)}
+
+@router.get("/alerts/{cluster_id}/silences")
+def list_silences(
+    cluster_id: str,
+    current_user: dict = Depends(get_current_user),
+    manager: AlertManager = Depends(get_alert_manager)
+):
+    """List active silences for cluster"""
+    return {"silences": [silence.to_dict() for silence in manager.silences()]}
+
+@router.post("/alerts/{cluster_id}/silences", status_code=201)
+def create_silence(
+    cluster_id: str,
+    request: SilenceRequest,
+    current_user: dict = Depends(get_current_user),
+    manager: AlertManager = Depends(get_alert_manager)
+):
+    """Silence alerts whose labels match all matchers for a limited time"""
+    try:
+        silence = manager.add_silence(
+            request.matchers,
+            request.duration_seconds,
+            comment=request.comment,
+            created_by=str(current_user.get("sub", ""))
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return silence.to_dict()
+
+@router.delete("/alerts/{cluster_id}/silences/{silence_id}")
+def delete_silence(
+    cluster_id: str,
+    silence_id: str,
+    current_user: dict = Depends(get_current_user),
+    manager: AlertManager = Depends(get_alert_manager)
+):
+    """Expire a silence before its end time"""
+    if not manager.expire_silence(silence_id):
+        raise HTTPException(status_code=404, detail=f"Silence {silence_id} not found")
+    return {"id": silence_id, "expired": True}
+
+def node_usage(k8s_service: K8sService, node_list: list, window: int, step: int, top: int) -> dict:
+    """Attach current/p95 usage to each node and rank the busiest ones"""
+    store = k8s_service.metrics_store()
+    if store is None:
+        return {"nodes": node_list}
+    end = time.time()
+    usage, busiest = {}, []
+    for resource in ("cpu", "memory"):
+        _, labels, matrix = store.query_matrix(f"node_{resource}_usage", end - window, end, step)
+        current = tsquery.reduce(matrix, "last")
+        p95 = tsquery.reduce(matrix, "p95")
+        for row, series_labels in enumerate(labels):
+            usage.setdefault(series_labels["node"], {})[resource] = {
+                "current": tsquery.round_or_none(current[row]),
+                "p95": tsquery.round_or_none(p95[row])
+            }
+        if resource == "cpu":
+            busiest = [labels[row]["node"] for row in tsquery.topk(matrix, top, by="avg")]
     return {
-        "alerts": sample_alerts,
-        "summary": {
-            "critical": sum(1 for a in sample_alerts if a["severity"] == "critical" and a["status"] == "firing"),
-            "warning": sum(1 for a in sample_alerts if a["severity"] == "warning" and a["status"] == "firing"),
-            "info": sum(1 for a in sample_alerts if a["severity"] == "info"),
-            "total": len(sample_alerts)
-        }
+        "nodes": [{**node, "usage": usage.get(node["name"], {})} for node in node_list],
+        "top_cpu": busiest
     }
 
 @router.get("/cost/{cluster_id}")
@@ -246,15 +573,22 @@ def cluster_cost(cluster_id: str, period: str = "7d"):
             }
         })
     
-    total_cost = sum(day["cost"] for day in cost_data)
+    cost_data.reverse()  # Chronological order
+    daily = np.array([day["cost"] for day in cost_data])
+    total_cost = float(daily.sum())
+    trend = tsquery.moving_average(daily, 7)
+    for day, average in zip(cost_data, trend):
+        day["moving_average_7d"] = tsquery.round_or_none(average)
     
     return {
         "cost": {
             "total": round(total_cost, 2),
             "average_daily": round(total_cost / days, 2),
+            "p95_daily": tsquery.round_or_none(tsquery.percentile(daily, 95)),
+            "change": tsquery.round_or_none(tsquery.delta(daily)),
             "period": period,
             "currency": "USD",
-            "data": cost_data[::-1],  # Chronological order
+            "data": cost_data,
             "breakdown": {
                 "compute": round(total_cost * 0.6, 2),
                 "storage": round(total_cost * 0.25, 2),
@@ -269,39 +603,61 @@ def cluster_cost(cluster_id: str, period: str = "7d"):
     }
 
 @router.get("/dashboard/{cluster_id}")
-def cluster_dashboard(cluster_id: str):
+def cluster_dashboard(cluster_id: str, k8s_service: K8sService = Depends(get_k8s_service)):
     """Get comprehensive dashboard data for cluster"""
-    # TODO: Aggregate data from multiple sources
     
-    # Get all the dashboard components
-    health = cluster_health(cluster_id)
-    metrics = cluster_metrics(cluster_id)
-    alerts = cluster_alerts(cluster_id)
-    cost = cluster_cost(cluster_id, "7d")
+    def fetch_nodes(service, memo):
+        # Health and the pre-sync metrics fallback both need nodes; list them once
+        return lambda: memo.get("nodes", service.fetch_nodes)
+    
+    def held(report):
+        # Refreshes can outlive the request and its hold, so each holds the client itself
+        def component(memo):
+            with cluster_registry.hold(cluster_id) as service:
+                return report(service, memo)
+        return component
+    
+    data, components = dashboard_aggregator.build(cluster_id, {
+        "health": held(lambda service, memo: health_report(cluster_id, service, fetch_nodes(service, memo))),
+        "metrics": held(lambda service, memo: metrics_report(cluster_id, service, 3600, 60, fetch_nodes(service, memo))),
+        "alerts": held(lambda service, memo: cluster_alerts(cluster_id, k8s_service=service)),
+        "cost": lambda memo: cluster_cost(cluster_id, "7d")
+    })
+    health, metrics, alerts, cost = data["health"], data["metrics"], data["alerts"], data["cost"]
     
     return {
         "dashboard": {
             "cluster_id": cluster_id,
             "timestamp": datetime.utcnow().isoformat(),
             "health": health,
-            "metrics": metrics["metrics"],
-            "alerts": alerts["summary"],
-            "cost": cost["cost"],
+            "metrics": metrics["metrics"] if metrics else None,
+            "alerts": alerts["summary"] if alerts else None,
+            "cost": cost["cost"] if cost else None,
+            # Per-component freshness; stale entries are the last good result after a timeout or error
+            "components": components,
             "summary": {
-                "status": health["status"],
-                "node_count": health["node_count"],
-                "ready_nodes": health["ready_nodes"],
-                "total_pods": metrics["metrics"]["pods"]["total"],
-                "active_alerts": alerts["summary"]["critical"] + alerts["summary"]["warning"],
-                "daily_cost": cost["cost"]["average_daily"]
+                "status": health["status"] if health else "unknown",
+                "node_count": health.get("node_count") if health else None,
+                "ready_nodes": health.get("ready_nodes") if health else None,
+                "total_pods": metrics["metrics"]["pods"]["total"] if metrics else None,
+                "active_alerts": alerts["summary"]["critical"] + alerts["summary"]["warning"] if alerts else None,
+                "daily_cost": cost["cost"]["average_daily"] if cost else None
             }
         }
     }
 
 @router.get("/nodes/{cluster_id}")
-def cluster_nodes(cluster_id: str):
-    """Get detailed node information"""
-    # TODO: Get actual node data from Kubernetes API
+def cluster_nodes(
+    cluster_id: str,
+    window: int = Query(3600, ge=60, le=30 * 24 * 3600),
+    step: int = Query(60, ge=30),
+    top: int = Query(5, ge=1, le=100),
+    k8s_service: K8sService = Depends(get_k8s_service)
+):
+    """Get detailed node information with usage over the last window seconds"""
+    node_list = k8s_service.get_nodes()
+    if node_list:
+        return node_usage(k8s_service, node_list, window, step, top)
     
     nodes = []
     for i in range(3):
@@ -343,9 +699,24 @@ def cluster_nodes(cluster_id: str):
     return {"nodes": nodes}
 
 @router.get("/events/{cluster_id}")
-def cluster_events(cluster_id: str, limit: int = 50):
-    """Get recent cluster events"""
-    # TODO: Get actual events from Kubernetes API
+def cluster_events(
+    cluster_id: str,
+    limit: int = Query(50, ge=1, le=MAX_EVENT_PAGE),
+    namespace: Optional[str] = None,
+    involved_object: Optional[str] = Query(None, alias="object"),
+    reason: Optional[str] = None,
+    type: Optional[str] = None,
+    before: Optional[int] = Query(None, ge=1),
+    after: Optional[int] = Query(None, ge=0),
+    k8s_service: K8sService = Depends(get_k8s_service)
+):
+    """
+    Get recent cluster events, newest first. Pass next_cursor as before for
+    older events, or a previous response's latest as after for new ones.
+    """
+    page = k8s_service.get_events(namespace, involved_object, reason, type, before, after, limit)
+    if page is not None:
+        return page
     
     event_types = ["Normal", "Warning"]
     reasons = ["Scheduled", "Pulled", "Created", "Started", "Killing", "Failed", "FailedMount"]
@@ -365,4 +736,4 @@ def cluster_events(cluster_id: str, limit: int = 50):
     
     return {
         "events": sorted(events, key=lambda x: x["timestamp"], reverse=True)
-    } 
\ No newline at end of file
+    } 
@@ -0,0 +1,310 @@
+import heapq
+import os
+import time
+import uuid
+import logging
+import threading
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import requests
+
+from services.alerts import Alert, AlertEngine, INACTIVE, FIRING, RESOLVED, summary_keys, to_iso
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Labels alerts are grouped by, comma separated
+ALERT_GROUP_BY = [l.strip() for l in os.getenv("K8S_ALERT_GROUP_BY", "alertname,namespace").split(",") if l.strip()]
+# Delay before a new group's first notification, so its siblings can join it
+ALERT_GROUP_WAIT_SECONDS = float(os.getenv("K8S_ALERT_GROUP_WAIT_SECONDS", "30"))
+# Minimum time between notifications for the same group
+ALERT_GROUP_INTERVAL_SECONDS = float(os.getenv("K8S_ALERT_GROUP_INTERVAL_SECONDS", "300"))
+MAX_SILENCE_SECONDS = 7 * 24 * 3600
+# Receives every notification batch as a JSON POST; batches are only logged when unset
+ALERT_WEBHOOK_URL = os.getenv("K8S_ALERT_WEBHOOK_URL", "")
+ALERT_WEBHOOK_TIMEOUT_SECONDS = float(os.getenv("K8S_ALERT_WEBHOOK_TIMEOUT_SECONDS", "10"))
+
+Notifier = Callable[[Dict[str, Any]], None]
+
+class Silence:
+    """Mutes notifications for alerts whose labels equal all matchers, until ends_at"""
+    def __init__(self, matchers: Dict[str, str], starts_at: float, ends_at: float, comment: str = "", created_by: str = ""):
+        if not matchers:
+            raise ValueError("A silence needs at least one matcher")
+        if ends_at <= starts_at:
+            raise ValueError("A silence must end after it starts")
+        self.id = uuid.uuid4().hex
+        self.matchers = {str(k): str(v) for k, v in matchers.items()}
+        self.starts_at = starts_at
+        self.ends_at = ends_at
+        self.comment = comment
+        self.created_by = created_by
+
+    def matches(self, labels: Dict[str, str]) -> bool:
+        return all(labels.get(k) == v for k, v in self.matchers.items())
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "matchers": self.matchers,
+            "starts_at": to_iso(self.starts_at),
+            "ends_at": to_iso(self.ends_at),
+            "comment": self.comment,
+            "created_by": self.created_by
+        }
+
+class AlertGroup:
+    """Alerts sharing the values of the group_by labels"""
+    def __init__(self, labels: Dict[str, str]):
+        self.labels = labels
+        self.fingerprints: set = set()
+        # Notification state: last state sent per fingerprint and when
+        self.notified: Dict[str, str] = {}
+        self.last_notified: Optional[float] = None
+        self.next_flush: Optional[float] = None
+
+class AlertManager:
+    """
+    Sits between an AlertEngine and the API responses and notifications.
+
+    Follows the engine's state transitions, so nothing is recounted per
+    request: alerts are kept once per fingerprint, assigned to a group by
+    the group_by labels, and each alert's contribution to the summary
+    counts is swapped out when its state or silencing changes.
+
+    Notifications are batched per group. A new group waits group_wait
+    seconds for siblings, later changes are sent at most every
+    group_interval, and an alert is only re-sent when its state differs
+    from the one last notified. Silenced alerts are not notified.
+    """
+    def __init__(
+        self,
+        engine: AlertEngine,
+        group_by: Optional[List[str]] = None,
+        group_wait: float = ALERT_GROUP_WAIT_SECONDS,
+        group_interval: float = ALERT_GROUP_INTERVAL_SECONDS,
+        clock: Callable[[], float] = time.time
+    ):
+        self.engine = engine
+        self.group_by = group_by if group_by is not None else ALERT_GROUP_BY
+        self.group_wait = group_wait
+        self.group_interval = group_interval
+        self._clock = clock
+        self._alerts: Dict[str, Alert] = {}
+        self._silenced_by: Dict[str, str] = {}
+        self._contributions: Dict[str, Tuple[str, ...]] = {}
+        self._counts: Counter = Counter()
+        self._groups: Dict[Tuple[str, ...], AlertGroup] = {}
+        self._silences: Dict[str, Silence] = {}
+        self._silence_ends: List[Tuple[float, str]] = []
+        self._notifiers: List[Notifier] = []
+        self._lock = threading.RLock()
+        for alert in engine.alerts():
+            self.on_transition(INACTIVE, alert)
+        engine.add_listener(self.on_transition)
+
+    def add_notifier(self, notifier: Notifier):
+        self._notifiers.append(notifier)
+
+    def _group_key(self, alert: Alert) -> Tuple[str, ...]:
+        return tuple(alert.labels.get(label, "") for label in self.group_by)
+
+    def on_transition(self, previous: str, alert: Alert):
+        """AlertEngine listener; the alert's current state is authoritative"""
+        with self._lock:
+            self._expire_silences(self._clock())
+            fp = alert.fingerprint
+            key = self._group_key(alert)
+            group = self._groups.get(key)
+            if alert.state == INACTIVE:
+                self._alerts.pop(fp, None)
+                self._silenced_by.pop(fp, None)
+                self._set_contribution(fp, ())
+                if group is not None:
+                    group.fingerprints.discard(fp)
+                    group.notified.pop(fp, None)
+                    if not group.fingerprints:
+                        del self._groups[key]
+                return
+            self._alerts[fp] = alert
+            silence = self._matching_silence(alert.labels)
+            if silence is not None:
+                self._silenced_by[fp] = silence.id
+            else:
+                self._silenced_by.pop(fp, None)
+            self._set_contribution(fp, summary_keys(alert.rule.severity, alert.state, silence is not None))
+            if group is None:
+                group = self._groups[key] = AlertGroup(dict(zip(self.group_by, key)))
+            group.fingerprints.add(fp)
+            self._schedule(group)
+
+    def _set_contribution(self, fp: str, keys: Tuple[str, ...]):
+        self._counts.subtract(self._contributions.pop(fp, ()))
+        if keys:
+            self._contributions[fp] = keys
+            self._counts.update(keys)
+
+    def _schedule(self, group: AlertGroup):
+        if group.next_flush is not None:
+            return
+        if group.last_notified is None:
+            group.next_flush = self._clock() + self.group_wait
+        else:
+            group.next_flush = group.last_notified + self.group_interval
+
+    # Silences
+
+    def add_silence(
+        self,
+        matchers: Dict[str, str],
+        duration_seconds: float,
+        comment: str = "",
+        created_by: str = ""
+    ) -> Silence:
+        """Silence matching alerts for duration_seconds from now"""
+        if not 0 < duration_seconds <= MAX_SILENCE_SECONDS:
+            raise ValueError(f"Silence duration must be between 1 and {MAX_SILENCE_SECONDS} seconds")
+        now = self._clock()
+        silence = Silence(matchers, now, now + duration_seconds, comment, created_by)
+        with self._lock:
+            self._silences[silence.id] = silence
+            heapq.heappush(self._silence_ends, (silence.ends_at, silence.id))
+            self._refresh_silenced()
+        return silence
+
+    def expire_silence(self, silence_id: str) -> bool:
+        """End a silence now; False if it does not exist"""
+        with self._lock:
+            if self._silences.pop(silence_id, None) is None:
+                return False
+            self._refresh_silenced()
+            return True
+
+    def silences(self) -> List[Silence]:
+        with self._lock:
+            self._expire_silences(self._clock())
+            return sorted(self._silences.values(), key=lambda s: s.ends_at)
+
+    def _matching_silence(self, labels: Dict[str, str]) -> Optional[Silence]:
+        for silence in self._silences.values():
+            if silence.matches(labels):
+                return silence
+        return None
+
+    def _expire_silences(self, now: float):
+        expired = False
+        while self._silence_ends and self._silence_ends[0][0] <= now:
+            _, silence_id = heapq.heappop(self._silence_ends)
+            expired = self._silences.pop(silence_id, None) is not None or expired
+        if expired:
+            self._refresh_silenced()
+
+    def _refresh_silenced(self):
+        """Re-match every alert after the set of silences changed"""
+        for fp, alert in self._alerts.items():
+            silence = self._matching_silence(alert.labels)
+            was_silenced = fp in self._silenced_by
+            if silence is not None:
+                self._silenced_by[fp] = silence.id
+            else:
+                self._silenced_by.pop(fp, None)
+            if was_silenced != (silence is not None):
+                self._set_contribution(fp, summary_keys(alert.rule.severity, alert.state, silence is not None))
+                if silence is None:
+                    # Unsilenced alerts are notified like fresh changes
+                    self._schedule(self._groups[self._group_key(alert)])
+
+    # Reads
+
+    def _alert_dict(self, fp: str) -> Dict[str, Any]:
+        alert = self._alerts[fp].to_dict()
+        alert["silenced_by"] = self._silenced_by.get(fp)
+        return alert
+
+    def alerts(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            self._expire_silences(self._clock())
+            return [self._alert_dict(fp) for fp in self._alerts]
+
+    def summary(self) -> Dict[str, int]:
+        """Counts kept up to date on every transition, in the summarize_alerts shape"""
+        with self._lock:
+            self._expire_silences(self._clock())
+            return {key: self._counts[key] for key in ("critical", "warning", "info", "silenced", "total")}
+
+    def groups(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            self._expire_silences(self._clock())
+            result = []
+            for group in self._groups.values():
+                states = Counter(self._alerts[fp].state for fp in group.fingerprints)
+                result.append({
+                    "labels": group.labels,
+                    "count": len(group.fingerprints),
+                    "firing": states[FIRING],
+                    "resolved": states[RESOLVED],
+                    "silenced": sum(1 for fp in group.fingerprints if fp in self._silenced_by),
+                    "fingerprints": sorted(group.fingerprints)
+                })
+            return result
+
+    # Notifications
+
+    def flush(self, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Send every group batch that is due; returns the batches sent"""
+        now = now if now is not None else self._clock()
+        batches = []
+        with self._lock:
+            self._expire_silences(now)
+            for group in self._groups.values():
+                if group.next_flush is None or group.next_flush > now:
+                    continue
+                group.next_flush = None
+                changed = [
+                    fp for fp in sorted(group.fingerprints)
+                    if fp not in self._silenced_by and group.notified.get(fp) != self._alerts[fp].state
+                ]
+                if not changed:
+                    continue
+                for fp in changed:
+                    group.notified[fp] = self._alerts[fp].state
+                group.last_notified = now
+                batches.append({
+                    "labels": group.labels,
+                    "alerts": [self._alert_dict(fp) for fp in changed],
+                    "timestamp": to_iso(now)
+                })
+        for batch in batches:
+            for notifier in self._notifiers:
+                try:
+                    notifier(batch)
+                except Exception as e:
+                    logger.warning(f"Alert notifier error: {e}")
+        return batches
+
+class WebhookNotifier:
+    """Posts notification batches, tagged with their cluster, to a webhook"""
+    def __init__(self, url: str, cluster: str, timeout: float = ALERT_WEBHOOK_TIMEOUT_SECONDS, session=None):
+        self.url = url
+        self.cluster = cluster
+        self.timeout = timeout
+        self._session = session or requests.Session()
+
+    def __call__(self, batch: Dict[str, Any]):
+        response = self._session.post(self.url, json={"cluster": self.cluster, **batch}, timeout=self.timeout)
+        response.raise_for_status()
+
+def log_notifier(cluster: str) -> Notifier:
+    """Notifier writing one log line per batch"""
+    def notify(batch: Dict[str, Any]):
+        states = Counter(alert["status"] for alert in batch["alerts"])
+        counts = ", ".join(f"{count} {state}" for state, count in sorted(states.items()))
+        logger.info(f"Alert notification for cluster {cluster}, group {batch['labels']}: {counts}")
+    return notify
+
+def default_notifiers(cluster: str, webhook_url: str = ALERT_WEBHOOK_URL) -> List[Notifier]:
+    """Notifiers of a cluster's alert manager: the webhook when one is configured, the log otherwise"""
+    if webhook_url:
+        return [WebhookNotifier(webhook_url, cluster)]
+    return [log_notifier(cluster)]
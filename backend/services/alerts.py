@@ -0,0 +1,310 @@
+import hashlib
+import heapq
+import operator
+import os
+import time
+import logging
+import threading
+import yaml
+from collections import Counter
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from services.timeseries import TimeSeriesStore, SeriesKey
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Optional YAML file replacing DEFAULT_RULES:
+#   rules:
+#     - name: HighClusterCPU
+#       type: threshold          # threshold | rate | absent
+#       metric: cpu_usage
+#       op: ">"
+#       value: 80
+#       for: 300                 # seconds the condition must hold before firing
+#       severity: warning
+#       summary: "Cluster CPU usage is {value:.1f}%"
+ALERT_RULES_PATH = os.getenv("K8S_ALERT_RULES", "")
+# How long resolved alerts stay visible before they are dropped
+RESOLVED_RETENTION_SECONDS = float(os.getenv("K8S_ALERT_RESOLVED_RETENTION_SECONDS", "3600"))
+
+INACTIVE = "inactive"
+PENDING = "pending"
+FIRING = "firing"
+RESOLVED = "resolved"
+
+OPERATORS: Dict[str, Callable[[float, float], bool]] = {
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+    "==": operator.eq,
+    "!=": operator.ne
+}
+
+DEFAULT_RULES: List[Dict[str, Any]] = [
+    {"name": "HighClusterCPU", "type": "threshold", "metric": "cpu_usage", "op": ">", "value": 80,
+     "for": 300, "severity": "warning", "summary": "Cluster CPU usage is {value:.1f}%"},
+    {"name": "HighClusterMemory", "type": "threshold", "metric": "memory_usage", "op": ">", "value": 85,
+     "for": 300, "severity": "warning", "summary": "Cluster memory usage is {value:.1f}%"},
+    {"name": "HighNodeCPU", "type": "threshold", "metric": "node_cpu_usage", "op": ">", "value": 90,
+     "for": 600, "severity": "warning", "summary": "Node {node} CPU usage is {value:.1f}%"},
+    {"name": "FailedPods", "type": "threshold", "metric": "pods_failed", "op": ">", "value": 0,
+     "for": 300, "severity": "critical", "summary": "{value:.0f} pods have failed"},
+    {"name": "ReadyNodesDropping", "type": "rate", "metric": "nodes_ready", "window": 600, "op": "<", "value": 0,
+     "for": 0, "severity": "critical", "summary": "Ready node count is dropping"},
+    {"name": "MetricsAbsent", "type": "absent", "metric": "pods_total", "for": 300,
+     "severity": "warning", "summary": "No metrics collected for {for} seconds"}
+]
+
+def fingerprint(rule_name: str, labels: Dict[str, str]) -> str:
+    """Stable identity of an alert: rule name plus series labels"""
+    key = rule_name + "".join(f"\x00{k}={v}" for k, v in sorted(labels.items()))
+    return hashlib.sha1(key.encode()).hexdigest()[:16]
+
+class AlertRule:
+    """
+    A condition on one metric, evaluated separately for each of its series.
+    Threshold rules compare the newest sample within the window (a series
+    that stopped updating no longer holds), rate rules the per-second
+    change over the window; absent rules fire when a series stops updating.
+    """
+    def __init__(self, spec: Dict[str, Any]):
+        self.name = spec["name"]
+        self.type = spec.get("type", "threshold")
+        self.metric = spec["metric"]
+        self.op = spec.get("op", ">")
+        self.value = float(spec.get("value", 0))
+        self.window = float(spec.get("window", 300))
+        self.for_seconds = float(spec.get("for", 0))
+        self.severity = spec.get("severity", "warning")
+        self.summary = spec.get("summary", self.name)
+        self.match: Dict[str, str] = spec.get("match") or {}
+        self.labels: Dict[str, str] = spec.get("labels") or {}
+        if self.type not in ("threshold", "rate", "absent"):
+            raise ValueError(f"Unknown alert rule type {self.type} in {self.name}")
+        if self.op not in OPERATORS:
+            raise ValueError(f"Unknown operator {self.op} in {self.name}")
+
+    def applies_to(self, labels: Dict[str, str]) -> bool:
+        return all(labels.get(k) == v for k, v in self.match.items())
+
+    def check(self, store: TimeSeriesStore, labels: Dict[str, str], now: float) -> Tuple[bool, Optional[float]]:
+        """Whether the condition holds for one series, and the value it was judged on"""
+        if self.type == "threshold":
+            latest = store.latest(self.metric, labels)
+            if latest is None or latest[0] < now - self.window:
+                return False, None
+            return OPERATORS[self.op](latest[1], self.value), latest[1]
+        timestamps, values = store.query(self.metric, now - self.window, now + 1, labels=labels)
+        if len(values) < 2 or timestamps[-1] == timestamps[0]:
+            return False, None
+        per_second = float(values[-1] - values[0]) / float(timestamps[-1] - timestamps[0])
+        return OPERATORS[self.op](per_second, self.value), per_second
+
+    def describe(self, labels: Dict[str, str], value: Optional[float]) -> str:
+        try:
+            fields = {**labels, "value": value if value is not None else float("nan"), "for": int(self.for_seconds)}
+            return self.summary.format(**fields)
+        except (KeyError, ValueError, IndexError):
+            return self.summary
+
+def to_iso(timestamp: Optional[float]) -> Optional[str]:
+    return datetime.utcfromtimestamp(timestamp).isoformat() if timestamp else None
+
+class Alert:
+    """State of one rule for one series"""
+    def __init__(self, rule: AlertRule, labels: Dict[str, str], now: float):
+        self.rule = rule
+        self.series_labels = labels
+        self.labels = {**rule.labels, **labels, "alertname": rule.name, "severity": rule.severity}
+        self.fingerprint = fingerprint(rule.name, labels)
+        self.state = PENDING
+        self.active_since = now
+        self.fired_at: Optional[float] = None
+        self.resolved_at: Optional[float] = None
+        self.value: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.fingerprint,
+            "severity": self.rule.severity,
+            "title": self.rule.name,
+            "description": self.rule.describe(self.labels, self.value),
+            "timestamp": to_iso(self.fired_at or self.active_since),
+            "status": self.state,
+            "value": self.value,
+            "active_since": to_iso(self.active_since),
+            "resolved_at": to_iso(self.resolved_at),
+            "labels": self.labels
+        }
+
+Transition = Tuple[str, Alert]
+
+class AlertEngine:
+    """
+    Evaluates alert rules against one cluster's TimeSeriesStore.
+
+    Each evaluation only looks at series recorded since the previous one
+    (the store's changed set), indexed by metric name, so the cost follows
+    the number of changed series rather than rules x series. Pending and
+    firing alerts are re-checked on every evaluation, so one whose series
+    stops updating still clears once its data leaves the rule's window, and
+    absent rules are driven by a deadline heap, so neither needs a full scan.
+    Listeners receive (previous_state, alert) for every state change;
+    previous_state is INACTIVE for a newly created alert, and alert.state is
+    INACTIVE once an alert is removed (a pending alert that cleared, or a
+    resolved one past its retention).
+    """
+    def __init__(self, store: TimeSeriesStore, rules: Optional[List[AlertRule]] = None):
+        self.store = store
+        self.rules = rules if rules is not None else load_rules()
+        self._by_metric: Dict[str, List[AlertRule]] = {}
+        for rule in self.rules:
+            self._by_metric.setdefault(rule.metric, []).append(rule)
+        self._alerts: Dict[str, Alert] = {}
+        self._pending: set = set()
+        # Firing threshold and rate alerts; absent alerts resolve when data arrives
+        self._firing: set = set()
+        self._deadlines: List[Tuple[float, str, SeriesKey]] = []
+        self._last_seen: Dict[Tuple[str, SeriesKey], float] = {}
+        self._listeners: List[Callable[[str, Alert], None]] = []
+        self._lock = threading.Lock()
+        self.evaluated_series = 0
+
+    def add_listener(self, listener: Callable[[str, Alert], None]):
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[str, Alert], None]):
+        self._listeners = [l for l in self._listeners if l != listener]
+
+    def alerts(self, include_resolved: bool = True) -> List[Alert]:
+        with self._lock:
+            return [a for a in self._alerts.values() if include_resolved or a.state != RESOLVED]
+
+    def evaluate(self, now: Optional[float] = None) -> List[Transition]:
+        """Run one incremental evaluation and return the state changes it made"""
+        now = now if now is not None else time.time()
+        transitions: List[Transition] = []
+        with self._lock:
+            changed = self.store.drain_changed()
+            self.evaluated_series = len(changed)
+            for key in changed:
+                name, label_items = key
+                labels = dict(label_items)
+                for rule in self._by_metric.get(name, ()):
+                    if not rule.applies_to(labels):
+                        continue
+                    if rule.type == "absent":
+                        self._track_absent(rule, key, labels, now, transitions)
+                    else:
+                        holds, value = rule.check(self.store, labels, now)
+                        self._update(rule, labels, holds, value, now, transitions)
+            # Pending and firing alerts are re-checked against current data as
+            # time passes, including those whose series stopped updating
+            for fp in list(self._pending | self._firing):
+                alert = self._alerts[fp]
+                holds, value = alert.rule.check(self.store, alert.series_labels, now)
+                self._update(alert.rule, alert.series_labels, holds, value, now, transitions)
+            self._expire_absent(now, transitions)
+            self._drop_resolved(now, transitions)
+        for previous, alert in transitions:
+            for listener in self._listeners:
+                try:
+                    listener(previous, alert)
+                except Exception as e:
+                    logger.warning(f"Alert listener error: {e}")
+        return transitions
+
+    def _update(
+        self,
+        rule: AlertRule,
+        labels: Dict[str, str],
+        holds: bool,
+        value: Optional[float],
+        now: float,
+        transitions: List[Transition]
+    ):
+        fp = fingerprint(rule.name, labels)
+        alert = self._alerts.get(fp)
+        if not holds:
+            if alert is not None and alert.state != RESOLVED:
+                previous = alert.state
+                self._pending.discard(fp)
+                self._firing.discard(fp)
+                if previous == PENDING:
+                    # Never fired, nothing to resolve
+                    alert.state = INACTIVE
+                    del self._alerts[fp]
+                else:
+                    alert.state, alert.resolved_at, alert.value = RESOLVED, now, value
+                transitions.append((previous, alert))
+            return
+        if alert is None or alert.state == RESOLVED:
+            alert = self._alerts[fp] = Alert(rule, labels, now)
+            self._pending.add(fp)
+            transitions.append((INACTIVE, alert))
+        alert.value = value
+        if alert.state == PENDING and now - alert.active_since >= rule.for_seconds:
+            alert.state, alert.fired_at = FIRING, now
+            self._pending.discard(fp)
+            self._firing.add(fp)
+            transitions.append((PENDING, alert))
+
+    def _track_absent(self, rule: AlertRule, key: SeriesKey, labels: Dict[str, str], now: float, transitions: List[Transition]):
+        latest = self.store.latest_by_key(key)
+        seen = latest[0] if latest else now
+        self._last_seen[(rule.name, key)] = seen
+        heapq.heappush(self._deadlines, (seen + rule.for_seconds, rule.name, key))
+        # Data arrived, so an absent alert for this series resolves
+        self._update(rule, labels, False, None, now, transitions)
+
+    def _expire_absent(self, now: float, transitions: List[Transition]):
+        rules = {rule.name: rule for rule in self.rules}
+        while self._deadlines and self._deadlines[0][0] <= now:
+            deadline, rule_name, key = heapq.heappop(self._deadlines)
+            rule = rules[rule_name]
+            # Stale heap entries are superseded by a later sample
+            if self._last_seen.get((rule_name, key), 0) + rule.for_seconds != deadline:
+                continue
+            fp = fingerprint(rule_name, dict(key[1]))
+            if fp in self._alerts and self._alerts[fp].state != RESOLVED:
+                continue
+            # The absence itself is the `for` duration, so the alert fires at once
+            alert = self._alerts[fp] = Alert(rule, dict(key[1]), deadline - rule.for_seconds)
+            alert.state, alert.fired_at = FIRING, now
+            transitions.append((INACTIVE, alert))
+
+    def _drop_resolved(self, now: float, transitions: List[Transition]):
+        for fp in [fp for fp, a in self._alerts.items() if a.state == RESOLVED and now - a.resolved_at > RESOLVED_RETENTION_SECONDS]:
+            alert = self._alerts.pop(fp)
+            alert.state = INACTIVE
+            transitions.append((RESOLVED, alert))
+
+def load_rules(path: str = ALERT_RULES_PATH) -> List[AlertRule]:
+    """Rules from the K8S_ALERT_RULES file, or the built-in defaults"""
+    specs = DEFAULT_RULES
+    if path:
+        with open(path) as f:
+            specs = (yaml.safe_load(f) or {}).get("rules") or []
+    return [AlertRule(spec) for spec in specs]
+
+def summary_keys(severity: str, status: str, silenced: bool = False) -> Tuple[str, ...]:
+    """
+    Summary counters one alert adds to. Critical and warning count firing,
+    unsilenced alerts; info counts every info alert.
+    """
+    keys = ["total"]
+    if severity == "info" or (status == FIRING and not silenced):
+        keys.append(severity)
+    if silenced and status != RESOLVED:
+        keys.append("silenced")
+    return tuple(keys)
+
+def summarize_alerts(alerts: List[Dict[str, Any]]) -> Dict[str, int]:
+    """Summary block of the /monitoring/alerts response, counted from scratch"""
+    counts = Counter()
+    for a in alerts:
+        counts.update(summary_keys(a["severity"], a["status"], bool(a.get("silenced_by"))))
+    return {key: counts[key] for key in ("critical", "warning", "info", "silenced", "total")}
@@ -0,0 +1,154 @@
+import asyncio
+import contextlib
+import functools
+import os
+import logging
+from typing import Any, Callable, ContextManager, Dict, List, Optional, Tuple
+
+from models.kubernetes import KubernetesResource
+from services import kube
+from services.fanout import k8s_executor
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Upper bound on in-flight calls per service instance, so a single slow
+# cluster cannot occupy the whole pool
+K8S_MAX_CONCURRENCY_PER_CLUSTER = int(os.getenv("K8S_MAX_CONCURRENCY_PER_CLUSTER", "8"))
+
+async def run_blocking(func: Callable, *args, **kwargs) -> Any:
+    """
+    Run a blocking Kubernetes call on the shared k8s thread pool
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(k8s_executor, functools.partial(func, *args, **kwargs))
+
+async def list_namespaces(
+    api_client,
+    label_selector: Optional[str] = None,
+    field_selector: Optional[str] = None
+) -> List[KubernetesResource]:
+    """
+    List all namespaces in the cluster without blocking the event loop
+    """
+    return await run_blocking(
+        kube.list_namespaces, api_client,
+        label_selector=label_selector, field_selector=field_selector
+    )
+
+async def list_pods(
+    api_client,
+    namespace: str,
+    metadata_only: bool = False,
+    label_selector: Optional[str] = None,
+    field_selector: Optional[str] = None
+) -> List[KubernetesResource]:
+    """
+    List all pods in a namespace without blocking the event loop
+    """
+    return await run_blocking(kube.list_pods, api_client, namespace, metadata_only, label_selector, field_selector)
+
+async def list_pods_page(
+    api_client,
+    namespace: str,
+    limit: int = kube.DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    label_selector: Optional[str] = None,
+    field_selector: Optional[str] = None
+) -> Tuple[List[KubernetesResource], Optional[str]]:
+    """
+    List one page of pods in a namespace without blocking the event loop
+    """
+    return await run_blocking(kube.list_pods_page, api_client, namespace, limit, cursor, label_selector, field_selector)
+
+class AsyncK8sService:
+    """
+    Awaitable facade over K8sService.
+
+    Every method of the wrapped service is exposed with the same signature
+    but returns a coroutine; the call itself runs on the k8s thread pool,
+    limited to K8S_MAX_CONCURRENCY_PER_CLUSTER concurrent calls. hold, when
+    given, is entered around each call, e.g. so the registry does not close
+    the client mid-call.
+    """
+    def __init__(
+        self,
+        service,
+        max_concurrency: int = K8S_MAX_CONCURRENCY_PER_CLUSTER,
+        hold: Optional[Callable[[], ContextManager]] = None
+    ):
+        self._service = service
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._hold = hold or contextlib.nullcontext
+
+    async def _call(self, func: Callable, *args, **kwargs) -> Any:
+        """
+        Run func on the k8s pool. The hold and the concurrency slot are
+        released when the thread finishes rather than when the caller stops
+        waiting, so calls abandoned on timeout still count against the cap.
+        """
+        loop = asyncio.get_running_loop()
+        with contextlib.ExitStack() as stack:
+            stack.enter_context(self._hold())
+            await self._semaphore.acquire()
+            stack.callback(self._release_slot, loop)
+            future = k8s_executor.submit(func, *args, **kwargs)
+            cleanup = stack.pop_all()
+        future.add_done_callback(lambda _: cleanup.close())
+        return await asyncio.wrap_future(future)
+
+    def _release_slot(self, loop: asyncio.AbstractEventLoop):
+        try:
+            loop.call_soon_threadsafe(self._semaphore.release)
+        except RuntimeError:
+            # The loop is closed; nobody is left waiting for the slot
+            pass
+
+    async def get_namespaces(self, label_selector: Optional[str] = None, field_selector: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get all namespaces"""
+        return await self._call(self._service.get_namespaces, label_selector, field_selector)
+
+    async def get_pods(
+        self,
+        namespace: Optional[str] = None,
+        label_selector: Optional[str] = None,
+        field_selector: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Get pods in cluster or specific namespace"""
+        return await self._call(self._service.get_pods, namespace, label_selector, field_selector)
+
+    async def get_services(
+        self,
+        namespace: Optional[str] = None,
+        label_selector: Optional[str] = None,
+        field_selector: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Get services in cluster or specific namespace"""
+        return await self._call(self._service.get_services, namespace, label_selector, field_selector)
+
+    async def get_deployments(
+        self,
+        namespace: Optional[str] = None,
+        label_selector: Optional[str] = None,
+        field_selector: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Get deployments in cluster or specific namespace"""
+        return await self._call(self._service.get_deployments, namespace, label_selector, field_selector)
+
+    async def get_cluster_info(self) -> Dict[str, Any]:
+        """Get basic cluster information"""
+        return await self._call(self._service.get_cluster_info)
+
+    async def get_cluster_metrics(self) -> Dict[str, Any]:
+        """Get cluster resource metrics"""
+        return await self._call(self._service.get_cluster_metrics)
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._service, name)
+        if not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        async def wrapper(*args, **kwargs):
+            return await self._call(attr, *args, **kwargs)
+        return wrapper
@@ -0,0 +1,182 @@
+import abc
+import asyncio
+import os
+import time
+import uuid
+import logging
+from typing import Callable, Dict, List, Optional
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # pragma: no cover - redis is optional
+    aioredis = None
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Redis used to share WebSocket updates between workers; in-process only when unset
+WS_BROKER_URL = os.getenv("K8S_WS_BROKER_URL", os.getenv("REDIS_URL", ""))
+# Prefix of every channel and lease key, so several deployments can share a Redis
+WS_BROKER_PREFIX = os.getenv("K8S_WS_BROKER_PREFIX", "k8sdash:")
+
+Callback = Callable[[str], None]
+
+# Take the lease when free, or extend it when already ours
+ACQUIRE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+if redis.call('set', KEYS[1], ARGV[1], 'NX', 'PX', ARGV[2]) then
+    return 1
+end
+return 0
+"""
+
+RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+class Broker(abc.ABC):
+    """
+    Publish/subscribe between the workers serving WebSockets, plus named
+    leases so that only one worker does a job, e.g. watching a cluster.
+    Callbacks run on the event loop with the message as a string.
+    """
+    def __init__(self):
+        self._callbacks: Dict[str, List[Callback]] = {}
+
+    async def start(self):
+        pass
+
+    async def close(self):
+        pass
+
+    @abc.abstractmethod
+    async def publish(self, channel: str, message: str):
+        """Deliver message to the subscribers of channel in every worker"""
+
+    async def subscribe(self, channel: str, callback: Callback):
+        callbacks = self._callbacks.setdefault(channel, [])
+        if not callbacks:
+            await self._listen(channel)
+        callbacks.append(callback)
+
+    async def unsubscribe(self, channel: str, callback: Callback):
+        callbacks = self._callbacks.get(channel)
+        if not callbacks or callback not in callbacks:
+            return
+        callbacks.remove(callback)
+        if not callbacks:
+            del self._callbacks[channel]
+            await self._unlisten(channel)
+
+    @abc.abstractmethod
+    async def acquire(self, name: str, ttl: float) -> bool:
+        """Take or extend the lease; False while another worker holds it"""
+
+    @abc.abstractmethod
+    async def release(self, name: str):
+        """Give up the lease if this worker holds it"""
+
+    async def _listen(self, channel: str):
+        pass
+
+    async def _unlisten(self, channel: str):
+        pass
+
+    def _dispatch(self, channel: str, message: str):
+        for callback in list(self._callbacks.get(channel, [])):
+            try:
+                callback(message)
+            except Exception as e:
+                logger.warning(f"Broker callback for {channel} failed: {e}")
+
+class InMemoryBroker(Broker):
+    """Single-process broker; every lease is granted to the one worker"""
+    def __init__(self):
+        super().__init__()
+        self._leases: Dict[str, float] = {}
+
+    async def publish(self, channel: str, message: str):
+        self._dispatch(channel, message)
+
+    async def acquire(self, name: str, ttl: float) -> bool:
+        self._leases[name] = time.monotonic() + ttl
+        return True
+
+    async def release(self, name: str):
+        self._leases.pop(name, None)
+
+class RedisBroker(Broker):
+    """
+    Redis pub/sub broker. One pub/sub connection per worker carries every
+    channel; leases are keys holding this worker's token with an expiry,
+    so a worker that dies gives up its leases after ttl.
+    """
+    def __init__(self, url: Optional[str] = None, prefix: str = WS_BROKER_PREFIX, client=None):
+        super().__init__()
+        if client is None:
+            if aioredis is None:
+                raise RuntimeError("redis is not installed")
+            client = aioredis.from_url(url)
+        self.prefix = prefix
+        self._redis = client
+        self._pubsub = client.pubsub()
+        self._token = uuid.uuid4().hex
+        self._reader: Optional[asyncio.Task] = None
+
+    async def start(self):
+        await self._redis.ping()
+        self._reader = asyncio.get_running_loop().create_task(self._read())
+
+    async def close(self):
+        if self._reader is not None:
+            self._reader.cancel()
+        await self._pubsub.aclose()
+        await self._redis.aclose()
+
+    async def _read(self):
+        while True:
+            if not self._pubsub.subscribed:
+                await asyncio.sleep(0.1)
+                continue
+            try:
+                message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # redis-py reconnects and resubscribes on the next read
+                logger.warning(f"Redis broker read failed: {e}")
+                await asyncio.sleep(1)
+                continue
+            if message is None or message["type"] != "message":
+                continue
+            channel, data = message["channel"], message["data"]
+            channel = channel.decode() if isinstance(channel, bytes) else channel
+            data = data.decode() if isinstance(data, bytes) else data
+            self._dispatch(channel[len(self.prefix):], data)
+
+    async def publish(self, channel: str, message: str):
+        await self._redis.publish(self.prefix + channel, message)
+
+    async def _listen(self, channel: str):
+        await self._pubsub.subscribe(self.prefix + channel)
+
+    async def _unlisten(self, channel: str):
+        await self._pubsub.unsubscribe(self.prefix + channel)
+
+    async def acquire(self, name: str, ttl: float) -> bool:
+        result = await self._redis.eval(ACQUIRE_SCRIPT, 1, f"{self.prefix}lease:{name}", self._token, int(ttl * 1000))
+        return bool(result)
+
+    async def release(self, name: str):
+        await self._redis.eval(RELEASE_SCRIPT, 1, f"{self.prefix}lease:{name}", self._token)
+
+def create_broker(url: str = WS_BROKER_URL) -> Broker:
+    """Redis broker when a URL is configured, otherwise in-process"""
+    if url:
+        return RedisBroker(url)
+    return InMemoryBroker()
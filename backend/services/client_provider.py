@@ -0,0 +1,66 @@
+from kubernetes import client, config
+import os
+import logging
+import threading
+from typing import Optional
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Determine if running in-cluster or locally
+IN_CLUSTER = os.getenv("IN_CLUSTER", "false").lower() == "true"
+
+# Keep-alive connections per cluster client; sized for the k8s thread pool
+# so concurrent calls reuse sockets instead of opening new ones
+CONNECTION_POOL_MAXSIZE = int(os.getenv("K8S_CONNECTION_POOL_MAXSIZE", "16"))
+
+_lock = threading.Lock()
+_api_client: Optional[client.ApiClient] = None
+_loaded = False
+
+def _load_configuration() -> Optional[client.Configuration]:
+    """Load in-cluster or kubeconfig settings, preferring the one IN_CLUSTER points at"""
+    configuration = client.Configuration()
+    loaders = [
+        ("in-cluster", lambda: config.load_incluster_config(client_configuration=configuration)),
+        ("kubeconfig", lambda: config.load_kube_config(client_configuration=configuration, persist_config=False))
+    ]
+    if not IN_CLUSTER:
+        loaders.reverse()
+    for name, load in loaders:
+        try:
+            load()
+            logger.info(f"Loaded {name} Kubernetes configuration")
+            return configuration
+        except Exception as e:
+            logger.warning(f"Could not load {name} Kubernetes configuration: {e}")
+    return None
+
+def get_api_client() -> Optional[client.ApiClient]:
+    """
+    Application-scoped ApiClient for the default cluster.
+
+    Built on first use, so importing routers or starting the app does not
+    parse kubeconfig; every later caller shares the same client and its
+    connection pool. Returns None when no configuration is available.
+    """
+    global _api_client, _loaded
+    if _loaded:
+        return _api_client
+    with _lock:
+        if not _loaded:
+            configuration = _load_configuration()
+            if configuration is not None:
+                configuration.connection_pool_maxsize = CONNECTION_POOL_MAXSIZE
+                _api_client = client.ApiClient(configuration)
+            _loaded = True
+    return _api_client
+
+def close_api_client():
+    """Release the shared client; the next get_api_client() builds a fresh one"""
+    global _api_client, _loaded
+    with _lock:
+        if _api_client is not None:
+            _api_client.close()
+        _api_client = None
+        _loaded = False
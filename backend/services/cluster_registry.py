@@ -0,0 +1,288 @@
+from kubernetes import client, config
+from collections import OrderedDict
+from contextlib import contextmanager
+import functools
+import os
+import time
+import logging
+import threading
+import yaml
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from k8s_service import K8sService
+from services.client_provider import CONNECTION_POOL_MAXSIZE
+from services.async_kube import AsyncK8sService
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# YAML file mapping cluster ids to kubeconfig/context or explicit credentials:
+#
+#   clusters:
+#     prod-eu:
+#       kubeconfig: /etc/k8s-dash/kubeconfigs/prod-eu.yaml
+#       context: prod-eu-admin
+#     "42":
+#       host: https://10.0.0.1:6443
+#       token_file: /var/run/secrets/cluster-42/token
+#       ca_cert: /var/run/secrets/cluster-42/ca.crt
+CLUSTERS_CONFIG_PATH = os.getenv("K8S_CLUSTERS_CONFIG", "")
+MAX_CLUSTER_CLIENTS = int(os.getenv("K8S_MAX_CLUSTER_CLIENTS", "64"))
+CLUSTER_CLIENT_IDLE_SECONDS = int(os.getenv("K8S_CLUSTER_CLIENT_IDLE_SECONDS", "900"))
+
+# Registry key shared by every cluster id that maps to the default kubeconfig
+DEFAULT_CLUSTER = "__default__"
+
+class UnknownClusterError(KeyError):
+    """Raised when a cluster id cannot be resolved to any credentials"""
+
+class _ClusterEntry:
+    def __init__(self, service: K8sService):
+        self.service = service
+        self.async_service: Optional[AsyncK8sService] = None
+        self.last_used = time.monotonic()
+        # Requests using the client; it is only closed once none are left
+        self.refs = 0
+        self.retired = False
+
+class ClusterClientRegistry:
+    """
+    Resolves cluster ids to Kubernetes clients.
+
+    Clients are built lazily on first use, one ApiClient (and its HTTP
+    connection pool) per cluster, and kept in an LRU. Clusters idle for
+    longer than idle_seconds, or beyond max_clusters, are evicted and their
+    informers and connections closed. A client held by a request (hold(),
+    or a call through the async facade) is never evicted for being idle or
+    over capacity, and one evicted explicitly is closed when its last
+    holder lets go.
+
+    Cluster ids are resolved from the K8S_CLUSTERS_CONFIG file first, then
+    against context names in the default kubeconfig. When no cluster file is
+    configured, unknown ids share the default kubeconfig context.
+    """
+    def __init__(
+        self,
+        config_path: str = CLUSTERS_CONFIG_PATH,
+        max_clusters: int = MAX_CLUSTER_CLIENTS,
+        idle_seconds: int = CLUSTER_CLIENT_IDLE_SECONDS
+    ):
+        self.max_clusters = max_clusters
+        self.idle_seconds = idle_seconds
+        self._config_path = config_path
+        self._cluster_configs: Optional[Dict[str, Dict[str, Any]]] = None
+        self._kube_contexts: Optional[set] = None
+        self._entries: "OrderedDict[str, _ClusterEntry]" = OrderedDict()
+        # Entries with holders, by id of their service, including evicted ones
+        self._held: Dict[int, _ClusterEntry] = {}
+        self._lock = threading.Lock()
+
+    def get(self, cluster_id: str) -> K8sService:
+        """Return the K8sService for a cluster, building it on first use"""
+        return self._entry(self._key(cluster_id)).service
+
+    def get_async(self, cluster_id: str) -> AsyncK8sService:
+        """Return the awaitable facade for a cluster, building it on first use; each call holds the client"""
+        entry = self._entry(self._key(cluster_id))
+        if entry.async_service is None:
+            entry.async_service = AsyncK8sService(entry.service, hold=functools.partial(self._holding, entry))
+        return entry.async_service
+
+    @contextmanager
+    def hold(self, cluster_id: str) -> Iterator[K8sService]:
+        """Use a cluster's client; it is not closed until the block exits"""
+        entry = self._entry(self._key(cluster_id), hold=True)
+        try:
+            yield entry.service
+        finally:
+            self._release(entry)
+
+    def retain(self, service: K8sService) -> Callable[[], None]:
+        """
+        Hold a client that is already held for longer, e.g. while a response
+        streams after its request's dependencies were released. Returns the
+        function releasing it.
+        """
+        with self._lock:
+            entry = self._held[id(service)]
+            entry.refs += 1
+        return functools.partial(self._release, entry)
+
+    @contextmanager
+    def _holding(self, entry: _ClusterEntry) -> Iterator[None]:
+        with self._lock:
+            self._retain(entry)
+        try:
+            yield
+        finally:
+            self._release(entry)
+
+    def _retain(self, entry: _ClusterEntry):
+        """Caller holds the lock"""
+        entry.refs += 1
+        self._held[id(entry.service)] = entry
+
+    def _release(self, entry: _ClusterEntry):
+        with self._lock:
+            entry.refs -= 1
+            if entry.refs:
+                return
+            del self._held[id(entry.service)]
+            if not entry.retired:
+                return
+        self._close(entry.service.name, entry)
+
+    def services(self) -> List[Tuple[str, K8sService]]:
+        """Clusters that currently have a client, without marking them used"""
+        with self._lock:
+            return [(cluster_id, entry.service) for cluster_id, entry in self._entries.items()]
+
+    def _key(self, cluster_id: str) -> str:
+        """Clusters on the default configuration share a single client"""
+        cluster_id = str(cluster_id)
+        return cluster_id if self.resolve(cluster_id) is not None else DEFAULT_CLUSTER
+
+    def evict(self, cluster_id: str):
+        """Drop a cluster's client, e.g. after its credentials changed; a held client closes on release"""
+        with self._lock:
+            entry = self._entries.pop(self._key(cluster_id), None)
+            if entry is not None and entry.refs:
+                entry.retired = True
+                entry = None
+        if entry:
+            self._close(str(cluster_id), entry)
+
+    def close(self):
+        """Close every cached client, held or not, at shutdown"""
+        with self._lock:
+            entries = list(self._entries.items())
+            self._entries.clear()
+        for cluster_id, entry in entries:
+            self._close(cluster_id, entry)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, cluster_id: str) -> bool:
+        try:
+            return self._key(cluster_id) in self._entries
+        except UnknownClusterError:
+            return False
+
+    def _entry(self, cluster_id: str, hold: bool = False) -> _ClusterEntry:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(cluster_id)
+            if entry is not None:
+                entry.last_used = now
+                self._entries.move_to_end(cluster_id)
+                if hold:
+                    self._retain(entry)
+                evicted = self._collect_evictions(now)
+        if entry is not None:
+            for evicted_id, evicted_entry in evicted:
+                self._close(evicted_id, evicted_entry)
+            return entry
+
+        # Build outside the lock; kubeconfig parsing must not stall other clusters
+        built = _ClusterEntry(self._build_service(cluster_id))
+        with self._lock:
+            entry = self._entries.get(cluster_id)
+            if entry is None:
+                entry = built
+                self._entries[cluster_id] = entry
+                built = None
+            entry.last_used = now
+            self._entries.move_to_end(cluster_id)
+            if hold:
+                self._retain(entry)
+            evicted = self._collect_evictions(now)
+        if built is not None:
+            self._close(cluster_id, built)
+        for evicted_id, evicted_entry in evicted:
+            self._close(evicted_id, evicted_entry)
+        return entry
+
+    def _collect_evictions(self, now: float):
+        """Pop idle and over-capacity entries from the LRU end, skipping held ones; caller holds the lock"""
+        evicted = []
+        excess = len(self._entries) - self.max_clusters
+        for oldest_id, oldest in list(self._entries.items()):
+            if excess <= 0 and now - oldest.last_used <= self.idle_seconds:
+                break
+            if oldest.refs:
+                continue
+            del self._entries[oldest_id]
+            evicted.append((oldest_id, oldest))
+            excess -= 1
+        return evicted
+
+    def _close(self, cluster_id: str, entry: _ClusterEntry):
+        logger.info(f"Evicting Kubernetes client for cluster {cluster_id}")
+        try:
+            entry.service.close()
+        except Exception as e:
+            logger.warning(f"Error closing client for cluster {cluster_id}: {e}")
+
+    def _load_cluster_configs(self) -> Dict[str, Dict[str, Any]]:
+        if self._cluster_configs is None:
+            configs = {}
+            if self._config_path:
+                with open(self._config_path) as f:
+                    data = yaml.safe_load(f) or {}
+                configs = {str(k): v or {} for k, v in (data.get("clusters") or {}).items()}
+            self._cluster_configs = configs
+        return self._cluster_configs
+
+    def _load_kube_contexts(self) -> set:
+        if self._kube_contexts is None:
+            try:
+                contexts, _ = config.list_kube_config_contexts()
+                self._kube_contexts = {c["name"] for c in contexts}
+            except Exception:
+                self._kube_contexts = set()
+        return self._kube_contexts
+
+    def resolve(self, cluster_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Resolve a cluster id to its connection settings.
+        Returns None when the cluster uses the default configuration.
+        """
+        cluster_configs = self._load_cluster_configs()
+        if cluster_id in cluster_configs:
+            return cluster_configs[cluster_id]
+        if cluster_id in self._load_kube_contexts():
+            return {"context": cluster_id}
+        if not cluster_configs:
+            return None
+        raise UnknownClusterError(cluster_id)
+
+    def _build_service(self, cluster_id: str) -> K8sService:
+        if cluster_id == DEFAULT_CLUSTER:
+            return K8sService(name=cluster_id)
+        settings = self.resolve(cluster_id)
+
+        configuration = client.Configuration()
+        if settings.get("host"):
+            configuration.host = settings["host"]
+            token = settings.get("token")
+            if settings.get("token_file"):
+                with open(settings["token_file"]) as f:
+                    token = f.read().strip()
+            if token:
+                configuration.api_key = {"authorization": f"Bearer {token}"}
+            if settings.get("ca_cert"):
+                configuration.ssl_ca_cert = settings["ca_cert"]
+            configuration.verify_ssl = settings.get("verify_ssl", True)
+        else:
+            config.load_kube_config(
+                config_file=settings.get("kubeconfig"),
+                context=settings.get("context"),
+                client_configuration=configuration,
+                persist_config=False
+            )
+        configuration.connection_pool_maxsize = CONNECTION_POOL_MAXSIZE
+        logger.info(f"Built Kubernetes client for cluster {cluster_id}")
+        return K8sService(api_client=client.ApiClient(configuration), name=cluster_id)
+
+cluster_registry = ClusterClientRegistry()
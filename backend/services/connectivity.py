@@ -0,0 +1,159 @@
+import os
+import time
+import logging
+import threading
+from typing import Any, Callable, Dict, Optional
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Consecutive failures that open the breaker
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("K8S_BREAKER_FAILURE_THRESHOLD", "3"))
+# First wait before a half-open probe; doubles on every failed probe up to the max
+BREAKER_RESET_SECONDS = float(os.getenv("K8S_BREAKER_RESET_SECONDS", "5"))
+BREAKER_MAX_RESET_SECONDS = float(os.getenv("K8S_BREAKER_MAX_RESET_SECONDS", "300"))
+# How long a health answer is trusted before the apiserver is probed again
+HEALTH_CACHE_SECONDS = float(os.getenv("K8S_HEALTH_CACHE_SECONDS", "30"))
+# Probes must fail fast instead of waiting for the OS TCP timeout
+PROBE_TIMEOUT_SECONDS = float(os.getenv("K8S_PROBE_TIMEOUT_SECONDS", "2"))
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    Closed: calls go through. After failure_threshold consecutive failures
+    the breaker opens and calls are refused until the reset timeout passes.
+    Then a single caller is let through (half-open); its success closes the
+    breaker, its failure reopens it with the timeout doubled.
+    """
+    def __init__(
+        self,
+        failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+        reset_timeout: float = BREAKER_RESET_SECONDS,
+        max_reset_timeout: float = BREAKER_MAX_RESET_SECONDS,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._current_timeout = reset_timeout
+        self._opened_at = 0.0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state
+
+    def retry_in(self) -> float:
+        """Seconds until the next half-open probe is allowed, 0 when not open"""
+        with self._lock:
+            if self._state != OPEN:
+                return 0.0
+            return max(0.0, self._opened_at + self._current_timeout - self._clock())
+
+    def allow(self) -> bool:
+        """True when a call may go to the apiserver"""
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            if self._state == OPEN and self._clock() >= self._opened_at + self._current_timeout:
+                # Only the caller that flips the state gets to probe
+                self._state = HALF_OPEN
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self._state != CLOSED:
+                logger.info("Circuit closed, cluster reachable again")
+            self._state = CLOSED
+            self._failures = 0
+            self._current_timeout = self.reset_timeout
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == HALF_OPEN:
+                self._current_timeout = min(self._current_timeout * 2, self.max_reset_timeout)
+                self._open()
+            elif self._state == CLOSED and self._failures >= self.failure_threshold:
+                self._open()
+
+    def _open(self):
+        self._state = OPEN
+        self._opened_at = self._clock()
+        logger.warning(f"Circuit open after {self._failures} failures, next probe in {self._current_timeout}s")
+
+class ConnectivityMonitor:
+    """
+    Cached reachability of one cluster, guarded by a circuit breaker.
+
+    available() answers from the cached state while it is fresh and from
+    the breaker while it is open, so only a stale cache or a half-open
+    breaker costs a probe. Real calls report their outcome through
+    record_success/record_failure, which keeps the cache fresh for free.
+    """
+    def __init__(
+        self,
+        probe: Callable[[], Any],
+        cache_seconds: float = HEALTH_CACHE_SECONDS,
+        breaker: Optional[CircuitBreaker] = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self._probe = probe
+        self._cache_seconds = cache_seconds
+        self._clock = clock
+        self.breaker = breaker or CircuitBreaker(clock=clock)
+        self._healthy: Optional[bool] = None
+        self._checked_at = 0.0
+        self._last_error: Optional[str] = None
+        self._probe_lock = threading.Lock()
+
+    def available(self) -> bool:
+        """True when calls to the cluster are expected to succeed"""
+        if self._healthy is not None and self._clock() - self._checked_at < self._cache_seconds:
+            if self._healthy or not self.breaker.allow():
+                return self._healthy
+        elif not self.breaker.allow():
+            return False
+        # One prober at a time; concurrent callers take the last known state
+        if not self._probe_lock.acquire(blocking=False):
+            return bool(self._healthy)
+        try:
+            self._probe()
+            self.record_success()
+        except Exception as e:
+            self.record_failure(e)
+        finally:
+            self._probe_lock.release()
+        return bool(self._healthy)
+
+    def record_success(self):
+        self._healthy = True
+        self._checked_at = self._clock()
+        self._last_error = None
+        self.breaker.record_success()
+
+    def record_failure(self, error: Optional[Exception] = None):
+        self._healthy = False
+        self._checked_at = self._clock()
+        self._last_error = str(error) if error else None
+        self.breaker.record_failure()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current connectivity state, for health endpoints"""
+        state = self.breaker.state
+        return {
+            "status": "connected" if self._healthy and state == CLOSED else "degraded",
+            "circuit": state,
+            "retry_in": round(self.breaker.retry_in(), 1),
+            "last_error": self._last_error
+        }
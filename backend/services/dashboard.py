@@ -0,0 +1,193 @@
+import os
+import time
+import logging
+import threading
+from concurrent.futures import CancelledError, Future, wait
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from services.fanout import fan_out, TIMEOUT
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Whole-dashboard deadline; components still running are served from cache
+DASHBOARD_TIMEOUT_SECONDS = float(os.getenv("K8S_DASHBOARD_TIMEOUT_SECONDS", "3"))
+# How long each component's last result is served without refetching
+DASHBOARD_TTL_SECONDS: Dict[str, float] = {
+    "health": float(os.getenv("K8S_DASHBOARD_HEALTH_TTL_SECONDS", "10")),
+    "metrics": float(os.getenv("K8S_DASHBOARD_METRICS_TTL_SECONDS", "15")),
+    "alerts": float(os.getenv("K8S_DASHBOARD_ALERTS_TTL_SECONDS", "5")),
+    "cost": float(os.getenv("K8S_DASHBOARD_COST_TTL_SECONDS", "300"))
+}
+# Cached components kept across clusters before the oldest are dropped
+MAX_DASHBOARD_CACHE_ENTRIES = int(os.getenv("K8S_DASHBOARD_CACHE_ENTRIES", "1024"))
+
+FRESH = "fresh"
+CACHED = "cached"
+STALE = "stale"
+MISSING = "missing"
+
+# Error of a stale component whose refresh, started by an earlier request, is still running
+REFRESHING = "refresh in progress"
+
+class RequestMemo:
+    """
+    Shares fetches between the components of one request. The first caller
+    of a key runs the fetch in its own thread; concurrent callers of the
+    same key wait for that result (or exception) instead of fetching again.
+    """
+    def __init__(self):
+        self._futures: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, fetch: Callable[[], Any]) -> Any:
+        with self._lock:
+            future = self._futures.get(key)
+            owner = future is None
+            if owner:
+                future = self._futures[key] = Future()
+        if owner:
+            try:
+                future.set_result(fetch())
+            except Exception as e:
+                future.set_exception(e)
+        return future.result()
+
+Component = Callable[[RequestMemo], Any]
+
+class DashboardAggregator:
+    """
+    Builds dashboards from independent components run concurrently.
+
+    Each component's last result is cached per cluster and reused for its
+    TTL. Expired components are refetched together through fan_out with
+    one deadline; a component that times out or fails falls back to its
+    last cached result, reported as stale with its age. A component that
+    finishes after the deadline still refreshes the cache for the next
+    request.
+
+    At most one refresh per cluster and component runs at a time. While
+    one is running, later requests serve the cached result as stale, or
+    wait for that refresh up to the deadline when nothing is cached,
+    instead of starting another. A hung apiserver therefore ties up one
+    thread per component, however many requests arrive.
+    """
+    def __init__(
+        self,
+        ttls: Optional[Dict[str, float]] = None,
+        timeout: float = DASHBOARD_TIMEOUT_SECONDS,
+        max_entries: int = MAX_DASHBOARD_CACHE_ENTRIES,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.ttls = ttls if ttls is not None else DASHBOARD_TTL_SECONDS
+        self.timeout = timeout
+        self.max_entries = max_entries
+        self._clock = clock
+        self._cache: Dict[Tuple[str, str], Tuple[Any, float]] = {}
+        self._inflight: Dict[Tuple[str, str], Future] = {}
+        self._lock = threading.Lock()
+
+    def build(self, cluster_id: str, components: Dict[str, Component]) -> Tuple[Dict[str, Any], Dict[str, Dict[str, Any]]]:
+        """
+        Returns (data, status): data maps each component to its result, or
+        None when it failed with nothing cached; status maps each component
+        to {"state": fresh|cached|stale|missing, "age_seconds", "error"}.
+        """
+        now = self._clock()
+        deadline = time.monotonic() + self.timeout
+        data: Dict[str, Any] = {}
+        status: Dict[str, Dict[str, Any]] = {}
+        memo = RequestMemo()
+        calls = {}
+        owned: Dict[str, Future] = {}
+        joined: Dict[str, Future] = {}
+        for name, component in components.items():
+            cached = self._get(cluster_id, name)
+            if cached is not None and now - cached[1] < self.ttls.get(name, 0):
+                data[name] = cached[0]
+                status[name] = {"state": CACHED, "age_seconds": round(now - cached[1], 1)}
+                continue
+            with self._lock:
+                future = self._inflight.get((cluster_id, name))
+                if future is None:
+                    future = owned[name] = self._inflight[(cluster_id, name)] = Future()
+            if name not in owned:
+                if cached is not None:
+                    data[name] = cached[0]
+                    status[name] = {"state": STALE, "age_seconds": round(now - cached[1], 1), "error": REFRESHING}
+                else:
+                    joined[name] = future
+                continue
+            calls[name] = self._refresher(cluster_id, name, component, memo, future)
+
+        results, errors = fan_out(calls, timeout=self.timeout) if calls else ({}, {})
+        for name in errors:
+            # Cancelled before it started, so it will not clear its in-flight entry itself
+            if name in owned and owned[name].cancel():
+                with self._lock:
+                    self._inflight.pop((cluster_id, name), None)
+        if joined:
+            wait(list(joined.values()), timeout=max(0.0, deadline - time.monotonic()))
+        for name, future in joined.items():
+            if not future.done():
+                errors[name] = TIMEOUT
+                continue
+            try:
+                results[name] = future.result()
+            except CancelledError:
+                errors[name] = TIMEOUT
+            except Exception as e:
+                errors[name] = str(e)
+        for name, result in results.items():
+            data[name] = result
+            status[name] = {"state": FRESH, "age_seconds": 0.0}
+        for name, error in errors.items():
+            cached = self._get(cluster_id, name)
+            if cached is not None:
+                data[name] = cached[0]
+                status[name] = {"state": STALE, "age_seconds": round(self._clock() - cached[1], 1), "error": error}
+            else:
+                data[name] = None
+                status[name] = {"state": MISSING, "age_seconds": None, "error": error}
+        return data, status
+
+    def invalidate(self, cluster_id: str):
+        with self._lock:
+            for key in [key for key in self._cache if key[0] == cluster_id]:
+                del self._cache[key]
+
+    def _get(self, cluster_id: str, name: str) -> Optional[Tuple[Any, float]]:
+        with self._lock:
+            return self._cache.get((cluster_id, name))
+
+    def _refresher(
+        self,
+        cluster_id: str,
+        name: str,
+        component: Component,
+        memo: RequestMemo,
+        future: Future
+    ) -> Callable[[], Any]:
+        """The fetch of one component, settling future for requests that joined it"""
+        def refresh():
+            if not future.set_running_or_notify_cancel():
+                raise CancelledError()
+            try:
+                result = component(memo)
+            except Exception as e:
+                with self._lock:
+                    self._inflight.pop((cluster_id, name), None)
+                future.set_exception(e)
+                raise
+            with self._lock:
+                self._inflight.pop((cluster_id, name), None)
+                self._cache.pop((cluster_id, name), None)
+                self._cache[(cluster_id, name)] = (result, self._clock())
+                while len(self._cache) > self.max_entries:
+                    # Dicts keep insertion order and entries are re-inserted on refresh
+                    del self._cache[next(iter(self._cache))]
+            future.set_result(result)
+            return result
+        return refresh
+
+dashboard_aggregator = DashboardAggregator()
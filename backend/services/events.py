@@ -0,0 +1,178 @@
+import bisect
+import os
+import logging
+import threading
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Events kept per cluster; the oldest are evicted first
+EVENT_BUFFER_SIZE = int(os.getenv("K8S_EVENT_BUFFER_SIZE", "10000"))
+MAX_EVENT_PAGE = 500
+
+# Fields events are indexed by, matching the keys of event_to_dict
+INDEXED_FIELDS = ("namespace", "object", "reason")
+
+def _timestamp(value) -> Optional[str]:
+    return value.isoformat() if value else None
+
+def event_to_dict(event) -> Dict[str, Any]:
+    """Project an events.k8s.io/v1 Event onto the fields the events feed serves"""
+    regarding = event.regarding
+    series = event.series
+    source = event.reporting_controller
+    if not source and event.deprecated_source:
+        source = event.deprecated_source.component
+    first = event.event_time or event.deprecated_first_timestamp or event.metadata.creation_timestamp
+    last = (series.last_observed_time if series else None) or event.deprecated_last_timestamp or first
+    return {
+        "uid": event.metadata.uid,
+        "timestamp": _timestamp(last),
+        "first_timestamp": _timestamp(first),
+        "type": event.type,
+        "reason": event.reason,
+        "object": f"{(regarding.kind or '').lower()}/{regarding.name}" if regarding else None,
+        "namespace": event.metadata.namespace,
+        "message": event.note,
+        "source": source,
+        "count": (series.count if series else None) or event.deprecated_count or 1
+    }
+
+class EventLog:
+    """
+    Bounded, indexed history of one cluster's events.
+
+    Every stored event gets an increasing sequence number, which is also
+    its id and the cursor for paging. Repeats of an event (same object,
+    reason, type and message) are merged into one entry: its count grows
+    and it moves to the newest position under a new id.
+
+    Each indexed field keeps an ascending list of ids. Ids of evicted or
+    merged entries are left in place and skipped on read, and a list is
+    compacted once it is mostly stale. A page is a bisect to the cursor plus
+    a walk over at most limit live ids (and the stale ones between them),
+    whatever the number of events held.
+    """
+    def __init__(self, capacity: int = EVENT_BUFFER_SIZE):
+        self.capacity = capacity
+        self._entries: Dict[int, Dict[str, Any]] = {}
+        self._by_key: Dict[Tuple, int] = {}
+        self._all: List[int] = []
+        self._indexes: Dict[Tuple[str, Any], List[int]] = {}
+        self._live: Counter = Counter()
+        self._seq = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def latest(self) -> int:
+        """Id of the newest event; pass it as after to poll for new ones"""
+        return self._seq
+
+    def __call__(self, event_type: str, old: Optional[Dict[str, Any]], new: Optional[Dict[str, Any]]):
+        """Informer handler; deletions are ignored so expired events stay in the history"""
+        if new is not None:
+            self.add(new)
+
+    def add(self, event: Dict[str, Any]):
+        key = (event.get("namespace"), event.get("object"), event.get("reason"), event.get("type"), event.get("message"))
+        with self._lock:
+            event = dict(event)
+            previous_id = self._by_key.get(key)
+            if previous_id is not None:
+                previous = self._entries[previous_id]
+                if previous.get("uid") == event.get("uid") and previous["timestamp"] == event.get("timestamp"):
+                    # Replayed by a relist, nothing new
+                    return
+                del self._entries[previous_id]
+                if previous.get("uid") != event.get("uid"):
+                    # A new Event object for a repeat; the apiserver count starts over
+                    event["count"] = previous["count"] + event.get("count", 1)
+                else:
+                    event["count"] = max(previous["count"], event.get("count", 1))
+                event["first_timestamp"] = previous.get("first_timestamp") or event.get("first_timestamp")
+            else:
+                for field in INDEXED_FIELDS:
+                    self._live[(field, event.get(field))] += 1
+            self._seq += 1
+            event["id"] = self._seq
+            self._entries[self._seq] = event
+            self._by_key[key] = self._seq
+            self._all.append(self._seq)
+            for field in INDEXED_FIELDS:
+                self._indexes.setdefault((field, event.get(field)), []).append(self._seq)
+            while len(self._entries) > self.capacity:
+                self._evict()
+            self._compact(self._all, len(self._entries))
+            for field in INDEXED_FIELDS:
+                index_key = (field, event.get(field))
+                self._compact(self._indexes[index_key], self._live[index_key])
+
+    def _evict(self):
+        # Entries are re-inserted when merged, so dict order is id order
+        oldest_id = next(iter(self._entries))
+        oldest = self._entries.pop(oldest_id)
+        key = (oldest.get("namespace"), oldest.get("object"), oldest.get("reason"), oldest.get("type"), oldest.get("message"))
+        if self._by_key.get(key) == oldest_id:
+            del self._by_key[key]
+        for field in INDEXED_FIELDS:
+            index_key = (field, oldest.get(field))
+            self._live[index_key] -= 1
+            if self._live[index_key] <= 0:
+                del self._live[index_key]
+                self._indexes.pop(index_key, None)
+
+    def _compact(self, ids: List[int], live: int):
+        if len(ids) > 2 * live + 64:
+            ids[:] = [i for i in ids if i in self._entries]
+
+    def page(
+        self,
+        namespace: Optional[str] = None,
+        involved_object: Optional[str] = None,
+        reason: Optional[str] = None,
+        event_type: Optional[str] = None,
+        before: Optional[int] = None,
+        after: Optional[int] = None,
+        limit: int = 50
+    ) -> Dict[str, Any]:
+        """
+        Newest-first page of events with id < before and id > after.
+        next_cursor is the before value for the following (older) page,
+        or None when there is none.
+        """
+        limit = max(1, min(limit, MAX_EVENT_PAGE))
+        filters = {"namespace": namespace, "object": involved_object, "reason": reason, "type": event_type}
+        filters = {field: value for field, value in filters.items() if value is not None}
+        with self._lock:
+            # Walk the shortest index that applies, check the other filters per event
+            ids = self._all
+            for field in INDEXED_FIELDS:
+                if field in filters:
+                    candidate = self._indexes.get((field, filters[field]), [])
+                    if len(candidate) < len(ids) or ids is self._all:
+                        ids = candidate
+            position = bisect.bisect_left(ids, before) if before is not None else len(ids)
+            events: List[Dict[str, Any]] = []
+            more = False
+            while position > 0:
+                position -= 1
+                event_id = ids[position]
+                if after is not None and event_id <= after:
+                    break
+                event = self._entries.get(event_id)
+                if event is None or any(event.get(field) != value for field, value in filters.items()):
+                    continue
+                if len(events) == limit:
+                    more = True
+                    break
+                events.append(dict(event))
+            return {
+                "events": events,
+                "next_cursor": events[-1]["id"] if more else None,
+                "latest": self._seq
+            }
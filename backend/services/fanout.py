@@ -0,0 +1,79 @@
+import asyncio
+import os
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+FANOUT_TIMEOUT_SECONDS = float(os.getenv("K8S_FANOUT_TIMEOUT_SECONDS", "5"))
+# Kubernetes calls are blocking; fanned out or awaited, they all run on one
+# bounded pool so a slow apiserver ties up pool threads instead of the event loop
+K8S_THREADPOOL_SIZE = int(os.getenv("K8S_THREADPOOL_SIZE", "32"))
+
+# Marker returned in the errors dict for calls that exceeded the timeout
+TIMEOUT = "timeout"
+
+k8s_executor = ThreadPoolExecutor(max_workers=K8S_THREADPOOL_SIZE, thread_name_prefix="k8s-io")
+
+def fan_out(
+    calls: Dict[str, Callable[[], Any]],
+    timeout: Optional[float] = FANOUT_TIMEOUT_SECONDS
+) -> Tuple[Dict[str, Any], Dict[str, str]]:
+    """
+    Run independent blocking calls concurrently.
+
+    Returns (results, errors): results maps each name to its return value,
+    errors maps the names that failed to TIMEOUT or the exception message.
+    Every call gets the same deadline, so total latency is bounded by the
+    slowest call or the timeout, not by their sum.
+
+    A timed out call is cancelled only if it has not started yet; one that
+    is already running keeps its pool thread until the apiserver answers or
+    its request timeout expires.
+    """
+    futures = {name: k8s_executor.submit(call) for name, call in calls.items()}
+    deadline = time.monotonic() + timeout if timeout is not None else None
+    results: Dict[str, Any] = {}
+    errors: Dict[str, str] = {}
+
+    for name, future in futures.items():
+        remaining = max(0.0, deadline - time.monotonic()) if deadline is not None else None
+        try:
+            results[name] = future.result(timeout=remaining)
+        except FuturesTimeoutError:
+            future.cancel()
+            logger.warning(f"Fan-out call {name} timed out after {timeout}s")
+            errors[name] = TIMEOUT
+        except Exception as e:
+            logger.warning(f"Fan-out call {name} failed: {e}")
+            errors[name] = str(e)
+    return results, errors
+
+async def fan_out_async(
+    calls: Dict[str, Awaitable],
+    timeout: Optional[float] = FANOUT_TIMEOUT_SECONDS
+) -> Tuple[Dict[str, Any], Dict[str, str]]:
+    """
+    Await independent coroutines concurrently, with the same
+    (results, errors) contract as fan_out
+    """
+    names = list(calls)
+    outcomes = await asyncio.gather(
+        *(asyncio.wait_for(calls[name], timeout) for name in names),
+        return_exceptions=True
+    )
+    results: Dict[str, Any] = {}
+    errors: Dict[str, str] = {}
+    for name, outcome in zip(names, outcomes):
+        if isinstance(outcome, asyncio.TimeoutError):
+            logger.warning(f"Fan-out call {name} timed out after {timeout}s")
+            errors[name] = TIMEOUT
+        elif isinstance(outcome, Exception):
+            logger.warning(f"Fan-out call {name} failed: {outcome}")
+            errors[name] = str(outcome)
+        else:
+            results[name] = outcome
+    return results, errors
@@ -0,0 +1,205 @@
+from kubernetes import watch
+from kubernetes.client.rest import ApiException
+import os
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Server-side watch timeout; the informer re-opens the watch from the last
+# resourceVersion when it expires, so this only bounds idle connections
+WATCH_TIMEOUT_SECONDS = int(os.getenv("K8S_WATCH_TIMEOUT_SECONDS", "300"))
+RETRY_BACKOFF_SECONDS = float(os.getenv("K8S_WATCH_RETRY_BACKOFF_SECONDS", "5"))
+
+HTTP_GONE = 410
+
+# Event type passed to handlers before a relist replays the store as ADDED events
+RESYNC = "RESYNC"
+
+EventHandler = Callable[[str, Optional[Dict[str, Any]], Optional[Dict[str, Any]]], None]
+
+class Informer:
+    """
+    Mirrors one resource kind into an in-process store.
+
+    Does a single LIST, then keeps the store current with a WATCH started
+    from the returned resourceVersion. When the apiserver answers 410 Gone
+    the informer relists and resumes watching from the fresh version.
+    Items are stored already transformed, keyed by namespace and name.
+
+    Handlers registered with add_handler are called from the informer
+    thread as handler(event_type, old, new) for every change, so derived
+    state can be maintained incrementally. A relist first sends RESYNC and
+    then replays the new store as ADDED events.
+
+    With keep_store=False nothing is stored, for kinds that are only
+    consumed as a stream (events); handlers then get the object itself as
+    old on DELETED and as new otherwise.
+    """
+    def __init__(
+        self,
+        kind: str,
+        list_func: Callable,
+        transform: Callable[[Any], Dict[str, Any]],
+        watch_timeout: int = WATCH_TIMEOUT_SECONDS,
+        retry_backoff: float = RETRY_BACKOFF_SECONDS,
+        keep_store: bool = True
+    ):
+        self.kind = kind
+        self.keep_store = keep_store
+        self.resource_version: Optional[str] = None
+        self._list_func = list_func
+        self._transform = transform
+        self._watch_timeout = watch_timeout
+        self._retry_backoff = retry_backoff
+        self._store: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+        self._synced = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._watcher: Optional[watch.Watch] = None
+        self._handlers: List[EventHandler] = []
+
+    def start(self):
+        """Start the list/watch loop in a daemon thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name=f"informer-{self.kind}", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop watching; the store keeps its last contents"""
+        self._stopped.set()
+        if self._watcher:
+            self._watcher.stop()
+
+    def add_handler(self, handler: EventHandler):
+        """Register a change handler; it is replayed the current store first"""
+        with self._lock:
+            items = [item for bucket in self._store.values() for item in bucket.values()]
+            self._handlers.append(handler)
+        for item in items:
+            handler("ADDED", None, item)
+
+    def remove_handler(self, handler: EventHandler):
+        """Unregister a change handler; events already being dispatched may still reach it"""
+        with self._lock:
+            # Replaced rather than mutated, so a dispatch in progress keeps its list
+            self._handlers = [h for h in self._handlers if h != handler]
+
+    def _notify(self, event_type: str, old: Optional[Dict[str, Any]], new: Optional[Dict[str, Any]]):
+        for handler in self._handlers:
+            try:
+                handler(event_type, old, new)
+            except Exception as e:
+                logger.warning(f"{self.kind} informer handler error: {e}")
+
+    def has_synced(self) -> bool:
+        """True once the initial LIST has populated the store"""
+        return self._synced.is_set()
+
+    def wait_for_sync(self, timeout: Optional[float] = None) -> bool:
+        """Block until the initial LIST has completed or timeout expires"""
+        return self._synced.wait(timeout)
+
+    def list(
+        self,
+        namespace: Optional[str] = None,
+        predicate: Optional[Callable[[Dict[str, Any]], bool]] = None
+    ) -> List[Dict[str, Any]]:
+        """Return stored items, optionally restricted to one namespace and filtered by predicate"""
+        with self._lock:
+            if namespace:
+                items = list(self._store.get(namespace, {}).values())
+            else:
+                items = [item for bucket in self._store.values() for item in bucket.values()]
+        if predicate:
+            return [item for item in items if predicate(item)]
+        return items
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                if self.resource_version is None:
+                    self._relist()
+                self._watch()
+            except ApiException as e:
+                if e.status == HTTP_GONE:
+                    logger.info(f"{self.kind} watch expired at resourceVersion {self.resource_version}, relisting")
+                    self.resource_version = None
+                    continue
+                logger.warning(f"{self.kind} informer error: {e}")
+                self._stopped.wait(self._retry_backoff)
+            except Exception as e:
+                logger.warning(f"{self.kind} informer error: {e}")
+                self._stopped.wait(self._retry_backoff)
+
+    def _relist(self):
+        """Replace the store with a fresh LIST and remember its resourceVersion"""
+        response = self._list_func()
+        store: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        for obj in response.items:
+            store.setdefault(obj.metadata.namespace or "", {})[obj.metadata.name] = self._transform(obj)
+
+        with self._lock:
+            self._store = store if self.keep_store else {}
+            self.resource_version = response.metadata.resource_version
+        if self._handlers:
+            self._notify(RESYNC, None, None)
+            for bucket in store.values():
+                for item in bucket.values():
+                    self._notify("ADDED", None, item)
+        self._synced.set()
+        logger.info(f"{self.kind} informer synced {len(response.items)} items at resourceVersion {self.resource_version}")
+
+    def _watch(self):
+        self._watcher = watch.Watch()
+        try:
+            for event in self._watcher.stream(
+                self._list_func,
+                resource_version=self.resource_version,
+                timeout_seconds=self._watch_timeout,
+                allow_watch_bookmarks=True
+            ):
+                self._handle_event(event)
+                if self._stopped.is_set():
+                    self._watcher.stop()
+        finally:
+            self._watcher = None
+
+    def _handle_event(self, event: Dict[str, Any]):
+        """Apply a single watch event to the store"""
+        event_type = event["type"]
+        if event_type == "BOOKMARK":
+            metadata = event["raw_object"].get("metadata", {})
+            self.resource_version = metadata.get("resourceVersion", self.resource_version)
+            return
+
+        obj = event["object"]
+        if not self.keep_store:
+            self.resource_version = obj.metadata.resource_version
+            if self._handlers:
+                item = self._transform(obj)
+                self._notify(event_type, item if event_type == "DELETED" else None, None if event_type == "DELETED" else item)
+            return
+        namespace = obj.metadata.namespace or ""
+        new = None
+        with self._lock:
+            if event_type == "DELETED":
+                old = None
+                bucket = self._store.get(namespace)
+                if bucket is not None:
+                    old = bucket.pop(obj.metadata.name, None)
+                    if not bucket:
+                        del self._store[namespace]
+            else:
+                new = self._transform(obj)
+                bucket = self._store.setdefault(namespace, {})
+                old = bucket.get(obj.metadata.name)
+                bucket[obj.metadata.name] = new
+            self.resource_version = obj.metadata.resource_version
+        if self._handlers and (old is not None or new is not None):
+            self._notify(event_type, old, new)
@@ -1,43 +1,125 @@
-from kubernetes import client, config
+from kubernetes import client
+from kubernetes.client.rest import ApiException
 import os
+import re
+import base64
+import binascii
 import logging
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 from datetime import datetime
 
 from models.kubernetes import KubernetesResource
+from services.raw_list import loads
+from services.selectors import selector_kwargs
+from services.client_provider import get_api_client
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
-# Determine if running in-cluster or locally
-IN_CLUSTER = os.getenv("IN_CLUSTER", "false").lower() == "true"
+# Page size bounds for paginated and streamed listings
+DEFAULT_PAGE_SIZE = int(os.getenv("K8S_DEFAULT_PAGE_SIZE", "500"))
+MAX_PAGE_SIZE = int(os.getenv("K8S_MAX_PAGE_SIZE", "5000"))
+
+# List namespaces as server-side Tables carrying only object metadata
+METADATA_LISTING = os.getenv("K8S_METADATA_LISTING", "true").lower() == "true"
+
+# Accept headers asking the apiserver to return metadata instead of full objects
+TABLE_ACCEPT = "application/json;as=Table;g=meta.k8s.io;v=v1,application/json"
+PARTIAL_METADATA_ACCEPT = "application/json;as=PartialObjectMetadataList;g=meta.k8s.io;v=v1,application/json"
+
+# Cursors are unpadded URL-safe base64
+CURSOR_PATTERN = re.compile(r"^[A-Za-z0-9_-]+$")
+
+_core_client = None
+
+class CursorError(ValueError):
+    """Raised for a cursor that was not issued by encode_cursor"""
 
 def get_kubernetes_client():
     """
-    Get a Kubernetes client based on the environment
+    Get a Kubernetes client based on the environment.
+    Built once on top of the shared ApiClient and reused by every request.
     """
-    try:
-        if IN_CLUSTER:
-            # When running in a Kubernetes cluster
-            config.load_incluster_config()
-            logger.info("Using in-cluster Kubernetes configuration")
+    global _core_client
+    if _core_client is None:
+        api_client = get_api_client()
+        if api_client is None:
+            logger.error("Failed to initialize Kubernetes client, no configuration available")
+            # Return a mock client for testing/development
+            _core_client = MockKubernetesClient()
         else:
-            # When running locally
-            config.load_kube_config()
-            logger.info("Using local Kubernetes configuration")
-            
-        return client.CoreV1Api()
-    except Exception as e:
-        logger.error(f"Failed to initialize Kubernetes client: {str(e)}")
-        # Return a mock client for testing/development
-        return MockKubernetesClient()
+            _core_client = client.CoreV1Api(api_client)
+    return _core_client
+
+def list_metadata(api_client, path: str, as_table: bool = True, **query) -> List[Dict[str, Any]]:
+    """
+    List a collection without downloading object specs.
 
-def list_namespaces(api_client) -> List[KubernetesResource]:
+    With as_table the apiserver returns a Table whose rows carry the object
+    metadata plus printed columns, the "Status" column is used as status.
+    Otherwise a PartialObjectMetadataList is requested, which has no status.
+    Servers that ignore the Accept header fall back to full objects.
     """
-    List all namespaces in the cluster
+    query_params = [(key, value) for key, value in query.items() if value is not None]
+    if as_table:
+        query_params.append(("includeObject", "Metadata"))
+    response = api_client.api_client.call_api(
+        path, "GET",
+        query_params=query_params,
+        header_params={"Accept": TABLE_ACCEPT if as_table else PARTIAL_METADATA_ACCEPT},
+        auth_settings=["BearerToken"],
+        _preload_content=False
+    )
+    try:
+        body = loads(response.data)
+    finally:
+        response.release_conn()
+
+    if body.get("kind") == "Table":
+        columns = [column["name"] for column in body.get("columnDefinitions", [])]
+        status_index = columns.index("Status") if "Status" in columns else None
+        rows = [
+            (row["object"]["metadata"], row["cells"][status_index] if status_index is not None else None)
+            for row in body.get("rows") or []
+        ]
+    else:
+        rows = [
+            (item["metadata"], (item.get("status") or {}).get("phase"))
+            for item in body.get("items") or []
+        ]
+
+    return [
+        {
+            "name": metadata["name"],
+            "namespace": metadata.get("namespace"),
+            "uid": metadata.get("uid", ""),
+            "creation_timestamp": metadata.get("creationTimestamp"),
+            "status": status or "Unknown",
+            "labels": metadata.get("labels") or {},
+            "annotations": metadata.get("annotations") or {}
+        }
+        for metadata, status in rows
+    ]
+
+def list_namespaces(
+    api_client,
+    metadata_only: bool = METADATA_LISTING,
+    label_selector: Optional[str] = None,
+    field_selector: Optional[str] = None
+) -> List[KubernetesResource]:
+    """
+    List all namespaces in the cluster, filtered server-side by the selectors
     """
     try:
-        namespaces = api_client.list_namespace()
+        if metadata_only and hasattr(api_client, "api_client"):
+            return [
+                KubernetesResource(kind="Namespace", **item)
+                for item in list_metadata(
+                    api_client, "/api/v1/namespaces",
+                    labelSelector=label_selector, fieldSelector=field_selector
+                )
+            ]
+        namespaces = api_client.list_namespace(**selector_kwargs(label_selector, field_selector))
         result = []
         
         for ns in namespaces.items:
@@ -76,27 +158,103 @@ def list_namespaces(api_client) -> List[KubernetesResource]:
             )
         ]
 
-def list_pods(api_client, namespace: str) -> List[KubernetesResource]:
+def encode_cursor(continue_token: Optional[str]) -> Optional[str]:
+    """
+    Wrap an apiserver continue token in an opaque, URL-safe cursor
+    """
+    if not continue_token:
+        return None
+    return base64.urlsafe_b64encode(continue_token.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: Optional[str]) -> Optional[str]:
     """
-    List all pods in a namespace
+    Recover the apiserver continue token from a cursor; raises CursorError
     """
+    if not cursor:
+        return None
+    if not CURSOR_PATTERN.match(cursor):
+        raise CursorError("Invalid cursor")
+    padding = "=" * (-len(cursor) % 4)
     try:
-        pods = api_client.list_namespaced_pod(namespace)
-        result = []
-        
-        for pod in pods.items:
-            result.append(KubernetesResource(
-                name=pod.metadata.name,
-                kind="Pod",
-                uid=pod.metadata.uid,
-                creation_timestamp=pod.metadata.creation_timestamp,
-                status=pod.status.phase,
-                labels=pod.metadata.labels or {},
-                annotations=pod.metadata.annotations or {},
-                namespace=namespace
-            ))
-            
-        return result
+        return base64.urlsafe_b64decode(cursor + padding).decode()
+    except (binascii.Error, UnicodeDecodeError):
+        raise CursorError("Invalid cursor")
+
+def _pod_resource(pod, namespace: str) -> KubernetesResource:
+    return KubernetesResource(
+        name=pod.metadata.name,
+        kind="Pod",
+        uid=pod.metadata.uid,
+        creation_timestamp=pod.metadata.creation_timestamp,
+        status=pod.status.phase,
+        labels=pod.metadata.labels or {},
+        annotations=pod.metadata.annotations or {},
+        namespace=namespace
+    )
+
+def list_pods_page(
+    api_client,
+    namespace: str,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    label_selector: Optional[str] = None,
+    field_selector: Optional[str] = None
+) -> Tuple[List[KubernetesResource], Optional[str]]:
+    """
+    List one page of pods in a namespace.
+    Returns the page and the cursor for the next one (None on the last page).
+    A malformed cursor raises CursorError. Apiserver errors are raised as
+    ApiException rather than ending the listing early, status 410 meaning
+    the cursor expired.
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    kwargs = {"limit": limit, **selector_kwargs(label_selector, field_selector)}
+    if cursor:
+        kwargs["_continue"] = decode_cursor(cursor)
+    pods = api_client.list_namespaced_pod(namespace, **kwargs)
+    return [_pod_resource(pod, namespace) for pod in pods.items], encode_cursor(pods.metadata._continue)
+
+def iter_pods(
+    api_client,
+    namespace: str,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    label_selector: Optional[str] = None,
+    field_selector: Optional[str] = None
+) -> Iterator[KubernetesResource]:
+    """
+    Yield pods in a namespace page by page, holding at most one page in memory.
+    Raises ApiException when a page cannot be listed.
+    """
+    cursor = None
+    while True:
+        pods, cursor = list_pods_page(api_client, namespace, page_size, cursor, label_selector, field_selector)
+        yield from pods
+        if not cursor:
+            return
+
+def list_pods(
+    api_client,
+    namespace: str,
+    metadata_only: bool = False,
+    label_selector: Optional[str] = None,
+    field_selector: Optional[str] = None
+) -> List[KubernetesResource]:
+    """
+    List all pods in a namespace, filtered server-side by the selectors.
+    With metadata_only the status is the printed Status column (e.g.
+    CrashLoopBackOff) rather than the pod phase.
+    """
+    try:
+        if metadata_only and hasattr(api_client, "api_client"):
+            return [
+                KubernetesResource(kind="Pod", **item)
+                for item in list_metadata(
+                    api_client, f"/api/v1/namespaces/{namespace}/pods",
+                    labelSelector=label_selector, fieldSelector=field_selector
+                )
+            ]
+        pods = api_client.list_namespaced_pod(namespace, **selector_kwargs(label_selector, field_selector))
+        return [_pod_resource(pod, namespace) for pod in pods.items]
     except Exception as e:
         logger.error(f"Error listing pods in namespace {namespace}: {str(e)}")
         # Return mock data in case of error
@@ -127,7 +285,7 @@ class MockKubernetesClient:
     """
     Mock Kubernetes client for development/testing
     """
-    def list_namespace(self):
+    def list_namespace(self, **kwargs):
         # Return a mock namespace list
         return MockObjectList([
             MockNamespace("default", "Active"),
@@ -135,7 +293,7 @@ class MockKubernetesClient:
             MockNamespace("kube-public", "Active")
         ])
         
-    def list_namespaced_pod(self, namespace):
+    def list_namespaced_pod(self, namespace, **kwargs):
         # Return a mock pod list
         return MockObjectList([
             MockPod(f"{namespace}-pod-1", "Running", namespace),
@@ -146,6 +304,12 @@ class MockKubernetesClient:
 class MockObjectList:
     def __init__(self, items):
         self.items = items
+        self.metadata = MockListMeta()
+
+class MockListMeta:
+    def __init__(self):
+        self._continue = None
+        self.resource_version = "1"
 
 class MockNamespace:
     def __init__(self, name, phase):
@@ -0,0 +1,326 @@
+import glob
+import json
+import os
+import time
+import zlib
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - zstandard is optional
+    zstandard = None
+
+from services.logs import PodLogStream
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Root directory of captured logs; capture is disabled when unset
+LOG_STORE_DIR = os.getenv("K8S_LOG_STORE_DIR", "")
+# Namespaces whose pod logs are captured, comma separated
+LOG_CAPTURE_NAMESPACES = [n.strip() for n in os.getenv("K8S_LOG_CAPTURE_NAMESPACES", "").split(",") if n.strip()]
+# Segments are partitioned by write time into files of this many seconds
+LOG_SEGMENT_SECONDS = int(os.getenv("K8S_LOG_SEGMENT_SECONDS", "3600"))
+LOG_STORE_MAX_BYTES = int(os.getenv("K8S_LOG_STORE_MAX_BYTES", str(1024 * 1024 * 1024)))
+LOG_STORE_MAX_AGE_SECONDS = int(os.getenv("K8S_LOG_STORE_MAX_AGE_SECONDS", str(7 * 24 * 3600)))
+# Uncompressed size of one block, the unit that is compressed and read back
+LOG_BLOCK_BYTES = 256 * 1024
+# Buffered lines are written at least this often
+LOG_FLUSH_SECONDS = float(os.getenv("K8S_LOG_FLUSH_SECONDS", "10"))
+LOG_CAPTURE_SYNC_SECONDS = float(os.getenv("K8S_LOG_CAPTURE_SYNC_SECONDS", "30"))
+# Lines fetched from each container the first time it is captured
+LOG_CAPTURE_INITIAL_TAIL = 1000
+MAX_CAPTURE_STREAMS = int(os.getenv("K8S_LOG_CAPTURE_MAX_STREAMS", "200"))
+
+StreamKey = Tuple[str, str, Optional[str]]
+
+def timestamp_seconds(timestamp: str) -> float:
+    """Epoch seconds of a normalized log timestamp"""
+    seconds, _, fraction = timestamp.rstrip("Z").partition(".")
+    parsed = datetime.strptime(seconds, "%Y-%m-%dT%H:%M:%S").replace(tzinfo=timezone.utc)
+    return parsed.timestamp() + float(f"0.{fraction or 0}")
+
+def _compress(data: bytes) -> Tuple[str, bytes]:
+    if zstandard is not None:
+        return "zstd", zstandard.ZstdCompressor(level=3).compress(data)
+    return "zlib", zlib.compress(data, 6)
+
+def _decompress(codec: str, data: bytes) -> bytes:
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstandard is not installed")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return zlib.decompress(data)
+
+class _Buffer:
+    def __init__(self, now: float):
+        self.lines: List[bytes] = []
+        self.bytes = 0
+        self.first = None
+        self.last = None
+        self.opened = now
+
+class LogStore:
+    """
+    Compressed, time-partitioned log segments on local disk.
+
+    Lines are buffered per container and written as independently
+    compressed blocks (zstd frames, or zlib when zstandard is missing),
+    appended to the segment file of the current partition. Each block has
+    an index entry (namespace, pod, container, first and last timestamp,
+    offset, length) kept in memory and in a sidecar .idx file, so a query
+    seeks to and decompresses only the blocks of the pod and time range it
+    asks for.
+
+    Retention drops whole partitions: those older than max_age_seconds,
+    then the oldest ones while the store is larger than max_bytes.
+    """
+    def __init__(
+        self,
+        root: str,
+        segment_seconds: int = LOG_SEGMENT_SECONDS,
+        max_bytes: int = LOG_STORE_MAX_BYTES,
+        max_age_seconds: int = LOG_STORE_MAX_AGE_SECONDS,
+        block_bytes: int = LOG_BLOCK_BYTES,
+        flush_seconds: float = LOG_FLUSH_SECONDS,
+        clock=time.time
+    ):
+        self.root = root
+        self.segment_seconds = segment_seconds
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.block_bytes = block_bytes
+        self.flush_seconds = flush_seconds
+        self._clock = clock
+        self._index: Dict[int, List[Dict[str, Any]]] = {}
+        self._sizes: Dict[int, int] = {}
+        self._buffers: Dict[StreamKey, _Buffer] = {}
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+        self._load()
+
+    def _path(self, partition: int, suffix: str) -> str:
+        return os.path.join(self.root, f"{partition}.{suffix}")
+
+    def _load(self):
+        for path in glob.glob(os.path.join(self.root, "*.idx")):
+            partition = int(os.path.basename(path).split(".")[0])
+            entries = []
+            with open(path) as f:
+                for raw in f:
+                    try:
+                        entries.append(json.loads(raw))
+                    except ValueError:
+                        # A torn last line from a crash; its block is unreachable
+                        break
+            self._index[partition] = entries
+            self._sizes[partition] = os.path.getsize(self._path(partition, "seg")) if os.path.exists(self._path(partition, "seg")) else 0
+
+    @property
+    def size(self) -> int:
+        return sum(self._sizes.values())
+
+    def append(self, line: Dict[str, Any]):
+        """Buffer one line from PodLogStream; full buffers are written as a block"""
+        key = (line["namespace"], line["pod"], line.get("container"))
+        encoded = json.dumps({"t": line["timestamp"], "m": line.get("message", "")}).encode() + b"\n"
+        with self._lock:
+            buffer = self._buffers.get(key)
+            if buffer is None:
+                buffer = self._buffers[key] = _Buffer(self._clock())
+            buffer.lines.append(encoded)
+            buffer.bytes += len(encoded)
+            buffer.first = buffer.first or line["timestamp"]
+            buffer.last = line["timestamp"]
+            if buffer.bytes >= self.block_bytes:
+                self._write_block(key, self._buffers.pop(key))
+
+    def flush(self, force: bool = False):
+        """Write buffers older than flush_seconds, or all of them with force"""
+        now = self._clock()
+        with self._lock:
+            for key in [k for k, b in self._buffers.items() if force or now - b.opened >= self.flush_seconds]:
+                self._write_block(key, self._buffers.pop(key))
+
+    def _write_block(self, key: StreamKey, buffer: _Buffer):
+        codec, data = _compress(b"".join(buffer.lines))
+        partition = int(self._clock() // self.segment_seconds) * self.segment_seconds
+        with open(self._path(partition, "seg"), "ab") as f:
+            offset = f.tell()
+            f.write(data)
+        entry = {
+            "namespace": key[0], "pod": key[1], "container": key[2],
+            "first": buffer.first, "last": buffer.last, "lines": len(buffer.lines),
+            "offset": offset, "length": len(data), "codec": codec
+        }
+        # The index line is written after its block, so a crash never indexes a missing block
+        with open(self._path(partition, "idx"), "a") as f:
+            f.write(json.dumps(entry) + "\n")
+        self._index.setdefault(partition, []).append(entry)
+        self._sizes[partition] = offset + len(data)
+
+    def enforce_retention(self):
+        """Delete partitions past max age, then the oldest while over max_bytes"""
+        cutoff = self._clock() - self.max_age_seconds
+        current = int(self._clock() // self.segment_seconds) * self.segment_seconds
+        with self._lock:
+            for partition in sorted(self._index):
+                expired = partition + self.segment_seconds < cutoff
+                if not expired and (self.size <= self.max_bytes or partition == current):
+                    continue
+                self._index.pop(partition)
+                self._sizes.pop(partition, None)
+                for suffix in ("seg", "idx"):
+                    try:
+                        os.remove(self._path(partition, suffix))
+                    except FileNotFoundError:
+                        pass
+                logger.info(f"Dropped log partition {partition} from {self.root}")
+
+    def query(
+        self,
+        namespace: Optional[str] = None,
+        pod: Optional[str] = None,
+        container: Optional[str] = None,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        limit: int = 1000
+    ) -> List[Dict[str, Any]]:
+        """
+        The newest limit stored lines matching the filters, oldest first.
+        start/end are normalized timestamps bounding [start, end). Lines
+        still buffered are not included.
+        """
+        with self._lock:
+            blocks = [
+                (partition, entry)
+                for partition in sorted(self._index, reverse=True)
+                for entry in reversed(self._index[partition])
+                if (namespace is None or entry["namespace"] == namespace)
+                and (pod is None or entry["pod"] == pod)
+                and (container is None or entry["container"] == container)
+                and (start is None or entry["last"] >= start)
+                and (end is None or entry["first"] < end)
+            ]
+        # Newest blocks first; blocks of different containers can overlap in time
+        lines: List[Dict[str, Any]] = []
+        for partition, entry in blocks:
+            if len(lines) >= limit and lines[-1]["timestamp"] > entry["last"]:
+                break
+            try:
+                with open(self._path(partition, "seg"), "rb") as f:
+                    f.seek(entry["offset"])
+                    data = _decompress(entry["codec"], f.read(entry["length"]))
+            except (OSError, RuntimeError, zlib.error) as e:
+                logger.warning(f"Skipping unreadable log block in partition {partition}: {e}")
+                continue
+            for raw in data.splitlines():
+                record = json.loads(raw)
+                if (start is None or record["t"] >= start) and (end is None or record["t"] < end):
+                    lines.append({
+                        "timestamp": record["t"],
+                        "namespace": entry["namespace"],
+                        "pod": entry["pod"],
+                        "container": entry["container"],
+                        "message": record["m"]
+                    })
+            lines.sort(key=lambda line: line["timestamp"], reverse=True)
+            del lines[limit:]
+        return lines[::-1]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "partitions": len(self._index),
+                "blocks": sum(len(entries) for entries in self._index.values()),
+                "bytes": self.size,
+                "codec": "zstd" if zstandard is not None else "zlib"
+            }
+
+class LogCapture:
+    """
+    Tails every container of the running pods in the given namespaces into
+    a LogStore. Pods are re-listed every sync_seconds; a container whose
+    stream ended (e.g. it restarted) is re-opened from its last captured
+    timestamp, so restarts do not lose or duplicate lines.
+    """
+    def __init__(self, k8s_service, store: LogStore, namespaces: List[str], sync_seconds: float = LOG_CAPTURE_SYNC_SECONDS):
+        self._k8s_service = k8s_service
+        self.store = store
+        self.namespaces = namespaces
+        self.sync_seconds = sync_seconds
+        self._streams: Dict[StreamKey, Tuple[PodLogStream, threading.Thread]] = {}
+        self._last: Dict[StreamKey, str] = {}
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="log-capture", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        for stream, _ in list(self._streams.values()):
+            stream.close()
+        self._streams.clear()
+        self.store.flush(force=True)
+
+    def _run(self):
+        next_sync = 0.0
+        while not self._stopped.is_set():
+            try:
+                if time.monotonic() >= next_sync:
+                    self.sync()
+                    self.store.enforce_retention()
+                    next_sync = time.monotonic() + self.sync_seconds
+                self.store.flush()
+            except Exception as e:
+                logger.warning(f"Log capture failed: {e}")
+            self._stopped.wait(min(self.store.flush_seconds, self.sync_seconds))
+
+    def sync(self):
+        """Start streams for new or restarted containers and close those of deleted pods"""
+        if not self._k8s_service.is_connected():
+            return
+        wanted = set()
+        for namespace in self.namespaces:
+            for pod in self._k8s_service.get_pods(namespace, field_selector="status.phase=Running"):
+                for container in pod.get("containers") or [None]:
+                    wanted.add((namespace, pod["name"], container))
+        for key in [k for k in self._streams if k not in wanted]:
+            self._streams.pop(key)[0].close()
+            self._last.pop(key, None)
+        for key in sorted(wanted):
+            running = self._streams.get(key)
+            if running is not None and running[1].is_alive():
+                continue
+            if len(self._streams) >= MAX_CAPTURE_STREAMS and key not in self._streams:
+                logger.warning(f"Log capture limited to {MAX_CAPTURE_STREAMS} containers")
+                break
+            last = self._last.get(key)
+            since_seconds = max(1, int(time.time() - timestamp_seconds(last)) + 1) if last else None
+            stream = PodLogStream(
+                self._k8s_service.v1, key[0], key[1], key[2], follow=True,
+                tail_lines=None if last else LOG_CAPTURE_INITIAL_TAIL, since_seconds=since_seconds
+            )
+            thread = threading.Thread(target=self._tail, args=(key, stream), name=f"log-capture-{key[1]}", daemon=True)
+            self._streams[key] = (stream, thread)
+            thread.start()
+
+    def _tail(self, key: StreamKey, stream: PodLogStream):
+        try:
+            for line in stream:
+                # A re-opened stream starts a little before the last captured line
+                if key in self._last and line["timestamp"] <= self._last[key]:
+                    continue
+                self.store.append(line)
+                self._last[key] = line["timestamp"]
+        except Exception as e:
+            if not self._stopped.is_set():
+                logger.info(f"Log capture of {key[1]}/{key[2]} ended: {e}")
@@ -0,0 +1,382 @@
+import asyncio
+import functools
+import json
+import os
+import re
+import time
+import logging
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional
+
+from kubernetes import client
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Buffered lines per container stream; a full buffer stops reading from the apiserver
+LOG_QUEUE_LINES = int(os.getenv("K8S_LOG_QUEUE_LINES", "1000"))
+# How long the oldest buffered line may wait for slower streams before it is emitted out of order
+LOG_REORDER_SECONDS = float(os.getenv("K8S_LOG_REORDER_SECONDS", "0.5"))
+# Container streams one request may open
+MAX_LOG_STREAMS = int(os.getenv("K8S_LOG_MAX_STREAMS", "100"))
+# Upper bound on the lines one non-streaming log request returns
+LOG_TAIL_MAX_LINES = int(os.getenv("K8S_LOG_TAIL_MAX_LINES", "5000"))
+LOG_CHUNK_BYTES = 16 * 1024
+# Search budgets: defaults and hard upper bounds per request
+LOG_SEARCH_MAX_LINES = int(os.getenv("K8S_LOG_SEARCH_MAX_LINES", "10000"))
+LOG_SEARCH_MAX_BYTES = int(os.getenv("K8S_LOG_SEARCH_MAX_BYTES", str(8 * 1024 * 1024)))
+MAX_SEARCH_PATTERN_LENGTH = 512
+# Regex queries only look at this many characters of each message, bounding
+# the cost of one match
+LOG_SEARCH_MAX_LINE_LENGTH = int(os.getenv("K8S_LOG_SEARCH_MAX_LINE_LENGTH", "4096"))
+# A quantified group whose body ends in a quantifier, e.g. (a+)+ or (\w*)*,
+# backtracks exponentially on lines that almost match
+NESTED_QUANTIFIER = re.compile(r"\((?:[^()\\]|\\.)*[*+?}]\)[*+{]")
+
+LEVELS = ("TRACE", "DEBUG", "INFO", "WARN", "ERROR", "FATAL")
+_LEVEL_ALIASES = {
+    "WARNING": "WARN", "ERR": "ERROR", "CRITICAL": "FATAL", "CRIT": "FATAL", "PANIC": "FATAL",
+    "DBG": "DEBUG", "TRC": "TRACE", "INF": "INFO", "WRN": "WARN", "FTL": "FATAL",
+    # klog severity letters
+    "I": "INFO", "W": "WARN", "E": "ERROR", "F": "FATAL"
+}
+# level=warn, "level":"error", "severity": "ERROR", [ERROR], leading ERROR, klog E0102 15:04:05
+_LEVEL_PATTERN = re.compile(
+    r"""(?:\b(?:level|lvl|severity)["']?\s*[=:]\s*["']?(?P<field>[A-Za-z]+)"""
+    r"""|^\s*\[?(?P<word>TRACE|DEBUG|INFO|WARN(?:ING)?|ERROR|ERR|FATAL|CRITICAL|PANIC|DBG|TRC|INF|WRN|FTL)\b\]?"""
+    r"""|^(?P<klog>[IWEF])\d{4}\s)""",
+    re.IGNORECASE
+)
+
+def normalize_timestamp(value: str) -> str:
+    """
+    RFC3339Nano with exactly nine fractional digits, so timestamps from
+    different streams compare correctly as strings
+    """
+    if not value.endswith("Z"):
+        return value
+    seconds, _, fraction = value[:-1].partition(".")
+    return f"{seconds}.{(fraction + '000000000')[:9]}Z"
+
+def _now() -> str:
+    return normalize_timestamp(datetime.utcnow().isoformat() + "Z")
+
+class PodLogStream:
+    """
+    One container's log as parsed lines, read from the apiserver in chunks
+    rather than loaded whole. Lines are requested with timestamps, which
+    order them when several streams are merged.
+    """
+    def __init__(
+        self,
+        core_v1: client.CoreV1Api,
+        namespace: str,
+        pod: str,
+        container: Optional[str] = None,
+        follow: bool = False,
+        tail_lines: Optional[int] = None,
+        since_seconds: Optional[int] = None
+    ):
+        self.namespace = namespace
+        self.pod = pod
+        self.container = container
+        self._core_v1 = core_v1
+        self._kwargs = {"follow": follow, "timestamps": True, "_preload_content": False}
+        if container:
+            self._kwargs["container"] = container
+        if tail_lines is not None:
+            self._kwargs["tail_lines"] = tail_lines
+        if since_seconds is not None:
+            self._kwargs["since_seconds"] = since_seconds
+        self._response = None
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        self._response = self._core_v1.read_namespaced_pod_log(self.pod, self.namespace, **self._kwargs)
+        try:
+            pending = b""
+            for chunk in self._response.stream(LOG_CHUNK_BYTES):
+                pending += chunk
+                *lines, pending = pending.split(b"\n")
+                for raw in lines:
+                    yield self.parse(raw)
+            if pending:
+                yield self.parse(pending)
+        finally:
+            self._response.release_conn()
+
+    def parse(self, raw: bytes) -> Dict[str, Any]:
+        text = raw.decode("utf-8", "replace").rstrip("\r")
+        timestamp, _, message = text.partition(" ")
+        return {
+            "timestamp": normalize_timestamp(timestamp),
+            "namespace": self.namespace,
+            "pod": self.pod,
+            "container": self.container,
+            "message": message
+        }
+
+    def close(self):
+        """Abort the request, unblocking a reader waiting on a followed log"""
+        if self._response is not None:
+            self._response.close()
+
+class LogMultiplexer:
+    """
+    Merges several log streams into one stream ordered by timestamp.
+
+    Each stream is read by its own thread into a buffer of at most
+    queue_lines lines. When a buffer is full that thread stops reading, so
+    a slow consumer throttles the apiserver connections instead of the
+    worker buffering whole logs. The oldest buffered line is emitted once
+    every open stream has a line buffered to compare against, or after it
+    has waited reorder_seconds, so an idle followed pod cannot hold up the
+    others.
+    """
+    def __init__(
+        self,
+        streams: List[Any],
+        queue_lines: int = LOG_QUEUE_LINES,
+        reorder_seconds: float = LOG_REORDER_SECONDS
+    ):
+        self.streams = streams
+        self.queue_lines = queue_lines
+        self.reorder_seconds = reorder_seconds
+        self._buffers = [deque() for _ in streams]
+        self._open = set(range(len(streams)))
+        self._closed = False
+        self._condition = threading.Condition()
+        self._threads: List[threading.Thread] = []
+        self._listeners: List[Callable[[], None]] = []
+
+    def add_listener(self, listener: Callable[[], None]):
+        """Called from reader threads when a stream gets its first buffered line or ends"""
+        self._listeners.append(listener)
+
+    def _signal(self):
+        for listener in self._listeners:
+            listener()
+
+    def start(self) -> "LogMultiplexer":
+        for index in range(len(self.streams)):
+            thread = threading.Thread(target=self._read, args=(index,), name=f"log-stream-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def _read(self, index: int):
+        stream = self.streams[index]
+        buffer = self._buffers[index]
+        try:
+            for line in stream:
+                with self._condition:
+                    while len(buffer) >= self.queue_lines and not self._closed:
+                        self._condition.wait()
+                    if self._closed:
+                        return
+                    buffer.append((time.monotonic(), line))
+                    self._condition.notify_all()
+                    if len(buffer) == 1:
+                        self._signal()
+        except Exception as e:
+            if not self._closed:
+                logger.warning(f"Log stream {getattr(stream, 'pod', index)} failed: {e}")
+                with self._condition:
+                    buffer.append((time.monotonic(), {
+                        "timestamp": _now(),
+                        "namespace": getattr(stream, "namespace", None),
+                        "pod": getattr(stream, "pod", None),
+                        "container": getattr(stream, "container", None),
+                        "error": str(e)
+                    }))
+        finally:
+            with self._condition:
+                self._open.discard(index)
+                self._condition.notify_all()
+                self._signal()
+
+    def read(self, max_lines: int = 500, timeout: float = 1.0) -> Optional[List[Dict[str, Any]]]:
+        """
+        Up to max_lines merged lines, waiting at most timeout for the first.
+        Returns an empty list on timeout and None once every stream has
+        ended or the multiplexer was closed.
+        """
+        deadline = time.monotonic() + timeout
+        lines: List[Dict[str, Any]] = []
+        with self._condition:
+            while len(lines) < max_lines and not self._closed:
+                now = time.monotonic()
+                heads = [i for i, buffer in enumerate(self._buffers) if buffer]
+                if not heads:
+                    if not self._open:
+                        return lines or None
+                    if lines or now >= deadline:
+                        break
+                    self._condition.wait(deadline - now)
+                    continue
+                oldest = min(heads, key=lambda i: self._buffers[i][0][1]["timestamp"])
+                waiting = [i for i in self._open if not self._buffers[i]]
+                arrived = self._buffers[oldest][0][0]
+                if waiting and now - arrived < self.reorder_seconds:
+                    if lines or now >= deadline:
+                        break
+                    self._condition.wait(min(deadline, arrived + self.reorder_seconds) - now)
+                    continue
+                lines.append(self._buffers[oldest].popleft()[1])
+                self._condition.notify_all()
+            if self._closed:
+                return lines or None
+        return lines
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        try:
+            while True:
+                lines = self.read()
+                if lines is None:
+                    return
+                yield from lines
+        finally:
+            self.close()
+
+    def close(self):
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            self._condition.notify_all()
+        for stream in self.streams:
+            try:
+                stream.close()
+            except Exception:
+                pass
+
+async def read_batches(logs: LogMultiplexer, max_lines: int = 500) -> AsyncIterator[List[Dict[str, Any]]]:
+    """
+    Merged lines as batches for async endpoints. Waits on a wakeup from the
+    reader threads instead of a blocked pool thread, so idle followed logs
+    cost no threads beyond their readers.
+    """
+    loop = asyncio.get_running_loop()
+    ready = asyncio.Event()
+    logs.add_listener(lambda: loop.call_soon_threadsafe(ready.set))
+    while True:
+        ready.clear()
+        lines = logs.read(max_lines, timeout=0)
+        if lines is None:
+            return
+        if lines:
+            yield lines
+            continue
+        try:
+            # New data wakes us; otherwise retry once held-back lines may be emitted
+            await asyncio.wait_for(ready.wait(), timeout=logs.reorder_seconds)
+        except asyncio.TimeoutError:
+            pass
+
+def extract_level(message: str) -> Optional[str]:
+    """Severity of a log line in one of LEVELS, or None when it carries none"""
+    match = _LEVEL_PATTERN.search(message, 0, 256)
+    if not match:
+        return None
+    level = (match.group("field") or match.group("word") or match.group("klog")).upper()
+    level = _LEVEL_ALIASES.get(level, level)
+    return level if level in LEVELS else None
+
+def _search_prefix(pattern: re.Pattern, message: str) -> Optional[re.Match]:
+    return pattern.search(message, 0, LOG_SEARCH_MAX_LINE_LENGTH)
+
+class LogSearch:
+    """
+    Filters merged log lines on the server: a substring or regex query,
+    levels, and a [start, end) time window, within hard line and byte
+    budgets. Lines are matched one batch at a time and only matches are
+    encoded, so memory does not grow with the amount of log scanned.
+    """
+    def __init__(
+        self,
+        query: Optional[str] = None,
+        regex: bool = False,
+        case_sensitive: bool = False,
+        levels: Optional[List[str]] = None,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        max_lines: int = LOG_SEARCH_MAX_LINES,
+        max_bytes: int = LOG_SEARCH_MAX_BYTES
+    ):
+        self._search = None
+        if query:
+            if len(query) > MAX_SEARCH_PATTERN_LENGTH:
+                raise ValueError(f"Query is longer than {MAX_SEARCH_PATTERN_LENGTH} characters")
+            if regex and NESTED_QUANTIFIER.search(query):
+                raise ValueError("Nested quantifiers such as (a+)+ are not supported")
+            try:
+                pattern = re.compile(query if regex else re.escape(query), 0 if case_sensitive else re.IGNORECASE)
+            except re.error as e:
+                raise ValueError(f"Invalid regular expression: {e}")
+            if regex:
+                self._search = functools.partial(_search_prefix, pattern)
+            else:
+                self._search = pattern.search
+        self.levels = {_LEVEL_ALIASES.get(l.upper(), l.upper()) for l in levels} if levels else None
+        if self.levels and not self.levels <= set(LEVELS):
+            raise ValueError(f"Unknown level in {sorted(self.levels)}; use {', '.join(LEVELS)}")
+        self.start = normalize_timestamp(start) if start else None
+        self.end = normalize_timestamp(end) if end else None
+        self.max_lines = max(1, min(max_lines, LOG_SEARCH_MAX_LINES))
+        self.max_bytes = max(1, min(max_bytes, LOG_SEARCH_MAX_BYTES))
+        self.scanned = 0
+        self.matched = 0
+        self.bytes = 0
+        # Why the search stopped early: "max_lines", "max_bytes" or "end"
+        self.stopped: Optional[str] = None
+
+    @property
+    def done(self) -> bool:
+        return self.stopped is not None
+
+    def match(self, line: Dict[str, Any]) -> bool:
+        if "error" in line:
+            return True
+        timestamp = line.get("timestamp") or ""
+        if self.start and timestamp < self.start:
+            return False
+        message = line.get("message", "")
+        if self._search is not None and not self._search(message):
+            return False
+        if self.levels is not None:
+            return extract_level(message) in self.levels
+        return True
+
+    def feed(self, lines: List[Dict[str, Any]]) -> str:
+        """NDJSON of the matches in one batch, stopping at the budgets or the window end"""
+        out = []
+        for line in lines:
+            if self.done:
+                break
+            if self.end and (line.get("timestamp") or "") >= self.end and "error" not in line:
+                # Merged lines are in time order, so nothing later can match
+                self.stopped = "end"
+                break
+            self.scanned += 1
+            if not self.match(line):
+                continue
+            encoded = json.dumps({**line, "level": extract_level(line.get("message", ""))}) + "\n"
+            if self.bytes + len(encoded) > self.max_bytes:
+                self.stopped = "max_bytes"
+                break
+            out.append(encoded)
+            self.bytes += len(encoded)
+            self.matched += 1
+            if self.matched >= self.max_lines:
+                self.stopped = "max_lines"
+        return "".join(out)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "scanned_lines": self.scanned,
+            "matched_lines": self.matched,
+            "bytes": self.bytes,
+            "truncated": self.stopped in ("max_lines", "max_bytes"),
+            "stopped": self.stopped
+        }
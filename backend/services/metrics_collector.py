@@ -0,0 +1,227 @@
+from kubernetes import client
+from kubernetes.client.rest import ApiException
+from kubernetes.utils import parse_quantity
+from collections import Counter
+import os
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from services.informer import Informer, RESYNC
+from services.timeseries import TimeSeriesStore
+from services.alerts import AlertEngine
+from services.alert_manager import AlertManager
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# How often node and pod usage is pulled from metrics.k8s.io
+METRICS_INTERVAL_SECONDS = float(os.getenv("K8S_METRICS_INTERVAL_SECONDS", "30"))
+METRICS_GROUP = "metrics.k8s.io"
+METRICS_VERSION = "v1beta1"
+
+def quantity(value: Optional[str]) -> float:
+    """Parse a Kubernetes quantity ("250m", "16Gi") into a float, 0 when missing or invalid"""
+    if not value:
+        return 0.0
+    try:
+        return float(parse_quantity(value))
+    except ValueError:
+        return 0.0
+
+class StatusCounter:
+    """
+    Counts informer items by a field, updated from informer events.
+
+    The last seen value is remembered per object, so replays and duplicate
+    events do not skew the counts.
+    """
+    def __init__(self, field: str = "status"):
+        self.field = field
+        self._values: Dict[str, Any] = {}
+        self._counts: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def __call__(self, event_type: str, old: Optional[Dict[str, Any]], new: Optional[Dict[str, Any]]):
+        with self._lock:
+            if event_type == RESYNC:
+                self._values.clear()
+                self._counts.clear()
+                return
+            item = new or old
+            key = f"{item.get('namespace') or ''}/{item.get('name')}"
+            previous = self._values.pop(key, None)
+            if previous is not None:
+                self._counts[previous] -= 1
+            if event_type != "DELETED":
+                value = new.get(self.field) or "Unknown"
+                self._values[key] = value
+                self._counts[value] += 1
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            return {value: count for value, count in self._counts.items() if count > 0}
+
+    def total(self) -> int:
+        with self._lock:
+            return len(self._values)
+
+class MetricsCollector:
+    """
+    Keeps precomputed cluster metrics for one cluster.
+
+    Pod phase and node readiness counts follow the pods and nodes informers
+    event by event. CPU and memory usage are polled from metrics.k8s.io on
+    a fixed interval and compared with node allocatable capacity from the
+    nodes informer. snapshot() only reads this state and never calls the
+    apiserver.
+    """
+    def __init__(
+        self,
+        api_client: client.ApiClient,
+        pods: Informer,
+        nodes: Informer,
+        interval: float = METRICS_INTERVAL_SECONDS
+    ):
+        self._custom_api = client.CustomObjectsApi(api_client)
+        self._nodes = nodes
+        self._interval = interval
+        self.pod_phases = StatusCounter("status")
+        self.node_status = StatusCounter("status")
+        pods.add_handler(self.pod_phases)
+        nodes.add_handler(self.node_status)
+        self._usage: Dict[str, Any] = {}
+        self.timeseries = TimeSeriesStore()
+        self.alerts = AlertEngine(self.timeseries)
+        self.alert_manager = AlertManager(self.alerts)
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Start polling metrics.k8s.io in a daemon thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="metrics-collector", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                self.poll()
+            except Exception as e:
+                logger.warning(f"Metrics poll failed: {e}")
+            self._stopped.wait(self._interval)
+
+    def poll(self):
+        """Pull one sample of node and pod usage, record it, evaluate alert rules and send due notifications"""
+        try:
+            self.sample()
+        finally:
+            # A failed sample is what absent rules watch for, so evaluate regardless
+            self.alerts.evaluate()
+            self.alert_manager.flush()
+
+    def sample(self):
+        """Pull one sample of node and pod usage into the time-series store"""
+        try:
+            # Bounded, so a hung apiserver cannot hold up alert evaluation
+            node_metrics = self._custom_api.list_cluster_custom_object(
+                METRICS_GROUP, METRICS_VERSION, "nodes", _request_timeout=self._interval)
+            pod_metrics = self._custom_api.list_cluster_custom_object(
+                METRICS_GROUP, METRICS_VERSION, "pods", _request_timeout=self._interval)
+        except ApiException as e:
+            # 404 means metrics-server is not installed; counts are still served
+            logger.warning(f"metrics.k8s.io unavailable: {e.status} {e.reason}")
+            self._usage = {"metrics_available": False}
+            self.record({}, {})
+            return
+
+        allocatable = {node["name"]: node for node in self._nodes.list()}
+        cpu_used = memory_used = 0.0
+        nodes: Dict[str, Dict[str, Optional[float]]] = {}
+        for item in node_metrics.get("items", []):
+            cpu = quantity(item["usage"].get("cpu"))
+            memory = quantity(item["usage"].get("memory"))
+            cpu_used += cpu
+            memory_used += memory
+            node = allocatable.get(item["metadata"]["name"], {})
+            nodes[item["metadata"]["name"]] = {
+                "cpu": 100 * cpu / node["cpu_allocatable"] if node.get("cpu_allocatable") else None,
+                "memory": 100 * memory / node["memory_allocatable"] if node.get("memory_allocatable") else None
+            }
+        cpu_allocatable = sum(node.get("cpu_allocatable", 0.0) for node in allocatable.values())
+        memory_allocatable = sum(node.get("memory_allocatable", 0.0) for node in allocatable.values())
+
+        namespaces: Dict[str, Dict[str, float]] = {}
+        for pod in pod_metrics.get("items", []):
+            usage = namespaces.setdefault(pod["metadata"]["namespace"], {"cpu": 0.0, "memory": 0.0})
+            for container in pod.get("containers", []):
+                usage["cpu"] += quantity(container["usage"].get("cpu"))
+                usage["memory"] += quantity(container["usage"].get("memory"))
+
+        self._usage = {
+            "metrics_available": True,
+            "cpu_usage": round(100 * cpu_used / cpu_allocatable, 1) if cpu_allocatable else None,
+            "memory_usage": round(100 * memory_used / memory_allocatable, 1) if memory_allocatable else None,
+            "cpu_cores_used": round(cpu_used, 3),
+            "memory_bytes_used": int(memory_used),
+            "namespaces": namespaces,
+            "sampled_at": datetime.utcnow().isoformat()
+        }
+        self.record(namespaces, nodes)
+
+    def record(self, namespaces: Dict[str, Dict[str, float]], nodes: Dict[str, Dict[str, Optional[float]]]):
+        """Append the current sample to the time-series store"""
+        now = time.time()
+        snapshot = self.snapshot()
+        for name, value in [
+            ("cpu_usage", snapshot["cpu_usage"]),
+            ("memory_usage", snapshot["memory_usage"]),
+            ("cpu_cores_used", self._usage.get("cpu_cores_used")),
+            ("memory_bytes_used", self._usage.get("memory_bytes_used")),
+            ("nodes_ready", snapshot["nodes"]["ready"]),
+            ("pods_total", snapshot["pods"]["total"]),
+            ("pods_running", snapshot["pods"]["running"]),
+            ("pods_pending", snapshot["pods"]["pending"]),
+            ("pods_failed", snapshot["pods"]["failed"])
+        ]:
+            self.timeseries.record(name, value, now)
+        for namespace, usage in namespaces.items():
+            self.timeseries.record("namespace_cpu_cores", usage["cpu"], now, {"namespace": namespace})
+            self.timeseries.record("namespace_memory_bytes", usage["memory"], now, {"namespace": namespace})
+        for node, usage in nodes.items():
+            self.timeseries.record("node_cpu_usage", usage["cpu"], now, {"node": node})
+            self.timeseries.record("node_memory_usage", usage["memory"], now, {"node": node})
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current aggregates, in the shape of K8sService.get_cluster_metrics"""
+        phases = self.pod_phases.counts()
+        total_pods = self.pod_phases.total()
+        running = phases.get("Running", 0)
+        pending = phases.get("Pending", 0)
+        usage = self._usage
+        return {
+            "nodes": {
+                "total": self.node_status.total(),
+                "ready": self.node_status.counts().get("Ready", 0)
+            },
+            "pods": {
+                "total": total_pods,
+                "running": running,
+                "pending": pending,
+                "failed": phases.get("Failed", 0),
+                "phases": phases
+            },
+            "cpu_usage": usage.get("cpu_usage"),
+            "memory_usage": usage.get("memory_usage"),
+            "storage_usage": None,
+            "metrics_available": usage.get("metrics_available", False),
+            "sampled_at": usage.get("sampled_at"),
+            "timestamp": datetime.utcnow().isoformat()
+        }
@@ -0,0 +1,112 @@
+import json
+import logging
+from typing import Any, Callable, Dict, Optional
+
+try:
+    import orjson
+    loads = orjson.loads
+except ImportError:  # pragma: no cover - orjson is optional
+    loads = json.loads
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+def fetch_raw(list_func: Callable, *args, **kwargs) -> Dict[str, Any]:
+    """
+    Call a kubernetes client list method without model deserialization.
+
+    The response body is parsed straight into dicts (with orjson when it is
+    installed), skipping the V1* object graph the client would otherwise
+    build for every item.
+    """
+    response = list_func(*args, _preload_content=False, **kwargs)
+    try:
+        return loads(response.data)
+    finally:
+        response.release_conn()
+
+def _timestamp(value: Optional[str]) -> Optional[str]:
+    # Match datetime.isoformat() on the parsed model so both paths agree
+    if not value:
+        return None
+    if value.endswith("Z"):
+        return value[:-1] + "+00:00"
+    return value
+
+def raw_namespace_to_dict(ns: Dict[str, Any]) -> Dict[str, Any]:
+    metadata = ns.get("metadata", {})
+    return {
+        "name": metadata.get("name"),
+        "status": ns.get("status", {}).get("phase"),
+        "created": _timestamp(metadata.get("creationTimestamp")),
+        "labels": metadata.get("labels") or {}
+    }
+
+def raw_pod_to_dict(pod: Dict[str, Any]) -> Dict[str, Any]:
+    metadata = pod.get("metadata", {})
+    spec = pod.get("spec", {})
+    status = pod.get("status", {})
+    container_statuses = status.get("containerStatuses") or []
+    return {
+        "name": metadata.get("name"),
+        "namespace": metadata.get("namespace"),
+        "status": status.get("phase"),
+        "node": spec.get("nodeName"),
+        "created": _timestamp(metadata.get("creationTimestamp")),
+        "ready": sum(1 for c in container_statuses if c.get("ready")),
+        "total_containers": len(spec.get("containers") or []),
+        "containers": [c.get("name") for c in spec.get("containers") or []],
+        "restarts": sum(c.get("restartCount", 0) for c in container_statuses),
+        "labels": metadata.get("labels") or {}
+    }
+
+def raw_service_to_dict(svc: Dict[str, Any]) -> Dict[str, Any]:
+    metadata = svc.get("metadata", {})
+    spec = svc.get("spec", {})
+    return {
+        "name": metadata.get("name"),
+        "namespace": metadata.get("namespace"),
+        "type": spec.get("type"),
+        "cluster_ip": spec.get("clusterIP"),
+        "external_ips": spec.get("externalIPs") or [],
+        "ports": [
+            {
+                "port": port.get("port"),
+                "target_port": str(port.get("targetPort")),
+                "protocol": port.get("protocol")
+            }
+            for port in (spec.get("ports") or [])
+        ],
+        "selector": spec.get("selector") or {},
+        "created": _timestamp(metadata.get("creationTimestamp"))
+    }
+
+def raw_deployment_to_dict(dep: Dict[str, Any]) -> Dict[str, Any]:
+    metadata = dep.get("metadata", {})
+    spec = dep.get("spec", {})
+    status = dep.get("status", {})
+    strategy = spec.get("strategy")
+    return {
+        "name": metadata.get("name"),
+        "namespace": metadata.get("namespace"),
+        "replicas": spec.get("replicas"),
+        "ready_replicas": status.get("readyReplicas") or 0,
+        "available_replicas": status.get("availableReplicas") or 0,
+        "updated_replicas": status.get("updatedReplicas") or 0,
+        "strategy": strategy.get("type") if strategy else "RollingUpdate",
+        "created": _timestamp(metadata.get("creationTimestamp")),
+        "labels": metadata.get("labels") or {}
+    }
+
+def list_projected(list_func: Callable, project: Callable[[Dict[str, Any]], Dict[str, Any]], *args, **kwargs) -> Dict[str, Any]:
+    """
+    Fetch a list through the raw path and project each item.
+    Returns {"items": [...], "continue": token, "resource_version": rv}.
+    """
+    body = fetch_raw(list_func, *args, **kwargs)
+    metadata = body.get("metadata") or {}
+    return {
+        "items": [project(item) for item in body.get("items") or []],
+        "continue": metadata.get("continue") or None,
+        "resource_version": metadata.get("resourceVersion")
+    }
@@ -0,0 +1,130 @@
+import re
+from typing import Any, Callable, Dict, List, Optional
+
+# Field selector paths that can be evaluated against the cached item dicts
+FIELD_PATHS = {
+    "metadata.name": "name",
+    "metadata.namespace": "namespace",
+    "status.phase": "status",
+    "spec.nodeName": "node"
+}
+
+_SET_REQUIREMENT = re.compile(r"^([^\s!=]+)\s+(in|notin)\s+\((.*)\)$")
+
+class SelectorError(ValueError):
+    """Raised for a malformed label or field selector"""
+
+class UnsupportedSelector(Exception):
+    """Raised when a selector cannot be evaluated in memory and must go to the apiserver"""
+
+def _split_requirements(selector: str) -> List[str]:
+    """Split on commas that are not inside an in/notin value list"""
+    parts, depth, current = [], 0, []
+    for char in selector:
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+            if depth < 0:
+                raise SelectorError(f"Unbalanced parenthesis in selector: {selector}")
+        if char == "," and depth == 0:
+            parts.append("".join(current).strip())
+            current = []
+        else:
+            current.append(char)
+    if depth != 0:
+        raise SelectorError(f"Unbalanced parenthesis in selector: {selector}")
+    parts.append("".join(current).strip())
+    return [part for part in parts if part]
+
+def parse_label_selector(selector: str) -> Callable[[Dict[str, str]], bool]:
+    """
+    Compile a Kubernetes label selector into a predicate over a labels dict.
+    Supports =, ==, !=, in, notin, key existence and !key.
+    """
+    checks = []
+    for requirement in _split_requirements(selector):
+        match = _SET_REQUIREMENT.match(requirement)
+        if match:
+            key, operator, values = match.groups()
+            allowed = {value.strip() for value in values.split(",") if value.strip()}
+            if operator == "in":
+                checks.append(lambda labels, k=key, a=allowed: labels.get(k) in a)
+            else:
+                checks.append(lambda labels, k=key, a=allowed: labels.get(k) not in a)
+        elif "!=" in requirement:
+            key, value = (part.strip() for part in requirement.split("!=", 1))
+            checks.append(lambda labels, k=key, v=value: labels.get(k) != v)
+        elif "=" in requirement:
+            key, value = (part.strip() for part in requirement.replace("==", "=", 1).split("=", 1))
+            checks.append(lambda labels, k=key, v=value: labels.get(k) == v)
+        elif requirement.startswith("!"):
+            key = requirement[1:].strip()
+            checks.append(lambda labels, k=key: k not in labels)
+        elif re.match(r"^[^\s()]+$", requirement):
+            checks.append(lambda labels, k=requirement: k in labels)
+        else:
+            raise SelectorError(f"Invalid label selector requirement: {requirement}")
+    return lambda labels: all(check(labels) for check in checks)
+
+def parse_field_selector(selector: str, field_paths: Dict[str, str] = FIELD_PATHS) -> Callable[[Dict[str, Any]], bool]:
+    """
+    Compile a field selector into a predicate over a cached item dict.
+    Raises UnsupportedSelector for fields the cached dicts do not carry.
+    """
+    checks = []
+    for requirement in _split_requirements(selector):
+        negate = "!=" in requirement
+        separator = "!=" if negate else ("==" if "==" in requirement else "=")
+        if separator not in requirement:
+            raise SelectorError(f"Invalid field selector requirement: {requirement}")
+        path, value = (part.strip() for part in requirement.split(separator, 1))
+        if path not in field_paths:
+            raise UnsupportedSelector(path)
+        key = field_paths[path]
+        if negate:
+            checks.append(lambda item, k=key, v=value: (item.get(k) or "") != v)
+        else:
+            checks.append(lambda item, k=key, v=value: (item.get(k) or "") == v)
+    return lambda item: all(check(item) for check in checks)
+
+def validate_selectors(label_selector: Optional[str] = None, field_selector: Optional[str] = None):
+    """
+    Raise SelectorError for a malformed selector before it reaches the
+    apiserver or the cache. Fields the cache cannot evaluate are left for
+    the apiserver to judge.
+    """
+    if label_selector:
+        parse_label_selector(label_selector)
+    if field_selector:
+        try:
+            parse_field_selector(field_selector)
+        except UnsupportedSelector:
+            pass
+
+def selector_predicate(
+    label_selector: Optional[str] = None,
+    field_selector: Optional[str] = None
+) -> Optional[Callable[[Dict[str, Any]], bool]]:
+    """
+    Combine label and field selectors into one predicate over cached item
+    dicts, or None when there is nothing to filter
+    """
+    checks = []
+    if label_selector:
+        match_labels = parse_label_selector(label_selector)
+        checks.append(lambda item: match_labels(item.get("labels") or {}))
+    if field_selector:
+        checks.append(parse_field_selector(field_selector))
+    if not checks:
+        return None
+    return lambda item: all(check(item) for check in checks)
+
+def selector_kwargs(label_selector: Optional[str] = None, field_selector: Optional[str] = None) -> Dict[str, str]:
+    """Keyword arguments forwarding selectors to a kubernetes client list call"""
+    kwargs = {}
+    if label_selector:
+        kwargs["label_selector"] = label_selector
+    if field_selector:
+        kwargs["field_selector"] = field_selector
+    return kwargs
@@ -0,0 +1,91 @@
+import asyncio
+import os
+import time
+import logging
+from collections import deque
+from typing import AsyncIterator, Deque, Dict, List, Optional, Tuple
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Events kept for Last-Event-ID resume; an older id gets the current state instead
+SSE_REPLAY_EVENTS = int(os.getenv("K8S_SSE_REPLAY_EVENTS", "256"))
+# Comment lines sent on an idle stream so proxies do not time it out
+SSE_KEEPALIVE_SECONDS = float(os.getenv("K8S_SSE_KEEPALIVE_SECONDS", "15"))
+# Reconnect delay suggested to EventSource clients
+SSE_RETRY_MILLISECONDS = 3000
+
+Event = Tuple[int, str, str]
+
+def format_event(event_id: int, event: str, data: str) -> str:
+    """One text/event-stream message; data may span lines"""
+    lines = "".join(f"data: {line}\n" for line in data.split("\n"))
+    return f"id: {event_id}\nevent: {event}\n{lines}\n"
+
+def parse_event_id(value: Optional[str]) -> Optional[int]:
+    try:
+        return int(value) if value else None
+    except ValueError:
+        return None
+
+class EventChannel:
+    """
+    Server-sent event stream of state changes, e.g. dashboard stats.
+
+    publish(event, data) records data as the new state of event when it
+    changed. A client resuming with Last-Event-ID is replayed the events it
+    missed while they are still buffered, and otherwise (or on first
+    connect) gets the current state of every event. Ids are millisecond
+    timestamps, so an id issued by one worker is also a usable resume point
+    on another.
+    """
+    def __init__(self, capacity: int = SSE_REPLAY_EVENTS, keepalive_seconds: float = SSE_KEEPALIVE_SECONDS):
+        self.keepalive_seconds = keepalive_seconds
+        self._events: Deque[Event] = deque(maxlen=capacity)
+        self._latest: Dict[str, Event] = {}
+        self._evicted = 0
+        self._last_id = 0
+        self._changed = asyncio.Event()
+
+    @property
+    def last_id(self) -> int:
+        return self._last_id
+
+    def publish(self, event: str, data: str) -> Optional[int]:
+        """Record a change; returns its id, or None when data is unchanged"""
+        latest = self._latest.get(event)
+        if latest is not None and latest[2] == data:
+            return None
+        self._last_id = max(self._last_id + 1, int(time.time() * 1000))
+        if len(self._events) == self._events.maxlen:
+            self._evicted = self._events[0][0]
+        entry = (self._last_id, event, data)
+        self._events.append(entry)
+        self._latest[event] = entry
+        # Wake every waiting stream; later waits use a fresh event
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+        return self._last_id
+
+    def since(self, last_event_id: Optional[int]) -> List[Event]:
+        """Events after last_event_id, or the current state when they are not all buffered"""
+        # An id newer than any here was issued by another worker
+        if last_event_id is not None and self._evicted <= last_event_id <= self._last_id:
+            return [entry for entry in self._events if entry[0] > last_event_id]
+        return sorted(self._latest.values())
+
+    async def stream(self, last_event_id: Optional[int] = None) -> AsyncIterator[str]:
+        """text/event-stream body; runs until the client disconnects"""
+        yield f"retry: {SSE_RETRY_MILLISECONDS}\n\n"
+        cursor = last_event_id
+        while True:
+            changed = self._changed
+            for event_id, event, data in self.since(cursor):
+                yield format_event(event_id, event, data)
+                cursor = event_id
+            if cursor is None:
+                cursor = self._last_id
+            try:
+                await asyncio.wait_for(changed.wait(), self.keepalive_seconds)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
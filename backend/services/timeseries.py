@@ -0,0 +1,313 @@
+import numpy as np
+import os
+import time
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Raw samples kept per series; at the default 30s collection interval this is 24h
+RAW_CAPACITY = int(os.getenv("K8S_TS_RAW_CAPACITY", "2880"))
+# (name, step seconds, buckets kept): 1m for a day, 5m for a week, 1h for 30 days
+ROLLUPS: List[Tuple[str, int, int]] = [
+    ("1m", 60, 1440),
+    ("5m", 300, 2016),
+    ("1h", 3600, 720)
+]
+# Upper bound on series per store, so a label explosion cannot grow memory
+# without limit; with the defaults above one series takes about 210 KB
+MAX_SERIES = int(os.getenv("K8S_TS_MAX_SERIES", "1000"))
+
+AGGREGATIONS = ("avg", "min", "max", "sum", "count")
+
+SeriesKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+def series_key(name: str, labels: Optional[Dict[str, str]] = None) -> SeriesKey:
+    return name, tuple(sorted((labels or {}).items()))
+
+def _ordered(head: int, size: int, capacity: int) -> np.ndarray:
+    """Slot indices of a ring buffer from oldest to newest"""
+    if size < capacity:
+        return np.arange(size)
+    return (np.arange(capacity) + head) % capacity
+
+class RingBuffer:
+    """Fixed-capacity (timestamp, value) ring over two preallocated float64 arrays"""
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.timestamps = np.empty(capacity, dtype=np.float64)
+        self.values = np.empty(capacity, dtype=np.float64)
+        self.size = 0
+        self.head = 0
+
+    def append(self, timestamp: float, value: float):
+        self.timestamps[self.head] = timestamp
+        self.values[self.head] = value
+        self.head = (self.head + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def last_timestamp(self) -> Optional[float]:
+        return float(self.timestamps[self.head - 1]) if self.size else None
+
+    def covers(self, start: float) -> bool:
+        """Whether every sample since start is still retained"""
+        return self.size < self.capacity or self.timestamps[self.head] <= start
+
+    def range(self, start: float, end: float) -> Tuple[np.ndarray, np.ndarray]:
+        """Samples with start <= timestamp < end, oldest first"""
+        order = _ordered(self.head, self.size, self.capacity)
+        timestamps = self.timestamps[order]
+        lo, hi = np.searchsorted(timestamps, [start, end])
+        return timestamps[lo:hi], self.values[order[lo:hi]]
+
+class Rollup:
+    """
+    Fixed-step buckets holding min, max, sum and count.
+    The newest bucket is updated in place until a sample for a later step arrives.
+    """
+    def __init__(self, step: int, capacity: int):
+        self.step = step
+        self.capacity = capacity
+        self.starts = np.empty(capacity, dtype=np.float64)
+        self.min = np.empty(capacity, dtype=np.float64)
+        self.max = np.empty(capacity, dtype=np.float64)
+        self.sum = np.empty(capacity, dtype=np.float64)
+        self.count = np.empty(capacity, dtype=np.float64)
+        self.size = 0
+        self.head = 0
+
+    def add(self, timestamp: float, value: float):
+        bucket = timestamp - timestamp % self.step
+        last = self.head - 1
+        if not self.size or self.starts[last] < bucket:
+            last = self.head
+            self.starts[last] = bucket
+            self.min[last], self.max[last], self.sum[last], self.count[last] = value, value, 0.0, 0.0
+            self.head = (self.head + 1) % self.capacity
+            self.size = min(self.size + 1, self.capacity)
+        elif self.starts[last] > bucket:
+            return
+        self.min[last] = min(self.min[last], value)
+        self.max[last] = max(self.max[last], value)
+        self.sum[last] += value
+        self.count[last] += 1
+
+    def covers(self, start: float) -> bool:
+        """Whether the bucket holding start, and every later one, is still retained"""
+        if self.size < self.capacity:
+            return True
+        return self.starts[self.head] <= start - start % self.step
+
+    def range(self, start: float, end: float) -> Dict[str, np.ndarray]:
+        """Buckets starting in [start, end), oldest first"""
+        order = _ordered(self.head, self.size, self.capacity)
+        starts = self.starts[order]
+        lo, hi = np.searchsorted(starts, [start, end])
+        index = order[lo:hi]
+        return {
+            "timestamps": starts[lo:hi],
+            "min": self.min[index],
+            "max": self.max[index],
+            "sum": self.sum[index],
+            "count": self.count[index]
+        }
+
+class Series:
+    """Raw samples plus their 1m/5m/1h rollups"""
+    def __init__(self, raw_capacity: int = RAW_CAPACITY, rollups: List[Tuple[str, int, int]] = ROLLUPS):
+        self.raw = RingBuffer(raw_capacity)
+        self.rollups = {name: Rollup(step, capacity) for name, step, capacity in rollups}
+
+    def add(self, timestamp: float, value: float):
+        last = self.raw.last_timestamp()
+        if last is not None and timestamp < last:
+            # Buffers are kept sorted so range lookups can binary search
+            return
+        self.raw.append(timestamp, value)
+        for rollup in self.rollups.values():
+            rollup.add(timestamp, value)
+
+    def resolution_for(self, step: Optional[int], start: Optional[float] = None) -> Optional[Rollup]:
+        """
+        Rollup to serve a query stepping from start, or None for raw samples.
+        Prefers the coarsest rollup whose step divides the query step and that
+        still retains start; coarser rollups are cheaper to scan. When none
+        does, raw samples if they reach back to start, else the finest rollup
+        that does, whose buckets are then sparser than the query step.
+        Without start the coarsest rollup whose step divides the query step.
+        """
+        if not step:
+            return None
+        rollups = sorted(self.rollups.values(), key=lambda rollup: rollup.step)
+        divisible = [rollup for rollup in rollups if step % rollup.step == 0]
+        if start is None:
+            return divisible[-1] if divisible else None
+        covering = [rollup for rollup in divisible if rollup.covers(start)]
+        if covering:
+            return covering[-1]
+        if self.raw.covers(start):
+            return None
+        coarser = [rollup for rollup in rollups if rollup.covers(start)]
+        if coarser:
+            return coarser[0]
+        # Nothing reaches back to start, so every rollup has wrapped; use the
+        # one retaining the oldest bucket
+        return min(rollups, key=lambda rollup: rollup.starts[rollup.head]) if rollups else None
+
+def align(start: float, end: float, step: int) -> np.ndarray:
+    """Step-aligned bucket start times covering [start, end)"""
+    first = start - start % step
+    return np.arange(first, end, step, dtype=np.float64)
+
+def rebucket(
+    timestamps: np.ndarray,
+    mins: np.ndarray,
+    maxs: np.ndarray,
+    sums: np.ndarray,
+    counts: np.ndarray,
+    start: float,
+    end: float,
+    step: int,
+    agg: str = "avg"
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Combine samples or finer buckets into step-aligned buckets; empty buckets are NaN"""
+    grid = align(start, end, step)
+    slots = ((timestamps - grid[0]) // step).astype(np.int64) if len(grid) else np.empty(0, np.int64)
+    keep = (slots >= 0) & (slots < len(grid))
+    slots = slots[keep]
+    total = np.bincount(slots, weights=sums[keep], minlength=len(grid))
+    count = np.bincount(slots, weights=counts[keep], minlength=len(grid))
+    if agg == "min":
+        values = np.full(len(grid), np.inf)
+        np.minimum.at(values, slots, mins[keep])
+    elif agg == "max":
+        values = np.full(len(grid), -np.inf)
+        np.maximum.at(values, slots, maxs[keep])
+    elif agg == "sum":
+        values = total
+    elif agg == "count":
+        values = count
+    else:
+        with np.errstate(invalid="ignore", divide="ignore"):
+            values = total / count
+    values = np.where(count > 0, values, np.nan)
+    return grid, values
+
+class TimeSeriesStore:
+    """
+    In-process metric history for one cluster.
+
+    Each series keeps a raw ring buffer and 1m/5m/1h rollups, all backed by
+    preallocated NumPy arrays, so memory per series is fixed at creation.
+    Range queries binary search the sorted buffers and re-bucket with
+    vectorised NumPy, without Python loops over the points.
+    """
+    def __init__(self, max_series: int = MAX_SERIES, raw_capacity: int = RAW_CAPACITY):
+        self.max_series = max_series
+        self._raw_capacity = raw_capacity
+        self._series: Dict[SeriesKey, Series] = {}
+        self._changed: set = set()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._series)
+
+    def record(self, name: str, value: Optional[float], timestamp: Optional[float] = None, labels: Optional[Dict[str, str]] = None):
+        """Append one sample; None values are skipped"""
+        if value is None:
+            return
+        key = series_key(name, labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                if len(self._series) >= self.max_series:
+                    logger.warning(f"Time-series limit {self.max_series} reached, dropping {name}")
+                    return
+                series = self._series[key] = Series(self._raw_capacity)
+            series.add(timestamp if timestamp is not None else time.time(), float(value))
+            self._changed.add(key)
+
+    def drain_changed(self) -> List[SeriesKey]:
+        """Series keys recorded since the last call, for incremental consumers"""
+        with self._lock:
+            changed, self._changed = list(self._changed), set()
+        return changed
+
+    def latest(self, name: str, labels: Optional[Dict[str, str]] = None) -> Optional[Tuple[float, float]]:
+        """Newest (timestamp, value) of a series, or None if it has no samples"""
+        return self.latest_by_key(series_key(name, labels))
+
+    def latest_by_key(self, key: SeriesKey) -> Optional[Tuple[float, float]]:
+        with self._lock:
+            series = self._series.get(key)
+            if series is None or not series.raw.size:
+                return None
+            raw = series.raw
+            return float(raw.timestamps[raw.head - 1]), float(raw.values[raw.head - 1])
+
+    def series(self, name: str) -> List[Dict[str, str]]:
+        """Label sets recorded for a metric name"""
+        with self._lock:
+            return [dict(labels) for series_name, labels in self._series if series_name == name]
+
+    def query_matrix(
+        self,
+        name: str,
+        start: float,
+        end: float,
+        step: int,
+        agg: str = "avg"
+    ) -> Tuple[np.ndarray, List[Dict[str, str]], np.ndarray]:
+        """
+        Query every label set of a metric onto one step-aligned grid.
+        Returns (timestamps, labels, values) with values shaped (series, steps).
+        """
+        label_sets = self.series(name)
+        grid = align(start, end, step)
+        matrix = np.full((len(label_sets), len(grid)), np.nan)
+        for row, labels in enumerate(label_sets):
+            matrix[row] = self.query(name, start, end, step, labels, agg)[1]
+        return grid, label_sets, matrix
+
+    def query(
+        self,
+        name: str,
+        start: float,
+        end: float,
+        step: Optional[int] = None,
+        labels: Optional[Dict[str, str]] = None,
+        agg: str = "avg"
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Return (timestamps, values) for start <= t < end.
+        Without a step the raw samples are returned. With a step the result
+        is aligned to multiples of step, served from the coarsest rollup that
+        fits and still covers start, and buckets without data are NaN.
+        """
+        if agg not in AGGREGATIONS:
+            raise ValueError(f"Unsupported aggregation: {agg}")
+        with self._lock:
+            series = self._series.get(series_key(name, labels))
+            if series is None:
+                if step:
+                    grid = align(start, end, step)
+                    return grid, np.full(len(grid), np.nan)
+                return np.empty(0), np.empty(0)
+            rollup = series.resolution_for(step, start)
+            if rollup is None:
+                timestamps, values = series.raw.range(start, end)
+                timestamps, values = timestamps.copy(), values.copy()
+                buckets = None
+            else:
+                buckets = rollup.range(start - start % rollup.step, end)
+        if not step:
+            return timestamps, values
+        if buckets is None:
+            ones = np.ones(len(values))
+            return rebucket(timestamps, values, values, values, ones, start, end, step, agg)
+        return rebucket(
+            buckets["timestamps"], buckets["min"], buckets["max"], buckets["sum"], buckets["count"],
+            start, end, step, agg
+        )
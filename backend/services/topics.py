@@ -0,0 +1,428 @@
+import abc
+import asyncio
+import functools
+import json
+import os
+import time
+import uuid
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from services.alerts import INACTIVE
+from services.broker import Broker, InMemoryBroker
+from services.informer import RESYNC
+from services.ws_hub import Connection, Payload, WebSocketHub
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Changes are coalesced per object and published at most this often
+TOPIC_FLUSH_SECONDS = float(os.getenv("K8S_TOPIC_FLUSH_SECONDS", "0.5"))
+# How long a first subscription waits for the kind's initial LIST, or for another worker's snapshot
+TOPIC_SYNC_TIMEOUT_SECONDS = 10
+# Lease of the worker watching a cluster's kind; another takes over this long after it dies
+TOPIC_LEASE_SECONDS = float(os.getenv("K8S_TOPIC_LEASE_SECONDS", "15"))
+
+INFORMER_KINDS = ("namespaces", "pods", "services", "deployments", "nodes")
+TOPIC_KINDS = INFORMER_KINDS + ("alerts",)
+
+_MISSING = object()
+
+class TopicError(ValueError):
+    """A topic that cannot be subscribed to"""
+
+def parse_topic(topic: str) -> Tuple[str, str, Optional[str]]:
+    """Split "<cluster>/<kind>[/<namespace>]" into its parts"""
+    parts = topic.split("/")
+    if len(parts) not in (2, 3) or not all(parts):
+        raise TopicError(f"Invalid topic {topic!r}, expected <cluster>/<kind>[/<namespace>]")
+    if parts[1] not in TOPIC_KINDS:
+        raise TopicError(f"Unknown kind {parts[1]!r}, expected one of {', '.join(TOPIC_KINDS)}")
+    if len(parts) == 3 and parts[1] in ("namespaces", "nodes"):
+        raise TopicError(f"{parts[1]} are not namespaced")
+    return parts[0], parts[1], parts[2] if len(parts) == 3 else None
+
+def merge_patch(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    """RFC 7386 merge patch turning old into new; removed fields are null"""
+    patch = {}
+    for field, value in new.items():
+        previous = old.get(field, _MISSING)
+        if previous == value:
+            continue
+        if isinstance(previous, dict) and isinstance(value, dict):
+            patch[field] = merge_patch(previous, value)
+        else:
+            patch[field] = value
+    for field in old:
+        if field not in new:
+            patch[field] = None
+    return patch
+
+class _Source(abc.ABC):
+    """
+    Changes of one kind in one cluster, recorded from a watch thread and
+    drained by the feed. Only the first old and the latest new version of
+    an object are kept between flushes, so a pod updated ten times in a
+    flush interval costs one change.
+    """
+    def __init__(self, service):
+        self.service = service
+        self._pending: Dict[str, List[Any]] = {}
+        self._resync = False
+        self._lock = threading.Lock()
+
+    def record(self, key: str, namespace: Optional[str], old: Optional[Dict[str, Any]], new: Optional[Dict[str, Any]]):
+        with self._lock:
+            if self._resync:
+                # The snapshot sent at the next flush covers it
+                return
+            entry = self._pending.get(key)
+            if entry is None:
+                self._pending[key] = [namespace, old, new]
+            else:
+                entry[2] = new
+
+    def resync(self):
+        with self._lock:
+            self._resync = True
+            self._pending.clear()
+
+    def drain(self) -> Tuple[bool, List[Dict[str, Any]]]:
+        """Whether a new snapshot is due, and the changes since the last drain"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            resync, self._resync = self._resync, False
+        changes = []
+        for key, (namespace, old, new) in pending.items():
+            if old is None and new is None:
+                continue
+            if old is None:
+                change = {"op": "added", "key": key, "object": new}
+            elif new is None:
+                change = {"op": "deleted", "key": key}
+            else:
+                patch = merge_patch(old, new)
+                if not patch:
+                    # e.g. only the resourceVersion changed, which is not served
+                    continue
+                change = {"op": "modified", "key": key, "patch": patch}
+            change["namespace"] = namespace
+            changes.append(change)
+        return resync, changes
+
+    @abc.abstractmethod
+    def snapshot(self, namespace: Optional[str]) -> List[Dict[str, Any]]:
+        """Current objects, in one namespace or all of them"""
+
+    @abc.abstractmethod
+    def close(self):
+        """Stop receiving changes from the watched informer or engine"""
+
+class _InformerSource(_Source):
+    def __init__(self, service, informer):
+        super().__init__(service)
+        self.informer = informer
+        self._replaying = True
+        informer.add_handler(self._handle)
+        # add_handler replays the store; subscribers get that as their snapshot
+        self._replaying = False
+
+    def _handle(self, event_type: str, old: Optional[Dict[str, Any]], new: Optional[Dict[str, Any]]):
+        if self._replaying:
+            return
+        if event_type == RESYNC:
+            self.resync()
+            return
+        item = new or old
+        namespace = item.get("namespace")
+        self.record(f"{namespace}/{item['name']}" if namespace else item["name"], namespace, old, new)
+
+    def snapshot(self, namespace: Optional[str]) -> List[Dict[str, Any]]:
+        return self.informer.list(namespace)
+
+    def close(self):
+        self.informer.remove_handler(self._handle)
+
+class _AlertSource(_Source):
+    def __init__(self, service, manager):
+        super().__init__(service)
+        self._alerts: Dict[str, Dict[str, Any]] = {}
+        self.engine = manager.engine
+        with self._lock:
+            self.engine.add_listener(self._handle)
+            for alert in self.engine.alerts():
+                if alert.state != INACTIVE:
+                    self._alerts[alert.fingerprint] = alert.to_dict()
+
+    def _handle(self, previous: str, alert):
+        new = alert.to_dict() if alert.state != INACTIVE else None
+        with self._lock:
+            old = self._alerts.pop(alert.fingerprint, None)
+            if new is not None:
+                self._alerts[alert.fingerprint] = new
+        self.record(alert.fingerprint, alert.labels.get("namespace"), old, new)
+
+    def snapshot(self, namespace: Optional[str]) -> List[Dict[str, Any]]:
+        with self._lock:
+            alerts = list(self._alerts.values())
+        return [a for a in alerts if namespace is None or a["labels"].get("namespace") == namespace]
+
+    def close(self):
+        self.engine.remove_listener(self._handle)
+
+class TopicFeed:
+    """
+    Serves topic subscriptions over a WebSocketHub from the clusters'
+    informers and alert engines.
+
+    A subscriber gets one snapshot of the topic, then deltas: added objects,
+    merge patches of modified ones and deleted keys. Deltas are coalesced
+    per object, built once per topic per flush and shared by every
+    subscriber, so the cost follows the churn rather than the cluster size
+    times the number of clients. Each topic's messages carry an increasing
+    seq; a client that sees a gap (its queue overflowed) resubscribes for a
+    fresh snapshot. Deltas may repeat changes already in the snapshot, so
+    they are applied as upserts.
+
+    Workers share changes through the broker. Each "<cluster>/<kind>" is
+    watched by the one worker holding its lease, which publishes the
+    changes on "changes:<cluster>/<kind>" and answers snapshot requests
+    from the others; every worker filters them down to the topics of its
+    own connections. When the lease holder dies, the next worker with
+    subscribers takes the lease over within lease_seconds and publishes a
+    resync, so no worker's subscribers miss the changes made in between.
+    """
+    def __init__(
+        self,
+        hub: WebSocketHub,
+        get_service: Callable,
+        broker: Optional[Broker] = None,
+        flush_seconds: float = TOPIC_FLUSH_SECONDS,
+        lease_seconds: float = TOPIC_LEASE_SECONDS
+    ):
+        self.hub = hub
+        self.broker = broker or InMemoryBroker()
+        self.flush_seconds = flush_seconds
+        self.lease_seconds = lease_seconds
+        self.worker_id = uuid.uuid4().hex
+        self._get_service = get_service
+        self._sources: Dict[str, _Source] = {}
+        self._leases: Dict[str, float] = {}
+        self._listening: Dict[str, Callable[[str], None]] = {}
+        self._replies: Dict[str, asyncio.Future] = {}
+        self._seq: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    async def start(self):
+        """Connect the broker, falling back to in-process delivery if it is unreachable"""
+        try:
+            await self.broker.start()
+        except Exception as e:
+            logger.warning(f"WebSocket broker unavailable, updates stay within this worker: {e}")
+            self.broker = InMemoryBroker()
+        await self.broker.subscribe(f"reply:{self.worker_id}", self._on_reply)
+
+    async def close(self):
+        for key in list(self._sources):
+            self._sources.pop(key).close()
+            await self.broker.release(f"watch:{key}")
+        await self.broker.close()
+
+    def _source(self, cluster_id: str, kind: str) -> _Source:
+        """The change source of a kind, watching it on first use; runs in a worker thread"""
+        service = self._get_service(cluster_id)
+        key = f"{cluster_id}/{kind}"
+        # A cluster client rebuilt after eviction has new informers
+        source = self._sources.get(key)
+        if source is not None and source.service is service:
+            return source
+        # Waiting for a first LIST happens outside the lock, so other topics are not held up
+        if kind == "alerts":
+            watched = service.alert_manager()
+        else:
+            watched = service.informer(kind, timeout=TOPIC_SYNC_TIMEOUT_SECONDS)
+        if watched is None:
+            raise TopicError(f"{kind} of cluster {cluster_id} are not available")
+        with self._lock:
+            source = self._sources.get(key)
+            if source is None or source.service is not service:
+                if source is not None:
+                    source.close()
+                source = _AlertSource(service, watched) if kind == "alerts" else _InformerSource(service, watched)
+                self._sources[key] = source
+            return source
+
+    async def _lead(self, key: str) -> Optional[_Source]:
+        """Renew or take the watch lease of key; the source when this worker holds it"""
+        now = time.monotonic()
+        if key in self._sources and now < self._leases.get(key, 0):
+            return self._sources[key]
+        if not await self.broker.acquire(f"watch:{key}", self.lease_seconds):
+            self._leases.pop(key, None)
+            source = self._sources.pop(key, None)
+            if source is not None:
+                logger.info(f"Lost the watch lease of {key}")
+                # Detached, so the informer stops feeding changes nobody drains
+                source.close()
+                await self.broker.unsubscribe(f"snapshot:{key}", self._on_snapshot_request)
+            return None
+        # Renewed at a third of its lifetime, so a slow flush does not let it lapse
+        self._leases[key] = now + self.lease_seconds / 3
+        previous = self._sources.get(key)
+        cluster_id, kind = key.split("/")
+        try:
+            # Resolving the client on every renewal keeps it in use, so the
+            # registry does not evict it as idle, and picks up a client that
+            # was rebuilt after an eviction anyway
+            source = await asyncio.to_thread(self._source, cluster_id, kind)
+        except Exception:
+            if previous is None:
+                self._leases.pop(key, None)
+                await self.broker.release(f"watch:{key}")
+            raise
+        if source is not previous:
+            # Changes between a previous holder's last flush, or the old
+            # client's last event, and now were never published, so every
+            # worker resnapshots from this watch
+            source.resync()
+            if previous is None:
+                await self.broker.subscribe(f"snapshot:{key}", self._on_snapshot_request)
+        return source
+
+    async def _snapshot(self, key: str, namespace: Optional[str]) -> List[Dict[str, Any]]:
+        """Current items of key, from the local watch or from the worker holding it"""
+        source = await self._lead(key)
+        if source is not None:
+            return await asyncio.to_thread(source.snapshot, namespace)
+        request_id = uuid.uuid4().hex
+        reply = asyncio.get_running_loop().create_future()
+        self._replies[request_id] = reply
+        try:
+            await self.broker.publish(f"snapshot:{key}", json.dumps({
+                "id": request_id, "key": key, "namespace": namespace, "reply": f"reply:{self.worker_id}"
+            }))
+            return await asyncio.wait_for(reply, TOPIC_SYNC_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            raise TopicError(f"No worker is serving {key}")
+        finally:
+            self._replies.pop(request_id, None)
+
+    def _on_snapshot_request(self, message: str):
+        request = json.loads(message)
+        source = self._sources.get(request["key"])
+        if source is not None:
+            asyncio.get_running_loop().create_task(self._answer(source, request))
+
+    async def _answer(self, source: _Source, request: Dict[str, Any]):
+        items = await asyncio.to_thread(source.snapshot, request["namespace"])
+        await self.broker.publish(request["reply"], json.dumps({"id": request["id"], "items": items}))
+
+    def _on_reply(self, message: str):
+        reply = json.loads(message)
+        future = self._replies.get(reply["id"])
+        if future is not None and not future.done():
+            future.set_result(reply["items"])
+
+    async def _listen(self, key: str):
+        if key not in self._listening:
+            callback = self._listening[key] = functools.partial(self._on_changes, key)
+            await self.broker.subscribe(f"changes:{key}", callback)
+
+    async def subscribe(self, connection: Connection, topic: str):
+        """Subscribe and send the topic's snapshot; raises TopicError"""
+        cluster_id, kind, namespace = parse_topic(topic)
+        key = f"{cluster_id}/{kind}"
+        if topic in connection.topics:
+            self.hub.unsubscribe(connection, topic)
+        await self._listen(key)
+        # Deltas published while the snapshot is built are held and sent after it
+        self.hub.subscribe(connection, topic, hold=True)
+        seq = self._seq.get(topic, 0)
+        try:
+            items = await self._snapshot(key, namespace)
+            # Snapshots can be megabytes; encode off the event loop
+            snapshot = Payload({"type": "snapshot", "topic": topic, "seq": seq, "items": items})
+            await asyncio.to_thread(snapshot.encode, connection.encoding)
+        except (TopicError, asyncio.CancelledError):
+            # A cancelled subscribe must not leave updates held for the topic
+            self.hub.unsubscribe(connection, topic)
+            raise
+        except Exception as e:
+            self.hub.unsubscribe(connection, topic)
+            raise TopicError(f"Cannot watch {topic}: {e}")
+        connection.release(topic, snapshot)
+
+    def unsubscribe(self, connection: Connection, topic: str):
+        self.hub.unsubscribe(connection, topic)
+
+    def _local_topics(self) -> Dict[str, List[Tuple[str, Optional[str]]]]:
+        topics: Dict[str, List[Tuple[str, Optional[str]]]] = {}
+        for topic in self.hub.topics():
+            cluster_id, kind, namespace = parse_topic(topic)
+            topics.setdefault(f"{cluster_id}/{kind}", []).append((topic, namespace))
+        return topics
+
+    def _on_changes(self, key: str, message: str):
+        """Deliver a published batch of changes to this worker's subscribers"""
+        batch = json.loads(message)
+        for topic, namespace in self._local_topics().get(key, []):
+            if batch["resync"]:
+                asyncio.get_running_loop().create_task(self._resnapshot(key, topic, namespace))
+                continue
+            changes = [c for c in batch["changes"] if namespace is None or c["namespace"] == namespace]
+            if changes:
+                # Encoded once per encoding in use, whatever the number of subscribers
+                self.hub.publish(topic, Payload({"type": "delta", "topic": topic, "seq": self._next_seq(topic), "changes": changes}))
+
+    async def _resnapshot(self, key: str, topic: str, namespace: Optional[str]):
+        """Send every subscriber of topic a new snapshot after the watch relisted"""
+        connections = self.hub.subscribers(topic)
+        for connection in connections:
+            self.hub.subscribe(connection, topic, hold=True)
+        seq = self._seq.get(topic, 0)
+        try:
+            items = await self._snapshot(key, namespace)
+        except Exception as e:
+            logger.warning(f"Snapshot of {topic} failed: {e}")
+            for connection in connections:
+                self.hub.unsubscribe(connection, topic)
+                connection.send(Payload({"type": "error", "topic": topic, "message": str(e)}))
+            return
+        snapshot = Payload({"type": "snapshot", "topic": topic, "seq": seq, "items": items})
+        for encoding in {connection.encoding for connection in connections}:
+            await asyncio.to_thread(snapshot.encode, encoding)
+        for connection in connections:
+            connection.release(topic, snapshot)
+
+    def _next_seq(self, topic: str) -> int:
+        self._seq[topic] = self._seq.get(topic, 0) + 1
+        return self._seq[topic]
+
+    async def flush(self):
+        """Publish the changes of the kinds this worker watches, and keep its leases"""
+        local = self._local_topics()
+        for key in set(local) | set(self._sources):
+            try:
+                source = await self._lead(key)
+            except Exception as e:
+                logger.warning(f"Cannot watch {key}: {e}")
+                continue
+            if source is None:
+                continue
+            resync, changes = source.drain()
+            if resync or changes:
+                await self.broker.publish(f"changes:{key}", json.dumps({"resync": resync, "changes": changes}))
+        for key in [k for k in self._listening if k not in local]:
+            await self.broker.unsubscribe(f"changes:{key}", self._listening.pop(key))
+        for topic in [t for t in self._seq if t not in self.hub.topics()]:
+            del self._seq[topic]
+
+    async def run(self):
+        """Flush periodically until cancelled"""
+        while True:
+            await asyncio.sleep(self.flush_seconds)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.warning(f"Topic flush failed: {e}")
@@ -0,0 +1,136 @@
+import numpy as np
+import warnings
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+# Query operations over time-series arrays.
+#
+# Every function takes values shaped (steps,) for one series or
+# (series, steps) for many, and works along the last axis, so a whole
+# cluster (or fleet) of series is processed in one NumPy call. Missing
+# samples are NaN and are skipped rather than treated as zero.
+
+def _edge(values: np.ndarray, newest: bool) -> np.ndarray:
+    """Newest (or oldest) non-missing value of each series"""
+    if not values.shape[-1]:
+        return np.full(values.shape[:-1], np.nan)
+    result = np.array(values[..., -1 if newest else 0], dtype=np.float64)
+    missing = np.isnan(result)
+    if missing.any():
+        # Only series with a gap at the edge need a scan
+        rows = values[missing] if values.ndim > 1 else values[None, :]
+        valid = ~np.isnan(rows)
+        index = rows.shape[-1] - 1 - np.argmax(valid[:, ::-1], axis=-1) if newest else np.argmax(valid, axis=-1)
+        found = np.where(valid.any(axis=-1), rows[np.arange(len(rows)), index], np.nan)
+        if values.ndim > 1:
+            result[missing] = found
+        else:
+            result = np.float64(found[0])
+    return result
+
+def last(values: np.ndarray) -> np.ndarray:
+    """Newest non-missing value of each series"""
+    return _edge(values, newest=True)
+
+def percentile(values: np.ndarray, q: float) -> np.ndarray:
+    """
+    q-th percentile (0-100) of each series, with linear interpolation.
+    Sorts once along the last axis (NaN sorts last) instead of using
+    np.nanpercentile, which falls back to a per-row loop.
+    """
+    if not values.shape[-1]:
+        return np.full(values.shape[:-1], np.nan)
+    ordered = np.sort(values, axis=-1)
+    count = (~np.isnan(ordered)).sum(axis=-1)
+    rank = (np.maximum(count, 1) - 1) * (q / 100.0)
+    lower = np.floor(rank).astype(np.int64)
+    upper = np.minimum(lower + 1, np.maximum(count, 1) - 1)
+    low = np.take_along_axis(ordered, lower[..., None], axis=-1)[..., 0]
+    high = np.take_along_axis(ordered, upper[..., None], axis=-1)[..., 0]
+    result = low + (high - low) * (rank - lower)
+    return np.where(count > 0, result, np.nan)
+
+def delta(values: np.ndarray) -> np.ndarray:
+    """Difference between the newest and oldest non-missing value of each series"""
+    return _edge(values, newest=True) - _edge(values, newest=False)
+
+def rate(timestamps: np.ndarray, values: np.ndarray, counter: bool = False) -> np.ndarray:
+    """
+    Per-second rate of change between consecutive points, one shorter than
+    the input. With counter, a decrease is treated as a counter reset and
+    the new value is taken as the increase since the reset.
+    """
+    increase = np.diff(values, axis=-1)
+    if counter:
+        increase = np.where(increase < 0, values[..., 1:], increase)
+    return increase / np.diff(timestamps)
+
+def moving_average(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Trailing mean over the last window points, ignoring missing values.
+    Positions whose window holds no sample are NaN.
+    """
+    window = max(1, window)
+    n = values.shape[-1]
+    present = ~np.isnan(values)
+    sums = np.cumsum(np.where(present, values, 0.0), axis=-1)
+    counts = np.cumsum(present, axis=-1)
+    # Subtract the running total from window points back, where there is one
+    window_sums = sums.copy()
+    window_counts = counts.copy()
+    if window < n:
+        window_sums[..., window:] -= sums[..., :n - window]
+        window_counts[..., window:] -= counts[..., :n - window]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(window_counts > 0, window_sums / window_counts, np.nan)
+
+def reduce(values: np.ndarray, by: str = "last") -> np.ndarray:
+    """Collapse each series to one number: last, avg, min, max, or pNN (e.g. p95)"""
+    if by == "last":
+        return last(values)
+    if by.startswith("p") and by[1:].isdigit():
+        return percentile(values, float(by[1:]))
+    reducers = {"avg": np.nanmean, "min": np.nanmin, "max": np.nanmax}
+    if by not in reducers:
+        raise ValueError(f"Unsupported reduction: {by}")
+    if not values.shape[-1]:
+        return np.full(values.shape[:-1], np.nan)
+    with warnings.catch_warnings():
+        # All-NaN series reduce to NaN, which is what we want
+        warnings.simplefilter("ignore", RuntimeWarning)
+        return reducers[by](values, axis=-1)
+
+def topk(values: np.ndarray, k: int, by: str = "last") -> np.ndarray:
+    """
+    Row indices of the k series with the highest reduced value, highest
+    first. Series with no data are ranked last.
+    """
+    scores = reduce(values, by) if values.ndim > 1 else values
+    scores = np.where(np.isnan(scores), -np.inf, scores)
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    candidates = np.argpartition(-scores, k - 1)[:k]
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+def round_or_none(value: float, digits: int = 2) -> Optional[float]:
+    """JSON-ready number: NaN becomes None"""
+    return None if np.isnan(value) else round(float(value), digits)
+
+def summarize(values: np.ndarray, digits: int = 2) -> Dict[str, Optional[float]]:
+    """current/average/min/max/p95 of a single series, JSON-ready"""
+    values = np.asarray(values, dtype=np.float64)
+    return {
+        "current": round_or_none(last(values), digits),
+        "average": round_or_none(reduce(values, "avg"), digits),
+        "min": round_or_none(reduce(values, "min"), digits),
+        "max": round_or_none(reduce(values, "max"), digits),
+        "p95": round_or_none(percentile(values, 95), digits)
+    }
+
+def points(timestamps: np.ndarray, values: np.ndarray, digits: int = 2) -> List[Dict[str, Any]]:
+    """Timestamp/value pairs in the shape the dashboard charts consume"""
+    return [
+        {"timestamp": datetime.utcfromtimestamp(ts).isoformat(), "value": round_or_none(value, digits)}
+        for ts, value in zip(timestamps.tolist(), values)
+    ]
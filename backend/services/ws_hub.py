@@ -0,0 +1,263 @@
+import asyncio
+import itertools
+import json
+import os
+import logging
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Set, Union
+
+from fastapi import WebSocket, status
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - msgpack is optional
+    msgpack = None
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Messages queued per connection before the overflow policy applies
+WS_QUEUE_MESSAGES = int(os.getenv("K8S_WS_QUEUE_MESSAGES", "256"))
+# "drop_oldest" discards the oldest queued message, "disconnect" closes the slow client
+WS_OVERFLOW_POLICY = os.getenv("K8S_WS_OVERFLOW_POLICY", "drop_oldest")
+# A send that does not complete in this time means the client is gone
+WS_SEND_TIMEOUT_SECONDS = float(os.getenv("K8S_WS_SEND_TIMEOUT_SECONDS", "10"))
+
+OVERFLOW_POLICIES = ("drop_oldest", "disconnect")
+# "json" is sent as text frames, "msgpack" as binary frames
+ENCODINGS = ("json", "msgpack")
+
+class Payload:
+    """
+    A message encoded at most once per encoding, however many connections
+    it is sent to. Large payloads can be encoded ahead, off the event loop.
+    """
+    __slots__ = ("data", "_encoded")
+
+    def __init__(self, data: Any):
+        self.data = data
+        self._encoded: Dict[str, Union[str, bytes]] = {}
+
+    def encode(self, encoding: str) -> Union[str, bytes]:
+        encoded = self._encoded.get(encoding)
+        if encoded is None:
+            if encoding == "msgpack":
+                encoded = msgpack.packb(self.data, use_bin_type=True)
+            else:
+                encoded = json.dumps(self.data)
+            self._encoded[encoding] = encoded
+        return encoded
+
+Message = Union[str, bytes, Payload]
+
+class Connection:
+    """
+    One WebSocket with its own bounded outbound queue, drained by a writer
+    task. Enqueueing never awaits, so a slow client only fills its own
+    queue and never delays the others.
+
+    A topic subscribed with hold=True buffers its published messages until
+    release() sends the topic's snapshot, so no update published while the
+    snapshot was being built is lost or overtakes it.
+    """
+    def __init__(
+        self,
+        hub: "WebSocketHub",
+        websocket: WebSocket,
+        max_queue: int,
+        policy: str,
+        send_timeout: float,
+        encoding: str = "json"
+    ):
+        if policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy {policy!r}, expected one of {', '.join(OVERFLOW_POLICIES)}")
+        if encoding not in ENCODINGS:
+            raise ValueError(f"Unknown encoding {encoding!r}, expected one of {', '.join(ENCODINGS)}")
+        if encoding == "msgpack" and msgpack is None:
+            raise ValueError("msgpack encoding is not available")
+        self.encoding = encoding
+        self.id = next(hub._ids)
+        self.websocket = websocket
+        self.max_queue = max_queue
+        self.policy = policy
+        self.send_timeout = send_timeout
+        self.closed = False
+        self.sent = 0
+        self.dropped = 0
+        self._hub = hub
+        self._queue: Deque[Message] = deque()
+        self._ready = asyncio.Event()
+        self._overflowed = False
+        self._writer: Optional[asyncio.Task] = None
+        self.topics: Set[str] = set()
+        self._held: Dict[str, Deque[Message]] = {}
+
+    def send(self, message: Message) -> bool:
+        """Queue a message; False if the connection is closed or was closed by overflow"""
+        if self.closed:
+            return False
+        if isinstance(message, Payload):
+            message = message.encode(self.encoding)
+        if len(self._queue) >= self.max_queue:
+            if self.policy == "disconnect":
+                logger.info(f"Disconnecting WebSocket {self.id}: {self.max_queue} messages queued")
+                self._overflowed = True
+                self._hub.disconnect(self)
+                return False
+            self._queue.popleft()
+            self.dropped += 1
+        self._queue.append(message)
+        self._ready.set()
+        return True
+
+    def publish(self, topic: str, message: Message) -> bool:
+        held = self._held.get(topic)
+        if held is None:
+            return self.send(message)
+        if self.closed:
+            return False
+        if isinstance(message, Payload):
+            message = message.encode(self.encoding)
+        # Leave room in the send queue for the snapshot released ahead of them
+        if len(held) >= max(self.max_queue - 1, 1):
+            held.popleft()
+            self.dropped += 1
+        held.append(message)
+        return True
+
+    def release(self, topic: str, snapshot: Message):
+        """Send a held topic's snapshot followed by the updates held since subscribing"""
+        held = self._held.pop(topic, ())
+        self.send(snapshot)
+        for message in held:
+            self.send(message)
+
+    @property
+    def queued(self) -> int:
+        return len(self._queue)
+
+    def start(self):
+        self._writer = asyncio.get_running_loop().create_task(self._write())
+
+    def close(self):
+        self.closed = True
+        self._queue.clear()
+        self._held.clear()
+        self._ready.set()
+
+    async def _send(self, message: Message):
+        if isinstance(message, bytes):
+            send = asyncio.ensure_future(self.websocket.send_bytes(message))
+        else:
+            send = asyncio.ensure_future(self.websocket.send_text(message))
+        # Not wait_for, which can swallow a cancellation that races the send completing
+        try:
+            done, _ = await asyncio.wait({send}, timeout=self.send_timeout)
+        except asyncio.CancelledError:
+            send.cancel()
+            raise
+        if not done:
+            send.cancel()
+            raise TimeoutError(f"send took longer than {self.send_timeout}s")
+        send.result()
+
+    async def _write(self):
+        try:
+            while True:
+                while not self._queue and not self.closed:
+                    self._ready.clear()
+                    await self._ready.wait()
+                if self.closed:
+                    break
+                await self._send(self._queue.popleft())
+                self.sent += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Timed out or the client went away mid-send
+            logger.info(f"WebSocket {self.id} send failed: {e!r}")
+        finally:
+            self._hub.disconnect(self)
+        if self._overflowed:
+            try:
+                await self.websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+            except Exception:
+                pass
+
+class WebSocketHub:
+    """
+    Registry of connected WebSockets. Broadcast is one non-blocking enqueue
+    per connection; the per-connection writer tasks do the sending, so
+    thousands of clients can stay connected to one worker.
+    """
+    def __init__(
+        self,
+        max_queue: int = WS_QUEUE_MESSAGES,
+        policy: str = WS_OVERFLOW_POLICY,
+        send_timeout: float = WS_SEND_TIMEOUT_SECONDS
+    ):
+        self.max_queue = max_queue
+        self.policy = policy
+        self.send_timeout = send_timeout
+        self._connections: Dict[int, Connection] = {}
+        self._subscribers: Dict[str, Dict[int, Connection]] = {}
+        self._ids = itertools.count(1)
+
+    def __len__(self) -> int:
+        return len(self._connections)
+
+    async def connect(self, websocket: WebSocket, policy: Optional[str] = None, encoding: str = "json") -> Connection:
+        """Accept the socket and start its writer; raises ValueError for an unknown policy or encoding"""
+        connection = Connection(self, websocket, self.max_queue, policy or self.policy, self.send_timeout, encoding)
+        await websocket.accept()
+        self._connections[connection.id] = connection
+        connection.start()
+        return connection
+
+    def disconnect(self, connection: Connection):
+        """Forget a connection and stop its writer; safe to call more than once"""
+        self._connections.pop(connection.id, None)
+        for topic in list(connection.topics):
+            self.unsubscribe(connection, topic)
+        connection.close()
+
+    def broadcast(self, message: Message) -> int:
+        """Queue a message for every connection; returns how many accepted it"""
+        return sum(connection.send(message) for connection in list(self._connections.values()))
+
+    def subscribe(self, connection: Connection, topic: str, hold: bool = False):
+        if connection.closed:
+            return
+        self._subscribers.setdefault(topic, {})[connection.id] = connection
+        connection.topics.add(topic)
+        if hold:
+            connection._held[topic] = deque()
+
+    def unsubscribe(self, connection: Connection, topic: str):
+        subscribers = self._subscribers.get(topic)
+        if subscribers is not None:
+            subscribers.pop(connection.id, None)
+            if not subscribers:
+                del self._subscribers[topic]
+        connection.topics.discard(topic)
+        connection._held.pop(topic, None)
+
+    def subscribers(self, topic: str) -> List[Connection]:
+        return list(self._subscribers.get(topic, {}).values())
+
+    def topics(self) -> List[str]:
+        """Topics with at least one subscriber"""
+        return list(self._subscribers)
+
+    def publish(self, topic: str, message: Message) -> int:
+        """Queue a message for the topic's subscribers only"""
+        return sum(connection.publish(topic, message) for connection in list(self._subscribers.get(topic, {}).values()))
+
+    def stats(self) -> Dict[str, int]:
+        connections = list(self._connections.values())
+        return {
+            "connections": len(connections),
+            "topics": len(self._subscribers),
+            "queued": sum(c.queued for c in connections),
+            "dropped": sum(c.dropped for c in connections)
+        }
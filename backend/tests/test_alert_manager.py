@@ -0,0 +1,177 @@
+import pytest
+
+from services.alert_manager import AlertManager, WebhookNotifier, default_notifiers
+from services.alerts import AlertEngine, AlertRule, summarize_alerts
+from services.timeseries import TimeSeriesStore
+
+T0 = 1_700_000_000.0
+
+
+class Clock:
+    def __init__(self):
+        self.now = T0
+
+    def __call__(self):
+        return self.now
+
+
+def make_manager(**kwargs):
+    store = TimeSeriesStore()
+    rules = [
+        AlertRule({"name": "CrashLoop", "metric": "restarts", "op": ">", "value": 5, "severity": "critical"}),
+        AlertRule({"name": "HighCPU", "metric": "pod_cpu", "op": ">", "value": 80})
+    ]
+    engine = AlertEngine(store, rules)
+    clock = Clock()
+    manager = AlertManager(engine, group_by=["alertname", "namespace"], group_wait=30, group_interval=300, clock=clock, **kwargs)
+    return store, engine, manager, clock
+
+
+def record(store, engine, clock, metric, value, **labels):
+    store.record(metric, value, clock.now, labels)
+    engine.evaluate(clock.now)
+
+
+class TestGrouping:
+    """Test grouping and incrementally maintained counts"""
+
+    def test_pods_grouped_by_rule_and_namespace(self):
+        store, engine, manager, clock = make_manager()
+        for pod in range(50):
+            store.record("restarts", 10, clock.now, {"pod": f"web-{pod}", "namespace": "prod"})
+        store.record("restarts", 10, clock.now, {"pod": "job", "namespace": "batch"})
+        engine.evaluate(clock.now)
+
+        groups = {group["labels"]["namespace"]: group for group in manager.groups()}
+        assert groups["prod"]["count"] == 50
+        assert groups["prod"]["firing"] == 50
+        assert groups["batch"]["count"] == 1
+        assert manager.summary()["critical"] == 51
+
+    def test_summary_matches_recount(self):
+        """Incremental counts agree with counting the alert list from scratch"""
+        store, engine, manager, clock = make_manager()
+        record(store, engine, clock, "restarts", 10, pod="a", namespace="prod")
+        record(store, engine, clock, "pod_cpu", 95, pod="a", namespace="prod")
+        clock.now += 60
+        record(store, engine, clock, "restarts", 0, pod="a", namespace="prod")
+        manager.add_silence({"alertname": "HighCPU"}, 600)
+
+        summary = manager.summary()
+        assert summary == summarize_alerts(manager.alerts())
+        assert summary["critical"] == 0
+        assert summary["warning"] == 0
+        assert summary["silenced"] == 1
+        assert summary["total"] == 2
+
+
+class TestSilences:
+    """Test time-boxed silences"""
+
+    def test_silence_expires(self):
+        store, engine, manager, clock = make_manager()
+        record(store, engine, clock, "pod_cpu", 95, pod="a", namespace="prod")
+        silence = manager.add_silence({"namespace": "prod"}, 120, comment="maintenance")
+        assert manager.alerts()[0]["silenced_by"] == silence.id
+        assert manager.summary()["warning"] == 0
+
+        clock.now += 121
+        assert manager.silences() == []
+        assert manager.alerts()[0]["silenced_by"] is None
+        assert manager.summary()["warning"] == 1
+
+    def test_expire_silence_early(self):
+        store, engine, manager, clock = make_manager()
+        silence = manager.add_silence({"namespace": "prod"}, 600)
+        assert manager.expire_silence(silence.id)
+        assert not manager.expire_silence(silence.id)
+
+    def test_invalid_silences(self):
+        store, engine, manager, clock = make_manager()
+        with pytest.raises(ValueError):
+            manager.add_silence({}, 60)
+        with pytest.raises(ValueError):
+            manager.add_silence({"namespace": "prod"}, 0)
+
+
+class TestNotifications:
+    """Test batched, deduplicated notifications"""
+
+    def test_group_wait_batches_siblings(self):
+        store, engine, manager, clock = make_manager()
+        sent = []
+        manager.add_notifier(sent.append)
+
+        record(store, engine, clock, "restarts", 10, pod="a", namespace="prod")
+        clock.now += 10
+        record(store, engine, clock, "restarts", 10, pod="b", namespace="prod")
+        assert manager.flush() == []
+
+        clock.now += 20
+        manager.flush()
+        assert len(sent) == 1
+        assert len(sent[0]["alerts"]) == 2
+        assert sent[0]["labels"] == {"alertname": "CrashLoop", "namespace": "prod"}
+
+    def test_unchanged_alerts_are_not_resent(self):
+        """Only state changes are notified, at most every group_interval"""
+        store, engine, manager, clock = make_manager()
+        sent = []
+        manager.add_notifier(sent.append)
+        record(store, engine, clock, "restarts", 10, pod="a", namespace="prod")
+        clock.now += 30
+        manager.flush()
+
+        record(store, engine, clock, "restarts", 10, pod="b", namespace="prod")
+        clock.now += 60
+        assert manager.flush() == []
+
+        clock.now += 240
+        batches = manager.flush()
+        assert [alert["labels"]["pod"] for alert in batches[0]["alerts"]] == ["b"]
+
+    def test_silenced_alerts_are_not_notified(self):
+        store, engine, manager, clock = make_manager()
+        sent = []
+        manager.add_notifier(sent.append)
+        manager.add_silence({"alertname": "CrashLoop"}, 600)
+        record(store, engine, clock, "restarts", 10, pod="a", namespace="prod")
+        clock.now += 30
+        manager.flush()
+        assert sent == []
+
+
+class FakeSession:
+    def __init__(self):
+        self.posts = []
+
+    def post(self, url, json=None, timeout=None):
+        self.posts.append((url, json, timeout))
+        return self
+
+    def raise_for_status(self):
+        pass
+
+
+class TestNotifiers:
+    """Test the sinks batches are delivered to"""
+
+    def test_webhook_receives_batches(self):
+        store, engine, manager, clock = make_manager()
+        session = FakeSession()
+        manager.add_notifier(WebhookNotifier("http://hooks.local/alerts", "prod-eu", timeout=5, session=session))
+        record(store, engine, clock, "restarts", 10, pod="a", namespace="prod")
+        clock.now += 30
+        manager.flush()
+
+        [(url, body, timeout)] = session.posts
+        assert url == "http://hooks.local/alerts" and timeout == 5
+        assert body["cluster"] == "prod-eu"
+        assert body["labels"] == {"alertname": "CrashLoop", "namespace": "prod"}
+        assert [alert["status"] for alert in body["alerts"]] == ["firing"]
+
+    def test_default_notifiers(self):
+        [webhook] = default_notifiers("c1", webhook_url="http://hooks.local/alerts")
+        assert isinstance(webhook, WebhookNotifier) and webhook.cluster == "c1"
+        [log] = default_notifiers("c1", webhook_url="")
+        log({"labels": {"alertname": "CrashLoop"}, "alerts": [{"status": "firing"}], "timestamp": None})
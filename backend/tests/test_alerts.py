@@ -0,0 +1,140 @@
+import pytest
+
+from services.alerts import AlertEngine, AlertRule, INACTIVE, PENDING, FIRING, RESOLVED
+from services.timeseries import TimeSeriesStore
+
+T0 = 1_700_000_000.0
+
+
+def make_engine(*specs):
+    store = TimeSeriesStore()
+    return store, AlertEngine(store, [AlertRule(spec) for spec in specs])
+
+
+class TestThresholdRules:
+    """Test pending/firing/resolved transitions"""
+
+    def test_for_duration(self):
+        """An alert is pending until the condition has held for `for` seconds"""
+        store, engine = make_engine({"name": "HighCPU", "metric": "cpu_usage", "op": ">", "value": 80, "for": 60})
+
+        store.record("cpu_usage", 90, T0)
+        assert [(prev, a.state) for prev, a in engine.evaluate(T0)] == [(INACTIVE, PENDING)]
+
+        store.record("cpu_usage", 95, T0 + 30)
+        assert engine.evaluate(T0 + 30) == []
+
+        # No new sample, but the pending alert is re-checked as time passes
+        transitions = engine.evaluate(T0 + 60)
+        assert [(prev, a.state) for prev, a in transitions] == [(PENDING, FIRING)]
+        assert engine.alerts()[0].to_dict()["value"] == 95
+
+        store.record("cpu_usage", 50, T0 + 90)
+        transitions = engine.evaluate(T0 + 90)
+        assert [(prev, a.state) for prev, a in transitions] == [(FIRING, RESOLVED)]
+
+    def test_stale_pending_alert_does_not_fire(self):
+        """A pending alert whose series stopped updating is re-checked, not promoted"""
+        store, engine = make_engine({"name": "HighCPU", "metric": "cpu_usage", "op": ">", "value": 80,
+                                     "for": 600, "window": 300})
+        store.record("cpu_usage", 90, T0)
+        engine.evaluate(T0)
+        transitions = engine.evaluate(T0 + 600)
+        assert [(prev, a.state) for prev, a in transitions] == [(PENDING, INACTIVE)]
+        assert engine.alerts() == []
+
+    def test_stale_firing_alert_resolves(self):
+        """A firing alert whose series stopped updating resolves once its data leaves the window"""
+        store, engine = make_engine({"name": "HighNodeCPU", "metric": "node_cpu_usage", "op": ">", "value": 80,
+                                     "for": 0, "window": 300})
+        store.record("node_cpu_usage", 95, T0, {"node": "deleted"})
+        engine.evaluate(T0)
+        assert [alert.state for alert in engine.alerts()] == [FIRING]
+
+        assert engine.evaluate(T0 + 200) == []
+        transitions = engine.evaluate(T0 + 301)
+        assert [(prev, a.state) for prev, a in transitions] == [(FIRING, RESOLVED)]
+        assert [alert.state for alert in engine.alerts()] == [RESOLVED]
+
+    def test_pending_that_clears_is_dropped(self):
+        """A condition that clears before `for` never fires and leaves no alert"""
+        store, engine = make_engine({"name": "HighCPU", "metric": "cpu_usage", "op": ">", "value": 80, "for": 60})
+        store.record("cpu_usage", 90, T0)
+        engine.evaluate(T0)
+        store.record("cpu_usage", 10, T0 + 30)
+        engine.evaluate(T0 + 30)
+        assert engine.alerts() == []
+
+    def test_per_series_and_match(self):
+        """Each labelled series gets its own alert, filtered by match labels"""
+        store, engine = make_engine({
+            "name": "HighNodeCPU", "metric": "node_cpu_usage", "op": ">", "value": 90,
+            "match": {"pool": "gpu"}, "summary": "Node {node} at {value:.0f}%"
+        })
+        store.record("node_cpu_usage", 95, T0, {"node": "a", "pool": "gpu"})
+        store.record("node_cpu_usage", 95, T0, {"node": "b", "pool": "cpu"})
+        engine.evaluate(T0)
+
+        alerts = [alert.to_dict() for alert in engine.alerts()]
+        assert len(alerts) == 1
+        assert alerts[0]["status"] == FIRING
+        assert alerts[0]["description"] == "Node a at 95%"
+        assert alerts[0]["labels"]["alertname"] == "HighNodeCPU"
+
+
+class TestIncrementalEvaluation:
+    """Test that only changed series are evaluated"""
+
+    def test_unchanged_series_are_skipped(self):
+        store, engine = make_engine({"name": "HighCPU", "metric": "node_cpu_usage", "op": ">", "value": 80})
+        for node in range(100):
+            store.record("node_cpu_usage", 10, T0, {"node": str(node)})
+        engine.evaluate(T0)
+        assert engine.evaluated_series == 100
+
+        store.record("node_cpu_usage", 99, T0 + 30, {"node": "7"})
+        engine.evaluate(T0 + 30)
+        assert engine.evaluated_series == 1
+        assert [alert.labels["node"] for alert in engine.alerts()] == ["7"]
+
+
+class TestRateAndAbsentRules:
+    """Test rate-of-change and absent-data rules"""
+
+    def test_rate_rule(self):
+        store, engine = make_engine({"name": "Dropping", "type": "rate", "metric": "nodes_ready",
+                                     "window": 600, "op": "<", "value": 0})
+        store.record("nodes_ready", 5, T0)
+        store.record("nodes_ready", 3, T0 + 60)
+        engine.evaluate(T0 + 60)
+        assert engine.alerts()[0].state == FIRING
+
+    def test_absent_rule(self):
+        """A series that stops updating fires after `for` seconds and resolves on new data"""
+        store, engine = make_engine({"name": "Absent", "type": "absent", "metric": "pods_total", "for": 120})
+        store.record("pods_total", 10, T0)
+        engine.evaluate(T0)
+        assert engine.evaluate(T0 + 60) == []
+
+        transitions = engine.evaluate(T0 + 121)
+        assert [(prev, a.state) for prev, a in transitions] == [(INACTIVE, FIRING)]
+
+        store.record("pods_total", 10, T0 + 150)
+        transitions = engine.evaluate(T0 + 150)
+        assert [(prev, a.state) for prev, a in transitions] == [(FIRING, RESOLVED)]
+
+    def test_absent_without_new_samples(self):
+        """The default MetricsAbsent rule fires when evaluations see no new samples"""
+        store = TimeSeriesStore()
+        engine = AlertEngine(store)
+        store.record("pods_total", 10, T0)
+        engine.evaluate(T0)
+        for offset in range(30, 300, 30):
+            assert engine.evaluate(T0 + offset) == []
+        engine.evaluate(T0 + 300)
+        assert [a.rule.name for a in engine.alerts()] == ["MetricsAbsent"]
+        assert engine.alerts()[0].state == FIRING
+
+    def test_invalid_rule(self):
+        with pytest.raises(ValueError):
+            AlertRule({"name": "Bad", "metric": "x", "type": "median"})
@@ -0,0 +1,120 @@
+import asyncio
+import contextlib
+import threading
+
+import pytest
+
+from services.async_kube import AsyncK8sService, run_blocking
+from services.fanout import fan_out_async, TIMEOUT
+
+
+class BlockingService:
+    def __init__(self):
+        self.release = threading.Event()
+        self.calls = 0
+
+    def get_pods(self, namespace=None, label_selector=None, field_selector=None):
+        self.calls += 1
+        self.release.wait(timeout=5)
+        return [namespace]
+
+
+class TestRunBlocking:
+    """Test running blocking calls off the event loop"""
+
+    def test_runs_on_the_k8s_pool(self):
+        def call(a, b=0):
+            return threading.current_thread().name, a + b
+
+        name, total = asyncio.run(run_blocking(call, 1, b=2))
+        assert name.startswith("k8s-io") and total == 3
+
+    def test_errors_propagate(self):
+        def failing():
+            raise RuntimeError("forbidden")
+
+        with pytest.raises(RuntimeError, match="forbidden"):
+            asyncio.run(run_blocking(failing))
+
+
+class TestConcurrencyCap:
+    """Test the per-cluster cap on in-flight calls"""
+
+    def test_calls_beyond_the_cap_wait(self):
+        service = BlockingService()
+        facade = AsyncK8sService(service, max_concurrency=2)
+
+        async def scenario():
+            calls = [asyncio.ensure_future(facade.get_pods(str(i))) for i in range(5)]
+            await asyncio.sleep(0.1)
+            assert service.calls == 2
+            service.release.set()
+            return await asyncio.gather(*calls)
+
+        assert asyncio.run(scenario()) == [[str(i)] for i in range(5)]
+        assert service.calls == 5
+
+    def test_caps_are_per_service(self):
+        """A saturated cluster does not delay calls to another"""
+        slow, fast = BlockingService(), BlockingService()
+        fast.release.set()
+        slow_facade = AsyncK8sService(slow, max_concurrency=1)
+        fast_facade = AsyncK8sService(fast, max_concurrency=1)
+
+        async def scenario():
+            stuck = asyncio.ensure_future(slow_facade.get_pods("a"))
+            assert await asyncio.wait_for(fast_facade.get_pods("b"), 1) == ["b"]
+            slow.release.set()
+            await stuck
+
+        asyncio.run(scenario())
+
+    def test_timed_out_call_keeps_its_slot(self):
+        """A call abandoned on timeout counts against the cap until its thread finishes"""
+        service = BlockingService()
+        facade = AsyncK8sService(service, max_concurrency=1)
+
+        async def scenario():
+            _, errors = await fan_out_async({"pods": facade.get_pods("a")}, timeout=0.05)
+            assert errors == {"pods": TIMEOUT}
+            second = asyncio.ensure_future(facade.get_pods("b"))
+            await asyncio.sleep(0.1)
+            assert service.calls == 1 and not second.done()
+            service.release.set()
+            return await asyncio.wait_for(second, 2)
+
+        assert asyncio.run(scenario()) == ["b"]
+        assert service.calls == 2
+
+    def test_hold_spans_the_call(self):
+        service = BlockingService()
+        service.release.set()
+        events = []
+
+        @contextlib.contextmanager
+        def hold():
+            events.append("hold")
+            yield
+            events.append("release")
+
+        facade = AsyncK8sService(service, hold=hold)
+        assert asyncio.run(facade.get_pods("a")) == ["a"]
+        assert events == ["hold", "release"]
+
+
+class TestWrapping:
+    """Test that other service methods are exposed as coroutines"""
+
+    def test_methods_are_wrapped(self):
+        service = BlockingService()
+        service.cluster_name = "prod"
+        service.get_events = lambda namespace, limit=10: threading.current_thread().name
+        facade = AsyncK8sService(service)
+
+        assert facade.cluster_name == "prod"
+        assert facade.get_events.__name__ == "<lambda>"
+        assert asyncio.run(facade.get_events("prod", limit=5)).startswith("k8s-io")
+
+    def test_missing_attribute(self):
+        with pytest.raises(AttributeError):
+            AsyncK8sService(BlockingService()).get_widgets
@@ -0,0 +1,260 @@
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from services.broker import ACQUIRE_SCRIPT, RELEASE_SCRIPT, Broker, InMemoryBroker, RedisBroker
+from services.topics import TopicFeed
+from services.ws_hub import WebSocketHub
+
+
+class FakePubSub:
+    def __init__(self):
+        self.channels = set()
+        self.queue = asyncio.Queue()
+
+    @property
+    def subscribed(self):
+        return bool(self.channels)
+
+    async def subscribe(self, *channels):
+        self.channels.update(channels)
+
+    async def unsubscribe(self, *channels):
+        self.channels.difference_update(channels)
+
+    async def get_message(self, ignore_subscribe_messages=False, timeout=0.0):
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def aclose(self):
+        self.channels.clear()
+
+
+class FakeRedis:
+    """The subset of redis.asyncio.Redis the broker uses, shared by several brokers"""
+    def __init__(self):
+        self.keys = {}
+        self.pubsubs = []
+
+    async def ping(self):
+        return True
+
+    def pubsub(self):
+        pubsub = FakePubSub()
+        self.pubsubs.append(pubsub)
+        return pubsub
+
+    async def publish(self, channel, message):
+        for pubsub in self.pubsubs:
+            if channel in pubsub.channels:
+                pubsub.queue.put_nowait({"type": "message", "channel": channel.encode(), "data": message.encode()})
+
+    async def eval(self, script, numkeys, key, token, *args):
+        value, expires = self.keys.get(key, (None, 0))
+        if time.monotonic() >= expires:
+            value = None
+        if script == ACQUIRE_SCRIPT:
+            if value not in (None, token):
+                return 0
+            self.keys[key] = (token, time.monotonic() + args[0] / 1000)
+            return 1
+        if script == RELEASE_SCRIPT and value == token:
+            del self.keys[key]
+            return 1
+        return 0
+
+    async def aclose(self):
+        pass
+
+
+async def settle(seconds=0.05):
+    await asyncio.sleep(seconds)
+
+
+class FakeInformer:
+    def __init__(self, items):
+        self.items = {i["name"]: i for i in items}
+        self.handlers = []
+
+    def add_handler(self, handler):
+        self.handlers.append(handler)
+
+    def remove_handler(self, handler):
+        self.handlers.remove(handler)
+
+    def list(self, namespace=None):
+        return list(self.items.values())
+
+    def emit(self, old, new):
+        self.items[new["name"]] = new
+        for handler in self.handlers:
+            handler("MODIFIED", old, new)
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, message):
+        self.sent.append(json.loads(message))
+
+
+class TestBrokers:
+    """Test delivery and leases of both backends"""
+
+    def test_in_memory(self):
+        async def scenario():
+            broker = InMemoryBroker()
+            received = []
+            await broker.subscribe("a", received.append)
+            await broker.publish("a", "x")
+            await broker.publish("b", "y")
+            await broker.unsubscribe("a", received.append)
+            await broker.publish("a", "z")
+            return received, await broker.acquire("lease", 1)
+
+        assert asyncio.run(scenario()) == (["x"], True)
+
+    def test_redis_fan_out_and_leases(self):
+        async def scenario():
+            redis = FakeRedis()
+            first, second = RedisBroker(client=redis), RedisBroker(client=redis)
+            await first.start()
+            await second.start()
+            received = []
+            await first.subscribe("updates", lambda m: received.append(("first", m)))
+            await second.subscribe("updates", lambda m: received.append(("second", m)))
+            await first.publish("updates", "hello")
+            await settle()
+
+            leases = [await first.acquire("watch", 10), await second.acquire("watch", 10), await first.acquire("watch", 10)]
+            await first.release("watch")
+            leases.append(await second.acquire("watch", 0.01))
+            await settle()
+            # An expired lease is free again
+            leases.append(await first.acquire("watch", 10))
+            await first.close()
+            await second.close()
+            return sorted(received), leases
+
+        received, leases = asyncio.run(scenario())
+        assert received == [("first", "hello"), ("second", "hello")]
+        assert leases == [True, False, True, True, True]
+
+    def test_incomplete_broker_cannot_be_built(self):
+        """A backend missing publish or the lease methods fails when built, not when first used"""
+        class PublishOnly(Broker):
+            async def publish(self, channel, message):
+                pass
+
+        with pytest.raises(TypeError):
+            PublishOnly()
+
+
+class TestSharedTopicFeed:
+    """Test two workers sharing one watch through Redis"""
+
+    def test_one_watch_serves_every_worker(self):
+        informer = FakeInformer([{"name": "web-1", "namespace": "prod", "restarts": 0}])
+        service = SimpleNamespace(informer=lambda kind, timeout=None: informer, alert_manager=lambda: None)
+
+        async def scenario():
+            redis = FakeRedis()
+            workers = []
+            for _ in range(2):
+                hub = WebSocketHub()
+                feed = TopicFeed(hub, lambda cluster_id: service, RedisBroker(client=redis), lease_seconds=0.3)
+                await feed.start()
+                workers.append((hub, feed))
+            (hub_a, feed_a), (hub_b, feed_b) = workers
+
+            client_a = await hub_a.connect(FakeWebSocket())
+            client_b = await hub_b.connect(FakeWebSocket())
+            await feed_a.subscribe(client_a, "c1/pods")
+            # Worker b gets its snapshot from worker a, which holds the watch
+            await feed_b.subscribe(client_b, "c1/pods")
+            assert len(informer.handlers) == 1
+            # Taking the lease resyncs every worker
+            await feed_a.flush()
+            await settle()
+
+            informer.emit(informer.items["web-1"], {"name": "web-1", "namespace": "prod", "restarts": 1})
+            await feed_b.flush()
+            await feed_a.flush()
+            await settle()
+
+            # Worker a shuts down and releases its lease; b takes the watch over
+            await feed_a.close()
+            await settle(0.35)
+            await feed_b.flush()
+            informer.emit(informer.items["web-1"], {"name": "web-1", "namespace": "prod", "restarts": 2})
+            await feed_b.flush()
+            await settle()
+            await feed_b.close()
+            return client_a.websocket.sent, client_b.websocket.sent
+
+        sent_a, sent_b = asyncio.run(scenario())
+        assert [m["type"] for m in sent_a] == ["snapshot", "snapshot", "delta"]
+        assert sent_b[0]["items"] == [{"name": "web-1", "namespace": "prod", "restarts": 0}]
+        assert [m["type"] for m in sent_b] == ["snapshot", "snapshot", "delta", "snapshot", "delta"]
+        assert [m["seq"] for m in sent_b if m["type"] == "delta"] == [1, 2]
+        assert sent_b[-1]["changes"][0]["patch"] == {"restarts": 2}
+        # Each worker detached its handler when it shut down
+        assert informer.handlers == []
+
+    def test_handover_resyncs_changes_missed_in_between(self):
+        informer = FakeInformer([{"name": "web-1", "namespace": "prod", "restarts": 0}])
+        service = SimpleNamespace(informer=lambda kind, timeout=None: informer, alert_manager=lambda: None)
+
+        async def scenario():
+            redis = FakeRedis()
+            feed_a = TopicFeed(WebSocketHub(), lambda cluster_id: service, RedisBroker(client=redis), lease_seconds=0.3)
+            hub_b = WebSocketHub()
+            feed_b = TopicFeed(hub_b, lambda cluster_id: service, RedisBroker(client=redis), lease_seconds=0.3)
+            await feed_a.start()
+            await feed_b.start()
+            await feed_a.subscribe(await feed_a.hub.connect(FakeWebSocket()), "c1/pods")
+            client_b = await hub_b.connect(FakeWebSocket())
+            await feed_b.subscribe(client_b, "c1/pods")
+            await feed_a.flush()
+            await settle()
+
+            # Worker a stops flushing, as if it died, with a change never published
+            informer.emit(informer.items["web-1"], {"name": "web-1", "namespace": "prod", "restarts": 1})
+            await settle(0.35)
+            await feed_b.flush()
+            await settle()
+            await feed_b.close()
+            return client_b.websocket.sent
+
+        sent = asyncio.run(scenario())
+        assert [m["type"] for m in sent] == ["snapshot", "snapshot", "snapshot"]
+        assert sent[-1]["items"] == [{"name": "web-1", "namespace": "prod", "restarts": 1}]
+
+    def test_lost_lease_detaches_the_watch(self):
+        informer = FakeInformer([{"name": "web-1", "namespace": "prod", "restarts": 0}])
+        service = SimpleNamespace(informer=lambda kind, timeout=None: informer, alert_manager=lambda: None)
+
+        async def scenario():
+            redis = FakeRedis()
+            feed = TopicFeed(WebSocketHub(), lambda cluster_id: service, RedisBroker(client=redis), lease_seconds=0.03)
+            await feed.start()
+            await feed.subscribe(await feed.hub.connect(FakeWebSocket()), "c1/pods")
+            assert len(informer.handlers) == 1
+            # Another worker holds the lease once ours lapses
+            await settle()
+            redis.keys["k8sdash:lease:watch:c1/pods"] = ("other", time.monotonic() + 10)
+            for _ in range(3):
+                await feed.flush()
+            await feed.close()
+
+        asyncio.run(scenario())
+        assert informer.handlers == []
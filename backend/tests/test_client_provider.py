@@ -0,0 +1,36 @@
+import pytest
+from unittest.mock import patch
+
+from services import client_provider
+
+
+@pytest.fixture(autouse=True)
+def reset_provider():
+    client_provider.close_api_client()
+    yield
+    client_provider.close_api_client()
+
+
+class TestClientProvider:
+    """Test the application-scoped Kubernetes client"""
+
+    def test_config_loaded_once(self):
+        """Every caller shares one client built from a single kubeconfig load"""
+        with patch("services.client_provider.config.load_kube_config") as load_kube_config, \
+                patch("services.client_provider.config.load_incluster_config", side_effect=Exception("not in cluster")):
+            first = client_provider.get_api_client()
+            second = client_provider.get_api_client()
+
+        assert first is not None
+        assert first is second
+        assert load_kube_config.call_count == 1
+        assert first.configuration.connection_pool_maxsize == client_provider.CONNECTION_POOL_MAXSIZE
+
+    def test_missing_config_is_cached(self):
+        """Without any configuration the provider returns None and does not retry per call"""
+        with patch("services.client_provider.config.load_kube_config", side_effect=Exception("no kubeconfig")) as load_kube_config, \
+                patch("services.client_provider.config.load_incluster_config", side_effect=Exception("not in cluster")):
+            assert client_provider.get_api_client() is None
+            assert client_provider.get_api_client() is None
+
+        assert load_kube_config.call_count == 1
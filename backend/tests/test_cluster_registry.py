@@ -0,0 +1,131 @@
+import asyncio
+import threading
+
+import pytest
+
+from services.cluster_registry import ClusterClientRegistry, DEFAULT_CLUSTER, UnknownClusterError
+
+
+class FakeService:
+    def __init__(self, name):
+        self.name = name
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+    def get_namespaces(self, label_selector=None, field_selector=None):
+        return ["default"]
+
+
+def make_registry(tmp_path=None, clusters=None, **kwargs):
+    config_path = ""
+    if clusters is not None:
+        config_path = tmp_path / "clusters.yaml"
+        config_path.write_text("clusters:\n" + "".join(f"  {c}:\n    host: https://{c}:6443\n" for c in clusters))
+    registry = ClusterClientRegistry(config_path=str(config_path), **kwargs)
+    registry._kube_contexts = set()
+    registry._build_service = FakeService
+    return registry
+
+
+class TestResolution:
+    """Test mapping cluster ids to clients"""
+
+    def test_configured_and_unknown_clusters(self, tmp_path):
+        registry = make_registry(tmp_path, ["prod", "staging"])
+        assert registry.resolve("prod") == {"host": "https://prod:6443"}
+        assert registry.get("prod").name == "prod"
+        with pytest.raises(UnknownClusterError):
+            registry.get("missing")
+        assert "prod" in registry
+        assert "staging" not in registry
+        assert "missing" not in registry
+
+    def test_default_configuration_is_shared(self):
+        registry = make_registry()
+        assert registry.get("1") is registry.get("2")
+        assert registry.get("1").name == DEFAULT_CLUSTER
+        assert len(registry) == 1
+
+
+class TestEviction:
+    """Test LRU and idle eviction, and that held clients stay open"""
+
+    def test_least_recently_used_is_evicted(self, tmp_path):
+        registry = make_registry(tmp_path, ["a", "b", "c"], max_clusters=2)
+        a, b = registry.get("a"), registry.get("b")
+        registry.get("a")
+        registry.get("c")
+        assert b.closed and not a.closed
+        assert [cluster_id for cluster_id, _ in registry.services()] == ["a", "c"]
+
+    def test_idle_clients_are_evicted(self, tmp_path):
+        registry = make_registry(tmp_path, ["a", "b"], idle_seconds=60)
+        a = registry.get("a")
+        registry._entries["a"].last_used -= 120
+        registry.get("b")
+        assert a.closed and "a" not in registry
+
+    def test_held_client_is_not_evicted(self, tmp_path):
+        registry = make_registry(tmp_path, ["a", "b", "c"], max_clusters=1)
+        with registry.hold("a") as a:
+            registry.get("b")
+            registry.get("c")
+            assert not a.closed and "a" in registry
+        # Released, it is the least recently used once more
+        registry.get("c")
+        assert a.closed and len(registry) == 1
+
+    def test_explicit_evict_waits_for_holders(self, tmp_path):
+        registry = make_registry(tmp_path, ["a"])
+        with registry.hold("a") as a:
+            release = registry.retain(a)
+            registry.evict("a")
+            assert "a" not in registry and not a.closed
+        assert not a.closed
+        release()
+        assert a.closed
+        assert registry.get("a") is not a
+
+    def test_async_calls_hold_the_client(self, tmp_path):
+        registry = make_registry(tmp_path, ["a"])
+        service = registry.get("a")
+
+        async def scenario():
+            call = asyncio.ensure_future(registry.get_async("a").get_namespaces())
+            await asyncio.sleep(0)
+            registry.evict("a")
+            assert not service.closed
+            return await call
+
+        assert asyncio.run(scenario()) == ["default"]
+        assert service.closed
+
+
+class TestConcurrentBuilds:
+    """Test that racing first uses end up with one client"""
+
+    def test_one_client_survives(self, tmp_path):
+        registry = make_registry(tmp_path, ["a"])
+        built = []
+        both_building = threading.Barrier(2)
+
+        def build(cluster_id):
+            service = FakeService(cluster_id)
+            built.append(service)
+            both_building.wait(timeout=5)
+            return service
+
+        registry._build_service = build
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(registry.get("a"))) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(built) == 2
+        assert results[0] is results[1]
+        assert [service.closed for service in built].count(True) == 1
+        assert len(registry) == 1
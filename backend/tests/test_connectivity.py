@@ -0,0 +1,103 @@
+import pytest
+from unittest.mock import MagicMock
+
+from services.connectivity import CircuitBreaker, ConnectivityMonitor, CLOSED, OPEN, HALF_OPEN
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestCircuitBreaker:
+    """Test breaker state transitions"""
+
+    def test_opens_after_threshold(self):
+        """Consecutive failures open the breaker and refuse calls"""
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=3, reset_timeout=5, clock=clock)
+
+        breaker.record_failure()
+        breaker.record_failure()
+        assert breaker.state == CLOSED and breaker.allow()
+
+        breaker.record_failure()
+        assert breaker.state == OPEN
+        assert not breaker.allow()
+        assert breaker.retry_in() == 5
+
+    def test_half_open_backoff(self):
+        """One probe is let through after the timeout; a failed probe doubles it"""
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=5, max_reset_timeout=8, clock=clock)
+        breaker.record_failure()
+
+        clock.now += 5
+        assert breaker.allow()
+        assert breaker.state == HALF_OPEN
+        assert not breaker.allow()
+
+        breaker.record_failure()
+        assert breaker.state == OPEN
+        assert breaker.retry_in() == 8
+
+        clock.now += 8
+        assert breaker.allow()
+        breaker.record_success()
+        assert breaker.state == CLOSED
+        assert breaker.retry_in() == 0
+
+
+class TestConnectivityMonitor:
+    """Test cached health state"""
+
+    def test_healthy_state_is_cached(self):
+        """A fresh healthy answer does not probe again"""
+        clock = FakeClock()
+        probe = MagicMock()
+        monitor = ConnectivityMonitor(probe, cache_seconds=30, clock=clock)
+
+        assert monitor.available()
+        assert monitor.available()
+        assert probe.call_count == 1
+
+        clock.now += 31
+        assert monitor.available()
+        assert probe.call_count == 2
+
+    def test_open_circuit_answers_without_probing(self):
+        """An unreachable cluster is not re-probed until the breaker half-opens"""
+        clock = FakeClock()
+        probe = MagicMock(side_effect=ConnectionError("refused"))
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=5, clock=clock)
+        monitor = ConnectivityMonitor(probe, cache_seconds=30, breaker=breaker, clock=clock)
+
+        assert not monitor.available()
+        assert not monitor.available()
+        assert probe.call_count == 2
+        assert breaker.state == OPEN
+
+        for _ in range(10):
+            assert not monitor.available()
+        assert probe.call_count == 2
+        assert monitor.snapshot()["status"] == "degraded"
+        assert monitor.snapshot()["last_error"] == "refused"
+
+        clock.now += 5
+        probe.side_effect = None
+        assert monitor.available()
+        assert probe.call_count == 3
+        assert monitor.snapshot()["status"] == "connected"
+
+    def test_real_calls_refresh_state(self):
+        """Outcomes reported by real calls feed the cache and the breaker"""
+        clock = FakeClock()
+        probe = MagicMock()
+        monitor = ConnectivityMonitor(probe, clock=clock)
+
+        monitor.record_success()
+        assert monitor.available()
+        assert probe.call_count == 0
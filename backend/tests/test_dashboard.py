@@ -0,0 +1,162 @@
+import threading
+import time
+
+from services.dashboard import DashboardAggregator, RequestMemo, FRESH, CACHED, STALE, MISSING, REFRESHING
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestRequestMemo:
+    """Test sharing of fetches within one request"""
+
+    def test_concurrent_callers_share_one_fetch(self):
+        memo = RequestMemo()
+        calls = []
+        started = threading.Event()
+
+        def fetch():
+            calls.append(1)
+            started.set()
+            time.sleep(0.05)
+            return ["node-1"]
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(memo.get("nodes", fetch))) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(calls) == 1
+        assert results == [["node-1"]] * 5
+
+    def test_exception_is_shared(self):
+        memo = RequestMemo()
+
+        def fail():
+            raise RuntimeError("apiserver down")
+
+        for _ in range(2):
+            try:
+                memo.get("nodes", fail)
+                assert False
+            except RuntimeError as e:
+                assert str(e) == "apiserver down"
+
+
+class TestDashboardAggregator:
+    """Test per-component TTL caching and stale fallback"""
+
+    def test_components_run_concurrently(self):
+        aggregator = DashboardAggregator(ttls={}, timeout=2)
+        components = {name: (lambda memo: time.sleep(0.2) or "ok") for name in ("health", "metrics", "alerts", "cost")}
+        start = time.monotonic()
+        data, status = aggregator.build("c1", components)
+        assert time.monotonic() - start < 0.6
+        assert set(data.values()) == {"ok"}
+        assert {s["state"] for s in status.values()} == {FRESH}
+
+    def test_ttl_cache(self):
+        clock = Clock()
+        aggregator = DashboardAggregator(ttls={"cost": 300, "health": 10}, clock=clock)
+        calls = []
+        components = {
+            "cost": lambda memo: calls.append("cost") or 1,
+            "health": lambda memo: calls.append("health") or 2
+        }
+        aggregator.build("c1", components)
+        clock.now += 60
+        data, status = aggregator.build("c1", components)
+        assert calls == ["cost", "health", "health"]
+        assert status["cost"] == {"state": CACHED, "age_seconds": 60.0}
+        assert status["health"]["state"] == FRESH
+
+        # Caches are per cluster
+        aggregator.build("c2", components)
+        assert calls.count("cost") == 2
+
+    def test_timeout_serves_stale(self):
+        clock = Clock()
+        aggregator = DashboardAggregator(ttls={"metrics": 15}, timeout=0.1, clock=clock)
+        aggregator.build("c1", {"metrics": lambda memo: {"cpu": 40}})
+
+        clock.now += 30
+        release = threading.Event()
+
+        def slow(memo):
+            release.wait(2)
+            return {"cpu": 55}
+
+        data, status = aggregator.build("c1", {"metrics": slow})
+        assert data["metrics"] == {"cpu": 40}
+        assert status["metrics"]["state"] == STALE
+        assert status["metrics"]["age_seconds"] == 30.0
+
+        # The late result still refreshes the cache
+        release.set()
+
+        def fail(memo):
+            raise RuntimeError("boom")
+
+        for _ in range(50):
+            time.sleep(0.01)
+            data, status = aggregator.build("c1", {"metrics": fail})
+            if data["metrics"] == {"cpu": 55}:
+                break
+        assert data["metrics"] == {"cpu": 55}
+
+    def test_failure_without_cache(self):
+        aggregator = DashboardAggregator(ttls={})
+
+        def fail(memo):
+            raise RuntimeError("boom")
+
+        data, status = aggregator.build("c1", {"health": fail})
+        assert data["health"] is None
+        assert status["health"] == {"state": MISSING, "age_seconds": None, "error": "boom"}
+
+    def test_one_refresh_in_flight(self):
+        """Requests during a slow refresh serve stale data instead of starting another"""
+        clock = Clock()
+        aggregator = DashboardAggregator(ttls={"metrics": 15}, timeout=0.05, clock=clock)
+        aggregator.build("c1", {"metrics": lambda memo: {"cpu": 40}})
+        clock.now += 30
+        release = threading.Event()
+        calls = []
+
+        def hung(memo):
+            calls.append(1)
+            release.wait(2)
+            return {"cpu": 55}
+
+        for _ in range(5):
+            data, status = aggregator.build("c1", {"metrics": hung})
+            assert data["metrics"] == {"cpu": 40}
+        assert len(calls) == 1
+        assert status["metrics"] == {"state": STALE, "age_seconds": 30.0, "error": REFRESHING}
+        release.set()
+
+    def test_join_refresh_without_cache(self):
+        """Without a cached value, a request waits for the refresh already running"""
+        aggregator = DashboardAggregator(ttls={}, timeout=1)
+        started = threading.Event()
+        calls = []
+
+        def slow(memo):
+            calls.append(1)
+            started.set()
+            time.sleep(0.1)
+            return "ok"
+
+        first = threading.Thread(target=lambda: aggregator.build("c1", {"health": slow}))
+        first.start()
+        started.wait(1)
+        data, status = aggregator.build("c1", {"health": slow})
+        first.join()
+        assert data["health"] == "ok" and status["health"]["state"] == FRESH
+        assert len(calls) == 1
@@ -0,0 +1,121 @@
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+from services.events import EventLog, event_to_dict
+from services.informer import Informer
+
+
+def make_event(n, namespace="default", obj="pod/web", reason="BackOff", uid=None, count=1, message="Back-off restarting"):
+    return {
+        "uid": uid or f"uid-{n}",
+        "timestamp": f"2024-01-01T00:00:{n:02d}",
+        "first_timestamp": f"2024-01-01T00:00:{n:02d}",
+        "type": "Warning",
+        "reason": reason,
+        "object": obj,
+        "namespace": namespace,
+        "message": message,
+        "source": "kubelet",
+        "count": count
+    }
+
+
+class TestEventLog:
+    """Test merging, eviction and cursor reads"""
+
+    def test_repeats_merge_by_count(self):
+        """A repeat moves to the newest position with the counts added up"""
+        log = EventLog()
+        log.add(make_event(1))
+        log.add(make_event(2, obj="pod/db", message="other"))
+        log.add(make_event(3, count=4))
+
+        events = log.page()["events"]
+        assert [e["object"] for e in events] == ["pod/web", "pod/db"]
+        assert events[0]["count"] == 5
+        assert events[0]["first_timestamp"] == "2024-01-01T00:00:01"
+        assert len(log) == 2
+
+    def test_series_update_keeps_apiserver_count(self):
+        """An update of the same Event object carries the total count already"""
+        log = EventLog()
+        log.add(make_event(1, uid="a", count=2))
+        log.add(make_event(2, uid="a", count=3))
+        assert log.page()["events"][0]["count"] == 3
+
+    def test_relist_replay_is_ignored(self):
+        log = EventLog()
+        log.add(make_event(1))
+        log.add(make_event(2, obj="pod/db"))
+        log.add(make_event(1))
+        assert [e["object"] for e in log.page()["events"]] == ["pod/db", "pod/web"]
+        assert log.latest == 2
+
+    def test_bounded_capacity(self):
+        log = EventLog(capacity=100)
+        for n in range(1000):
+            log.add(make_event(n % 60, obj=f"pod/{n}"))
+        assert len(log) == 100
+        assert log.page(limit=500)["events"][-1]["object"] == "pod/900"
+
+    def test_cursor_pages(self):
+        """Following next_cursor walks every event once, newest first"""
+        log = EventLog()
+        for n in range(25):
+            log.add(make_event(n % 60, obj=f"pod/{n}"))
+
+        seen, cursor = [], None
+        while True:
+            page = log.page(before=cursor, limit=10)
+            seen.extend(e["object"] for e in page["events"])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+        assert seen == [f"pod/{n}" for n in reversed(range(25))]
+
+        newer = log.page(after=log.latest - 1)
+        assert [e["object"] for e in newer["events"]] == ["pod/24"]
+
+    def test_index_filters(self):
+        log = EventLog(capacity=200)
+        for n in range(300):
+            log.add(make_event(n % 60, namespace=f"ns-{n % 3}", obj=f"pod/{n}", reason="Pulled" if n % 2 else "BackOff"))
+
+        page = log.page(namespace="ns-1", reason="Pulled", limit=500)
+        assert page["events"]
+        assert all(e["namespace"] == "ns-1" and e["reason"] == "Pulled" for e in page["events"])
+        assert len(page["events"]) == len([n for n in range(100, 300) if n % 3 == 1 and n % 2])
+        assert log.page(involved_object="pod/299")["events"][0]["id"] == log.latest
+        assert log.page(namespace="missing")["events"] == []
+
+
+class TestEventsWatch:
+    """Test feeding the log from an informer without a store"""
+
+    def test_stream_informer_feeds_log(self):
+        def make_obj(name, resource_version):
+            return SimpleNamespace(
+                metadata=SimpleNamespace(name=name, namespace="default", uid=name, resource_version=resource_version,
+                                         creation_timestamp=datetime(2024, 1, 1)),
+                regarding=SimpleNamespace(kind="Pod", name="web"),
+                series=None, reason="Started", type="Normal", note=f"started {name}",
+                reporting_controller="kubelet", deprecated_source=None, event_time=None,
+                deprecated_first_timestamp=None, deprecated_last_timestamp=None, deprecated_count=None
+            )
+
+        listing = SimpleNamespace(items=[make_obj("a", "1")], metadata=SimpleNamespace(resource_version="1"))
+        informer = Informer("events", MagicMock(return_value=listing), event_to_dict, keep_store=False)
+        log = EventLog()
+        informer.add_handler(log)
+
+        informer._relist()
+        informer._handle_event({"type": "ADDED", "object": make_obj("b", "2")})
+        informer._handle_event({"type": "DELETED", "object": make_obj("a", "3")})
+
+        assert informer.list() == []
+        assert informer.resource_version == "3"
+        events = log.page()["events"]
+        assert [e["message"] for e in events] == ["started b", "started a"]
+        assert events[0]["object"] == "pod/web"
+        assert events[0]["source"] == "kubelet"
@@ -0,0 +1,60 @@
+import asyncio
+import threading
+import time
+import pytest
+
+from services.fanout import fan_out, fan_out_async, TIMEOUT
+
+
+class TestFanOut:
+    """Test concurrent fan-out with partial results"""
+
+    def test_calls_run_concurrently(self):
+        """Total latency is the slowest call, not the sum"""
+        def slow(value):
+            time.sleep(0.2)
+            return value
+
+        start = time.monotonic()
+        results, errors = fan_out({
+            "pods": lambda: slow(1),
+            "services": lambda: slow(2),
+            "deployments": lambda: slow(3)
+        }, timeout=2)
+
+        assert time.monotonic() - start < 0.5
+        assert results == {"pods": 1, "services": 2, "deployments": 3}
+        assert errors == {}
+
+    def test_partial_results_on_timeout_and_error(self):
+        """Slow and failing calls are marked, the rest are returned"""
+        def failing():
+            raise RuntimeError("forbidden")
+
+        results, errors = fan_out({
+            "pods": lambda: [1],
+            "services": lambda: time.sleep(1),
+            "deployments": failing
+        }, timeout=0.2)
+
+        assert results == {"pods": [1]}
+        assert errors == {"services": TIMEOUT, "deployments": "forbidden"}
+
+    def test_async_variant(self):
+        """Coroutines follow the same results/errors contract"""
+        async def value(v, delay=0):
+            await asyncio.sleep(delay)
+            return v
+
+        results, errors = asyncio.run(fan_out_async({
+            "fast": value(1),
+            "slow": value(2, delay=1)
+        }, timeout=0.1))
+
+        assert results == {"fast": 1}
+        assert errors == {"slow": TIMEOUT}
+
+    def test_shares_the_k8s_pool(self):
+        """Fanned out calls run on the same bounded pool as awaited ones"""
+        results, _ = fan_out({"thread": lambda: threading.current_thread().name})
+        assert results["thread"].startswith("k8s-io")
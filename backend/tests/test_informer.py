@@ -0,0 +1,92 @@
+import pytest
+from types import SimpleNamespace
+from unittest.mock import patch, MagicMock
+from kubernetes.client.rest import ApiException
+
+from services.informer import Informer
+
+
+def make_obj(name, namespace="default", resource_version="1", phase="Running"):
+    return SimpleNamespace(
+        metadata=SimpleNamespace(name=name, namespace=namespace, resource_version=resource_version),
+        status=SimpleNamespace(phase=phase)
+    )
+
+def make_list(items, resource_version="100"):
+    return SimpleNamespace(items=items, metadata=SimpleNamespace(resource_version=resource_version))
+
+def transform(obj):
+    return {"name": obj.metadata.name, "namespace": obj.metadata.namespace, "status": obj.status.phase}
+
+
+class TestInformerStore:
+    """Test informer list and event handling"""
+
+    def test_relist_populates_store(self):
+        """Initial LIST fills the store and records the resourceVersion"""
+        list_func = MagicMock(return_value=make_list([make_obj("a"), make_obj("b", "kube-system")]))
+        informer = Informer("pods", list_func, transform)
+
+        informer._relist()
+
+        assert informer.has_synced()
+        assert informer.resource_version == "100"
+        assert len(informer.list()) == 2
+        assert [p["name"] for p in informer.list("kube-system")] == ["b"]
+        assert informer.list("missing") == []
+
+    def test_events_update_store(self):
+        """ADDED, MODIFIED and DELETED events are applied in place"""
+        informer = Informer("pods", MagicMock(return_value=make_list([make_obj("a")])), transform)
+        informer._relist()
+
+        informer._handle_event({"type": "ADDED", "object": make_obj("b", resource_version="101")})
+        informer._handle_event({"type": "MODIFIED", "object": make_obj("a", resource_version="102", phase="Failed")})
+        assert {p["name"]: p["status"] for p in informer.list()} == {"a": "Failed", "b": "Running"}
+
+        informer._handle_event({"type": "DELETED", "object": make_obj("a", resource_version="103")})
+        assert [p["name"] for p in informer.list()] == ["b"]
+        assert informer.resource_version == "103"
+
+    def test_removed_handler_gets_no_events(self):
+        """remove_handler detaches a handler registered with add_handler"""
+        informer = Informer("pods", MagicMock(return_value=make_list([make_obj("a")])), transform)
+        informer._relist()
+        events = []
+        handler = lambda event_type, old, new: events.append((event_type, (new or old)["name"]))
+        informer.add_handler(handler)
+        informer.remove_handler(handler)
+
+        informer._handle_event({"type": "ADDED", "object": make_obj("b", resource_version="101")})
+        assert events == [("ADDED", "a")]
+
+    def test_bookmark_advances_resource_version(self):
+        """BOOKMARK events only move the resourceVersion forward"""
+        informer = Informer("pods", MagicMock(return_value=make_list([make_obj("a")])), transform)
+        informer._relist()
+
+        informer._handle_event({"type": "BOOKMARK", "raw_object": {"metadata": {"resourceVersion": "250"}}})
+
+        assert informer.resource_version == "250"
+        assert len(informer.list()) == 1
+
+    def test_relist_after_gone(self):
+        """A 410 from the watch triggers a fresh LIST"""
+        list_func = MagicMock(side_effect=[
+            make_list([make_obj("a")], "100"),
+            make_list([make_obj("c")], "300")
+        ])
+        informer = Informer("pods", list_func, transform)
+        calls = []
+
+        def fake_watch():
+            calls.append(informer.resource_version)
+            if len(calls) == 1:
+                raise ApiException(status=410, reason="Expired")
+            informer.stop()
+
+        with patch.object(informer, "_watch", side_effect=fake_watch):
+            informer._run()
+
+        assert calls == ["100", "300"]
+        assert [p["name"] for p in informer.list()] == ["c"]
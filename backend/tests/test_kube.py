@@ -0,0 +1,168 @@
+import json
+import pytest
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+from kubernetes.client.rest import ApiException
+
+from services.kube import (
+    CursorError, PARTIAL_METADATA_ACCEPT, TABLE_ACCEPT, decode_cursor, encode_cursor, iter_pods,
+    list_metadata, list_pods, list_pods_page
+)
+
+
+def make_pod(name, namespace="prod"):
+    return SimpleNamespace(
+        metadata=SimpleNamespace(name=name, namespace=namespace, uid=f"uid-{name}", creation_timestamp=datetime(2024, 1, 1),
+                                 labels={"app": "web"}, annotations={}),
+        status=SimpleNamespace(phase="Running")
+    )
+
+def make_page(names, continue_token=None):
+    return SimpleNamespace(items=[make_pod(name) for name in names], metadata=SimpleNamespace(_continue=continue_token))
+
+def metadata(name, **extra):
+    return {"name": name, "namespace": "prod", "uid": f"uid-{name}", "creationTimestamp": "2024-01-01T00:00:00Z", **extra}
+
+def make_api(body):
+    """Typed API whose raw call_api answers with body"""
+    response = MagicMock(data=json.dumps(body).encode())
+    api = MagicMock()
+    api.api_client.call_api.return_value = response
+    return api, response
+
+
+@pytest.fixture
+def table_body():
+    return {
+        "kind": "Table",
+        "apiVersion": "meta.k8s.io/v1",
+        "columnDefinitions": [{"name": "Name"}, {"name": "Ready"}, {"name": "Status"}, {"name": "Restarts"}],
+        "rows": [
+            {"cells": ["web-1", "1/1", "Running", 0], "object": {"metadata": metadata("web-1", labels={"app": "web"})}},
+            {"cells": ["web-2", "0/1", "CrashLoopBackOff", 7], "object": {"metadata": metadata("web-2")}}
+        ]
+    }
+
+@pytest.fixture
+def partial_metadata_body():
+    return {
+        "kind": "PartialObjectMetadataList",
+        "apiVersion": "meta.k8s.io/v1",
+        "items": [{"metadata": metadata("web-1", annotations={"team": "a"})}]
+    }
+
+@pytest.fixture
+def full_object_body():
+    """What a server that ignores the Accept header returns"""
+    return {
+        "kind": "PodList",
+        "apiVersion": "v1",
+        "items": [{"metadata": metadata("web-1"), "spec": {"containers": []}, "status": {"phase": "Pending"}}]
+    }
+
+
+class TestCursors:
+    """Test the opaque cursor wrapping apiserver continue tokens"""
+
+    def test_round_trip(self):
+        token = "eyJ2IjoibWV0YS5rOHMuaW8vdjEiLCJydiI6MTIzfQ=="
+        cursor = encode_cursor(token)
+        assert "=" not in cursor
+        assert decode_cursor(cursor) == token
+        assert encode_cursor(None) is None and decode_cursor("") is None
+
+    @pytest.mark.parametrize("cursor", ["not a cursor", "abc/def", "a", "_-8"])
+    def test_malformed_cursor(self, cursor):
+        with pytest.raises(CursorError):
+            decode_cursor(cursor)
+
+
+class TestPagination:
+    """Test page listing and page-by-page iteration"""
+
+    def test_page_and_next_cursor(self):
+        api = MagicMock()
+        api.list_namespaced_pod.return_value = make_page(["a", "b"], "token-2")
+        pods, cursor = list_pods_page(api, "prod", limit=2, cursor=encode_cursor("token-1"), label_selector="app=web")
+
+        assert [pod.name for pod in pods] == ["a", "b"]
+        assert decode_cursor(cursor) == "token-2"
+        api.list_namespaced_pod.assert_called_once_with("prod", limit=2, _continue="token-1", label_selector="app=web")
+
+    def test_iter_pods_follows_cursors(self):
+        api = MagicMock()
+        api.list_namespaced_pod.side_effect = [make_page(["a", "b"], "token-2"), make_page(["c"])]
+        assert [pod.name for pod in iter_pods(api, "prod", page_size=2)] == ["a", "b", "c"]
+        assert api.list_namespaced_pod.call_args_list[1].kwargs["_continue"] == "token-2"
+
+    def test_apiserver_errors_propagate(self):
+        """A failed page raises instead of looking like the last page"""
+        api = MagicMock()
+        api.list_namespaced_pod.side_effect = [make_page(["a"], "token-2"), ApiException(status=500, reason="Internal Server Error")]
+        pods = iter_pods(api, "prod")
+        assert next(pods).name == "a"
+        with pytest.raises(ApiException):
+            next(pods)
+
+        api.list_namespaced_pod.side_effect = ApiException(status=410, reason="Gone")
+        with pytest.raises(ApiException) as e:
+            list_pods_page(api, "prod", cursor=encode_cursor("expired"))
+        assert e.value.status == 410
+
+
+class TestMetadataListing:
+    """Test listing metadata as a Table or PartialObjectMetadataList"""
+
+    def test_table(self, table_body):
+        api, response = make_api(table_body)
+        items = list_metadata(api, "/api/v1/namespaces/prod/pods", labelSelector="app=web", fieldSelector=None)
+
+        assert [(item["name"], item["status"]) for item in items] == [("web-1", "Running"), ("web-2", "CrashLoopBackOff")]
+        assert items[0] == {
+            "name": "web-1", "namespace": "prod", "uid": "uid-web-1", "creation_timestamp": "2024-01-01T00:00:00Z",
+            "status": "Running", "labels": {"app": "web"}, "annotations": {}
+        }
+        args, kwargs = api.api_client.call_api.call_args
+        assert args == ("/api/v1/namespaces/prod/pods", "GET")
+        assert kwargs["header_params"] == {"Accept": TABLE_ACCEPT}
+        assert kwargs["query_params"] == [("labelSelector", "app=web"), ("includeObject", "Metadata")]
+        response.release_conn.assert_called_once()
+
+    def test_table_without_status_column(self, table_body):
+        table_body["columnDefinitions"] = [{"name": "Name"}, {"name": "Age"}]
+        api, _ = make_api(table_body)
+        assert [item["status"] for item in list_metadata(api, "/api/v1/namespaces")] == ["Unknown", "Unknown"]
+
+    def test_partial_object_metadata(self, partial_metadata_body):
+        api, _ = make_api(partial_metadata_body)
+        items = list_metadata(api, "/api/v1/namespaces/prod/pods", as_table=False)
+
+        assert items == [{
+            "name": "web-1", "namespace": "prod", "uid": "uid-web-1", "creation_timestamp": "2024-01-01T00:00:00Z",
+            "status": "Unknown", "labels": {}, "annotations": {"team": "a"}
+        }]
+        kwargs = api.api_client.call_api.call_args.kwargs
+        assert kwargs["header_params"] == {"Accept": PARTIAL_METADATA_ACCEPT}
+        assert kwargs["query_params"] == []
+
+    def test_full_objects_fallback(self, full_object_body):
+        """A server ignoring the Accept header still yields items, status from the phase"""
+        api, _ = make_api(full_object_body)
+        items = list_metadata(api, "/api/v1/namespaces/prod/pods")
+        assert [(item["name"], item["status"]) for item in items] == [("web-1", "Pending")]
+
+    def test_list_pods_metadata_only(self, table_body):
+        api, _ = make_api(table_body)
+        pods = list_pods(api, "prod", metadata_only=True)
+
+        assert [(pod.name, pod.kind, pod.status) for pod in pods] == [("web-1", "Pod", "Running"), ("web-2", "Pod", "CrashLoopBackOff")]
+        api.list_namespaced_pod.assert_not_called()
+
+    def test_list_pods_without_raw_client(self):
+        """Clients without call_api, e.g. the mock client, fall back to typed listing"""
+        api = SimpleNamespace(list_namespaced_pod=MagicMock(return_value=make_page(["a"])))
+        pods = list_pods(api, "prod", metadata_only=True, label_selector="app=web")
+
+        assert [(pod.name, pod.status) for pod in pods] == [("a", "Running")]
+        api.list_namespaced_pod.assert_called_once_with("prod", label_selector="app=web")
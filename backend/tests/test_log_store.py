@@ -0,0 +1,154 @@
+import os
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from services import log_store
+from services.log_store import LogCapture, LogStore, timestamp_seconds
+from services.logs import normalize_timestamp
+
+
+def ts(minute, second=0):
+    return normalize_timestamp(f"2024-01-01T00:{minute:02d}:{second:02d}Z")
+
+
+def line(minute, message, pod="web-1", container="app", second=0):
+    return {"timestamp": ts(minute, second), "namespace": "prod", "pod": pod, "container": container, "message": message}
+
+
+class Clock:
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class TestLogStore:
+    """Test block writes, indexed reads and retention"""
+
+    def test_query_reads_only_matching_blocks(self, tmp_path, monkeypatch):
+        store = LogStore(str(tmp_path), block_bytes=200)
+        for minute in range(30):
+            store.append(line(minute, f"web {minute}"))
+            store.append(line(minute, f"db {minute}", pod="db-0"))
+        store.flush(force=True)
+
+        decompressed = []
+        original = log_store._decompress
+        monkeypatch.setattr(log_store, "_decompress", lambda codec, data: decompressed.append(data) or original(codec, data))
+
+        lines = store.query(pod="db-0", start=ts(10), end=ts(12))
+        assert [l["message"] for l in lines] == ["db 10", "db 11"]
+        assert lines[0]["container"] == "app"
+        assert 0 < len(decompressed) < store.stats()["blocks"] // 4
+
+    def test_limit_returns_newest_lines_oldest_first(self, tmp_path):
+        store = LogStore(str(tmp_path), block_bytes=100)
+        for minute in range(20):
+            store.append(line(minute, str(minute)))
+        store.flush(force=True)
+        assert [l["message"] for l in store.query(namespace="prod", limit=3)] == ["17", "18", "19"]
+        assert store.query(namespace="other") == []
+
+    def test_buffers_flush_after_interval(self, tmp_path):
+        clock = Clock(1000)
+        store = LogStore(str(tmp_path), flush_seconds=10, clock=clock)
+        store.append(line(0, "buffered"))
+        store.flush()
+        assert store.query() == []
+        clock.now += 10
+        store.flush()
+        assert [l["message"] for l in store.query()] == ["buffered"]
+
+    def test_index_survives_restart(self, tmp_path):
+        store = LogStore(str(tmp_path))
+        store.append(line(1, "kept"))
+        store.flush(force=True)
+        # A torn index line from a crash is ignored
+        with open(next(tmp_path.glob("*.idx")), "a") as f:
+            f.write('{"namespace": "pr')
+
+        reopened = LogStore(str(tmp_path))
+        assert [l["message"] for l in reopened.query(pod="web-1")] == ["kept"]
+        assert reopened.size == store.size
+
+    def test_retention_by_age_and_size(self, tmp_path):
+        clock = Clock(0)
+        store = LogStore(str(tmp_path), segment_seconds=100, max_age_seconds=1000, max_bytes=10 ** 9, clock=clock)
+        for hour in range(5):
+            clock.now = hour * 100
+            store.append(line(hour, "x" * 1000))
+            store.flush(force=True)
+        assert store.stats()["partitions"] == 5
+
+        clock.now = 1250
+        store.enforce_retention()
+        assert sorted(store._index) == [200, 300, 400]
+
+        store.max_bytes = store._sizes[400] + 1
+        store.enforce_retention()
+        assert sorted(store._index) == [400]
+        assert sorted(os.listdir(tmp_path)) == ["400.idx", "400.seg"]
+        assert [l["message"] for l in store.query()] == ["x" * 1000]
+
+    def test_zlib_fallback(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(log_store, "zstandard", None)
+        store = LogStore(str(tmp_path))
+        store.append(line(0, "plain"))
+        store.flush(force=True)
+        assert store.stats()["codec"] == "zlib"
+        assert store.query()[0]["message"] == "plain"
+
+    def test_timestamp_seconds(self):
+        assert timestamp_seconds(normalize_timestamp("1970-01-01T00:01:00.5Z")) == pytest.approx(60.5)
+
+
+class FakeStream:
+    def __init__(self, lines):
+        self.lines = lines
+        self.closed = False
+
+    def __iter__(self):
+        return iter(self.lines)
+
+    def close(self):
+        self.closed = True
+
+
+class TestLogCapture:
+    """Test which containers are tailed and how restarts resume"""
+
+    def test_sync_tails_running_containers(self, tmp_path, monkeypatch):
+        opened = []
+
+        def open_stream(core_v1, namespace, pod, container, follow, tail_lines, since_seconds):
+            opened.append((pod, container, tail_lines, since_seconds))
+            return FakeStream([line(1, "first", pod, container), line(2, "second", pod, container)])
+
+        monkeypatch.setattr(log_store, "PodLogStream", open_stream)
+        k8s_service = MagicMock()
+        k8s_service.get_pods.return_value = [{"name": "web-1", "containers": ["app", "proxy"]}]
+        store = LogStore(str(tmp_path))
+        capture = LogCapture(k8s_service, store, ["prod"])
+
+        capture.sync()
+        for _, thread in capture._streams.values():
+            thread.join(1)
+        store.flush(force=True)
+        assert sorted(o[:3] for o in opened) == [("web-1", "app", 1000), ("web-1", "proxy", 1000)]
+        assert len(store.query(pod="web-1", container="app")) == 2
+        assert k8s_service.get_pods.call_args.kwargs["field_selector"] == "status.phase=Running"
+
+        # The ended stream is re-opened from the last captured line, which is not stored twice
+        capture.sync()
+        for _, thread in capture._streams.values():
+            thread.join(1)
+        store.flush(force=True)
+        assert opened[-1][2] is None and opened[-1][3] >= 1
+        assert len(store.query(pod="web-1", container="app")) == 2
+
+        k8s_service.get_pods.return_value = []
+        capture.sync()
+        assert capture._streams == {}
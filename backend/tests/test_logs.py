@@ -0,0 +1,207 @@
+import asyncio
+import json
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from k8s_service import K8sService
+from services.logs import LOG_SEARCH_MAX_LINE_LENGTH, LOG_TAIL_MAX_LINES, LogMultiplexer, LogSearch, PodLogStream, extract_level, normalize_timestamp, read_batches
+
+
+def ts(second, fraction=""):
+    return f"2024-01-01T00:00:{second:02d}{fraction}Z"
+
+
+class FakeStream:
+    """Yields (timestamp, message) lines, optionally blocking before each one"""
+    def __init__(self, pod, lines, gate=None):
+        self.pod = pod
+        self.namespace = "default"
+        self.container = None
+        self.lines = lines
+        self.gate = gate
+        self.read = 0
+        self.closed = False
+
+    def __iter__(self):
+        for timestamp, message in self.lines:
+            if self.gate is not None:
+                self.gate.wait()
+            self.read += 1
+            yield {"timestamp": normalize_timestamp(timestamp), "pod": self.pod, "message": message}
+
+    def close(self):
+        self.closed = True
+
+
+class TestPodLogStream:
+    """Test chunked reading of one container log"""
+
+    def test_lines_split_across_chunks(self):
+        response = MagicMock()
+        response.stream.return_value = iter([
+            b"2024-01-01T00:00:01.5Z first\n2024-01-01T00:00:02Z sec",
+            b"ond\r\n2024-01-01T00:00:03Z third"
+        ])
+        core_v1 = MagicMock()
+        core_v1.read_namespaced_pod_log.return_value = response
+
+        lines = list(PodLogStream(core_v1, "prod", "web-1", "app", follow=True, tail_lines=10))
+
+        assert [line["message"] for line in lines] == ["first", "second", "third"]
+        assert lines[0]["timestamp"] == "2024-01-01T00:00:01.500000000Z"
+        assert lines[0]["container"] == "app"
+        kwargs = core_v1.read_namespaced_pod_log.call_args.kwargs
+        assert kwargs["follow"] and kwargs["timestamps"] and kwargs["tail_lines"] == 10
+        assert not kwargs["_preload_content"]
+        response.release_conn.assert_called_once()
+
+    def test_normalized_timestamps_sort(self):
+        assert normalize_timestamp(ts(1)) < normalize_timestamp(ts(1, ".1"))
+        assert normalize_timestamp(ts(1, ".45")) < normalize_timestamp(ts(1, ".5"))
+
+
+class TestLogMultiplexer:
+    """Test merging, reordering and backpressure"""
+
+    def test_merges_by_timestamp(self):
+        streams = [
+            FakeStream("a", [(ts(1), "a1"), (ts(4), "a4"), (ts(5), "a5")]),
+            FakeStream("b", [(ts(2), "b2"), (ts(3), "b3"), (ts(6), "b6")])
+        ]
+        messages = [line["message"] for line in LogMultiplexer(streams).start()]
+        assert messages == ["a1", "b2", "b3", "a4", "a5", "b6"]
+        assert all(stream.closed for stream in streams)
+
+    def test_idle_stream_does_not_block(self):
+        """A followed pod with no output holds others back for at most reorder_seconds"""
+        idle = threading.Event()
+        streams = [FakeStream("busy", [(ts(1), "x")]), FakeStream("idle", [(ts(0), "late")], gate=idle)]
+        logs = LogMultiplexer(streams, reorder_seconds=0.05).start()
+
+        start = time.monotonic()
+        assert [line["message"] for line in logs.read(timeout=1)] == ["x"]
+        assert time.monotonic() - start < 0.5
+        idle.set()
+        logs.close()
+
+    def test_slow_consumer_stops_reading(self):
+        """Readers stop once their buffer is full instead of buffering the whole log"""
+        stream = FakeStream("a", [(ts(n % 60), str(n)) for n in range(10000)])
+        logs = LogMultiplexer([stream], queue_lines=10).start()
+        time.sleep(0.1)
+        assert stream.read <= 11
+
+        assert len(logs.read(max_lines=5)) == 5
+        logs.close()
+        assert logs.read() is None
+
+    def test_stream_error_is_reported(self):
+        class Failing(FakeStream):
+            def __iter__(self):
+                raise RuntimeError("container not found")
+
+        lines = list(LogMultiplexer([Failing("a", [])]).start())
+        assert lines[0]["error"] == "container not found"
+
+    def test_read_batches(self):
+        streams = [FakeStream("a", [(ts(n), str(n)) for n in range(5)])]
+
+        async def collect():
+            logs = LogMultiplexer(streams).start()
+            return [line async for batch in read_batches(logs, max_lines=2) for line in batch]
+
+        assert [line["message"] for line in asyncio.run(collect())] == ["0", "1", "2", "3", "4"]
+
+
+def line(second, message):
+    return {"timestamp": normalize_timestamp(ts(second)), "pod": "a", "message": message}
+
+
+class TestTailLogs:
+    """Test the last-lines view over every pod of a namespace"""
+
+    def test_keeps_only_the_last_lines(self):
+        service = K8sService(None)
+        requested = {}
+
+        def stream_logs(namespace, pod_name=None, tail_lines=None):
+            requested["tail_lines"] = tail_lines
+            return LogMultiplexer([
+                FakeStream(pod, [(ts(second), f"ERROR {second}") for second in range(offset, 20, 2)])
+                for offset, pod in enumerate(("web-1", "web-2"))
+            ]).start()
+
+        service.stream_logs = stream_logs
+        logs = service.get_logs("prod", limit=3)
+        assert requested["tail_lines"] == 3
+        assert [(line["source"], line["message"]) for line in logs] == [("web-2", "ERROR 17"), ("web-1", "ERROR 18"), ("web-2", "ERROR 19")]
+        assert logs[0]["level"] == "ERROR"
+
+        service.get_logs("prod", limit=10 ** 9)
+        assert requested["tail_lines"] == LOG_TAIL_MAX_LINES
+
+
+class TestLogSearch:
+    """Test server-side filtering and budgets"""
+
+    def test_level_extraction(self):
+        assert extract_level("level=warn msg=retrying") == "WARN"
+        assert extract_level('{"level":"error","msg":"boom"}') == "ERROR"
+        assert extract_level("[INFO] started") == "INFO"
+        assert extract_level("E0102 15:04:05.000000 1 main.go:10] failed") == "ERROR"
+        assert extract_level("GET /healthz 200") is None
+
+    def test_substring_regex_and_levels(self):
+        lines = [line(1, "ERROR db timeout"), line(2, "INFO db ok"), line(3, "ERROR cache miss")]
+        assert LogSearch("DB").feed(lines).count("\n") == 2
+        assert LogSearch("DB", case_sensitive=True).feed(lines) == ""
+        assert LogSearch(r"db (timeout|ok)", regex=True, levels=["error"]).feed(lines).count("\n") == 1
+        matches = [json.loads(l) for l in LogSearch(levels=["ERROR"]).feed(lines).splitlines()]
+        assert [m["message"] for m in matches] == ["ERROR db timeout", "ERROR cache miss"]
+        assert matches[0]["level"] == "ERROR"
+
+    def test_time_window(self):
+        search = LogSearch(start=ts(2), end=ts(4))
+        output = search.feed([line(n, str(n)) for n in range(6)])
+        assert [json.loads(l)["message"] for l in output.splitlines()] == ["2", "3"]
+        assert search.stopped == "end"
+
+    def test_budgets(self):
+        lines = [line(n % 60, "x" * 100) for n in range(1000)]
+        search = LogSearch(max_lines=10)
+        assert search.feed(lines).count("\n") == 10
+        assert search.summary()["truncated"] and search.scanned == 10
+
+        search = LogSearch(max_bytes=1000)
+        output = search.feed(lines)
+        assert 0 < len(output) <= 1000
+        assert search.stopped == "max_bytes"
+        assert search.feed(lines) == ""
+
+    @pytest.mark.parametrize("query", ["(a+)+$", "(a*)*", r"(\w+\s?)*x", "(x+x+){2,}y", "(a{1,9})+"])
+    def test_nested_quantifiers_are_rejected(self, query):
+        with pytest.raises(ValueError, match="Nested quantifiers"):
+            LogSearch(query, regex=True)
+
+    @pytest.mark.parametrize("query", [r"timeout after \d+ms", "(GET|POST) /api", r"\(a+\)+", "(ab)+c"])
+    def test_other_patterns_are_accepted(self, query):
+        LogSearch(query, regex=True)
+        # Substring queries are escaped, so nothing is rejected
+        LogSearch("(a+)+$")
+
+    def test_regex_only_scans_the_start_of_long_lines(self):
+        search = LogSearch("needle", regex=True)
+        assert search.match({"message": "x" * 100 + "needle"})
+        assert not search.match({"message": "x" * LOG_SEARCH_MAX_LINE_LENGTH + "needle"})
+        assert LogSearch("needle").match({"message": "x" * LOG_SEARCH_MAX_LINE_LENGTH + "needle"})
+
+    def test_invalid_queries(self):
+        with pytest.raises(ValueError):
+            LogSearch("(unclosed", regex=True)
+        with pytest.raises(ValueError):
+            LogSearch("x" * 1000)
+        with pytest.raises(ValueError):
+            LogSearch(levels=["LOUD"])
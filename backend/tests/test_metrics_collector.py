@@ -0,0 +1,125 @@
+import pytest
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+from services.informer import Informer
+from services.metrics_collector import MetricsCollector, StatusCounter, quantity
+
+
+def make_pod(name, phase, namespace="default", resource_version="1"):
+    return SimpleNamespace(
+        metadata=SimpleNamespace(name=name, namespace=namespace, resource_version=resource_version),
+        status=SimpleNamespace(phase=phase)
+    )
+
+def make_list(items, resource_version="100"):
+    return SimpleNamespace(items=items, metadata=SimpleNamespace(resource_version=resource_version))
+
+def pod_transform(obj):
+    return {"name": obj.metadata.name, "namespace": obj.metadata.namespace, "status": obj.status.phase}
+
+
+class TestStatusCounter:
+    """Test incremental phase counting from informer events"""
+
+    def test_counts_follow_events(self):
+        """Counts are updated per event without rescanning the store"""
+        informer = Informer("pods", MagicMock(return_value=make_list([
+            make_pod("a", "Running"), make_pod("b", "Pending")
+        ])), pod_transform)
+        counter = StatusCounter()
+        informer.add_handler(counter)
+        informer._relist()
+        assert counter.counts() == {"Running": 1, "Pending": 1}
+
+        informer._handle_event({"type": "MODIFIED", "object": make_pod("b", "Running", resource_version="101")})
+        informer._handle_event({"type": "ADDED", "object": make_pod("c", "Failed", resource_version="102")})
+        informer._handle_event({"type": "DELETED", "object": make_pod("a", "Running", resource_version="103")})
+
+        assert counter.counts() == {"Running": 1, "Failed": 1}
+        assert counter.total() == 2
+
+    def test_resync_and_late_registration(self):
+        """A relist resets the counts and a late handler is replayed the store"""
+        informer = Informer("pods", MagicMock(return_value=make_list([make_pod("a", "Running")])), pod_transform)
+        informer._relist()
+
+        counter = StatusCounter()
+        informer.add_handler(counter)
+        assert counter.counts() == {"Running": 1}
+
+        informer._list_func.return_value = make_list([make_pod("x", "Pending"), make_pod("y", "Pending")])
+        informer._relist()
+        assert counter.counts() == {"Pending": 2}
+
+
+class TestMetricsCollector:
+    """Test metrics.k8s.io polling and snapshots"""
+
+    def make_collector(self, custom_api):
+        pods = Informer("pods", MagicMock(return_value=make_list([
+            make_pod("a", "Running"), make_pod("b", "Pending")
+        ])), pod_transform)
+        nodes = Informer("nodes", MagicMock(return_value=make_list([make_pod("n1", "Ready", namespace=None)])),
+                         lambda obj: {"name": obj.metadata.name, "status": obj.status.phase,
+                                      "cpu_allocatable": 4.0, "memory_allocatable": 8 * 1024 ** 3})
+        pods._relist()
+        nodes._relist()
+        collector = MetricsCollector(MagicMock(), pods, nodes)
+        collector._custom_api = custom_api
+        return collector
+
+    def test_usage_against_allocatable(self):
+        """Node usage is reported as a percentage of allocatable capacity"""
+        custom_api = MagicMock()
+        custom_api.list_cluster_custom_object.side_effect = [
+            {"items": [{"metadata": {"name": "n1"}, "usage": {"cpu": "1", "memory": "2Gi"}}]},
+            {"items": [{"metadata": {"name": "a", "namespace": "default"},
+                        "containers": [{"usage": {"cpu": "250m", "memory": "128Mi"}}]}]}
+        ]
+        collector = self.make_collector(custom_api)
+
+        collector.poll()
+        snapshot = collector.snapshot()
+
+        assert snapshot["cpu_usage"] == 25.0
+        assert snapshot["memory_usage"] == 25.0
+        assert snapshot["metrics_available"] is True
+        assert snapshot["nodes"] == {"total": 1, "ready": 1}
+        assert snapshot["pods"]["running"] == 1 and snapshot["pods"]["pending"] == 1
+
+    def test_metrics_server_missing(self):
+        """Without metrics-server the counts are still served"""
+        from kubernetes.client.rest import ApiException
+        custom_api = MagicMock()
+        custom_api.list_cluster_custom_object.side_effect = ApiException(status=404, reason="Not Found")
+        collector = self.make_collector(custom_api)
+
+        collector.poll()
+        snapshot = collector.snapshot()
+
+        assert snapshot["metrics_available"] is False
+        assert snapshot["cpu_usage"] is None
+        assert snapshot["pods"]["total"] == 2
+
+    def test_failed_counts_only_failed_pods(self):
+        """Succeeded pods, e.g. completed Jobs, are not counted as failed"""
+        collector = self.make_collector(MagicMock())
+        collector.pod_phases("ADDED", None, {"name": "job-1", "namespace": "default", "status": "Succeeded"})
+        collector.pod_phases("ADDED", None, {"name": "bad", "namespace": "default", "status": "Failed"})
+        assert collector.snapshot()["pods"]["failed"] == 1
+
+    def test_evaluates_when_sample_fails(self):
+        """Alert rules are evaluated even when sampling raises"""
+        custom_api = MagicMock()
+        custom_api.list_cluster_custom_object.side_effect = ConnectionError("apiserver unreachable")
+        collector = self.make_collector(custom_api)
+        collector.alerts = MagicMock()
+        with pytest.raises(ConnectionError):
+            collector.poll()
+        collector.alerts.evaluate.assert_called_once()
+
+    def test_quantity(self):
+        assert quantity("250m") == 0.25
+        assert quantity("1Ki") == 1024
+        assert quantity(None) == 0.0
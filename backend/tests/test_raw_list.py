@@ -0,0 +1,77 @@
+import json
+import pytest
+from unittest.mock import MagicMock
+from kubernetes.client import ApiClient
+
+from k8s_service import namespace_to_dict, pod_to_dict, service_to_dict, deployment_to_dict
+from services.raw_list import (
+    list_projected, raw_namespace_to_dict, raw_pod_to_dict,
+    raw_service_to_dict, raw_deployment_to_dict
+)
+
+POD = {
+    "metadata": {"name": "web-1", "namespace": "prod", "creationTimestamp": "2024-01-01T10:00:00Z", "labels": {"app": "web"}},
+    "spec": {"nodeName": "node-1", "containers": [{"name": "app", "image": "nginx"}, {"name": "proxy", "image": "envoy"}]},
+    "status": {"phase": "Running", "containerStatuses": [
+        {"name": "app", "ready": True, "restartCount": 2, "image": "nginx", "imageID": ""},
+        {"name": "proxy", "ready": False, "restartCount": 1, "image": "envoy", "imageID": ""}
+    ]}
+}
+PENDING_POD = {
+    "metadata": {"name": "web-2", "namespace": "prod"},
+    "spec": {"containers": [{"name": "app", "image": "nginx"}]},
+    "status": {"phase": "Pending"}
+}
+SERVICE = {
+    "metadata": {"name": "web", "namespace": "prod", "creationTimestamp": "2024-01-01T10:00:00Z"},
+    "spec": {"type": "ClusterIP", "clusterIP": "10.96.0.10", "externalIPs": ["1.2.3.4"],
+             "ports": [{"port": 80, "targetPort": 8080, "protocol": "TCP"}, {"port": 443, "targetPort": "https", "protocol": "TCP"}],
+             "selector": {"app": "web"}}
+}
+DEPLOYMENT = {
+    "metadata": {"name": "web", "namespace": "prod", "creationTimestamp": "2024-01-01T10:00:00Z", "labels": {"app": "web"}},
+    "spec": {"replicas": 3, "selector": {"matchLabels": {"app": "web"}}, "strategy": {"type": "Recreate"},
+             "template": {"spec": {"containers": [{"name": "app", "image": "nginx"}]}}},
+    "status": {"readyReplicas": 2, "availableReplicas": 2}
+}
+NAMESPACE = {"metadata": {"name": "prod", "creationTimestamp": "2024-01-01T10:00:00Z"}, "status": {"phase": "Active"}}
+
+
+class FakeResponse:
+    def __init__(self, body):
+        self.data = json.dumps(body).encode()
+
+    def release_conn(self):
+        pass
+
+
+def deserialize(body, kind):
+    return ApiClient().deserialize(FakeResponse(body), kind)
+
+
+class TestRawProjection:
+    """The raw fast path must produce exactly what the model path does"""
+
+    @pytest.mark.parametrize("body,kind,model_fn,raw_fn", [
+        (POD, "V1Pod", pod_to_dict, raw_pod_to_dict),
+        (PENDING_POD, "V1Pod", pod_to_dict, raw_pod_to_dict),
+        (SERVICE, "V1Service", service_to_dict, raw_service_to_dict),
+        (DEPLOYMENT, "V1Deployment", deployment_to_dict, raw_deployment_to_dict),
+        (NAMESPACE, "V1Namespace", namespace_to_dict, raw_namespace_to_dict),
+    ])
+    def test_matches_model_path(self, body, kind, model_fn, raw_fn):
+        assert raw_fn(body) == model_fn(deserialize(body, kind))
+
+    def test_list_projected(self):
+        """List metadata is carried through and content is not preloaded"""
+        list_func = MagicMock(return_value=FakeResponse({
+            "metadata": {"continue": "abc", "resourceVersion": "42"},
+            "items": [POD, PENDING_POD]
+        }))
+
+        result = list_projected(list_func, raw_pod_to_dict, "prod", limit=2)
+
+        list_func.assert_called_once_with("prod", _preload_content=False, limit=2)
+        assert [p["name"] for p in result["items"]] == ["web-1", "web-2"]
+        assert result["continue"] == "abc"
+        assert result["resource_version"] == "42"
@@ -0,0 +1,97 @@
+import pytest
+from unittest.mock import MagicMock
+
+from services.informer import Informer
+from services.selectors import (
+    parse_label_selector,
+    parse_field_selector,
+    selector_predicate,
+    selector_kwargs,
+    validate_selectors,
+    SelectorError,
+    UnsupportedSelector
+)
+
+
+PODS = [
+    {"name": "web-1", "namespace": "prod", "status": "Running", "node": "n1", "labels": {"app": "web", "tier": "frontend"}},
+    {"name": "web-2", "namespace": "prod", "status": "Pending", "node": "n2", "labels": {"app": "web"}},
+    {"name": "db-1", "namespace": "prod", "status": "Running", "node": "n1", "labels": {"app": "db", "tier": "backend"}},
+    {"name": "job-1", "namespace": "batch", "status": "Succeeded", "node": None, "labels": {}}
+]
+
+
+class TestLabelSelector:
+    """Test label selector parsing"""
+
+    def test_equality_and_set_requirements(self):
+        """=, ==, !=, in, notin, existence and !key follow apiserver semantics"""
+        def names(selector):
+            match = parse_label_selector(selector)
+            return [pod["name"] for pod in PODS if match(pod["labels"])]
+
+        assert names("app=web") == ["web-1", "web-2"]
+        assert names("app==db") == ["db-1"]
+        assert names("app!=web") == ["db-1", "job-1"]
+        assert names("app in (web, db),tier") == ["web-1", "db-1"]
+        assert names("tier notin (frontend)") == ["web-2", "db-1", "job-1"]
+        assert names("!app") == ["job-1"]
+
+    def test_malformed_selector(self):
+        """Unbalanced parentheses are rejected"""
+        with pytest.raises(SelectorError):
+            parse_label_selector("app in (web")
+
+
+class TestFieldSelector:
+    """Test field selector parsing"""
+
+    def test_known_fields(self):
+        """Cached dict fields are matched through their metadata/status paths"""
+        match = parse_field_selector("status.phase=Running,spec.nodeName!=n2")
+        assert [pod["name"] for pod in PODS if match(pod)] == ["web-1", "db-1"]
+
+    def test_unknown_field_is_unsupported(self):
+        """Fields the cache does not carry must go to the apiserver"""
+        with pytest.raises(UnsupportedSelector):
+            parse_field_selector("spec.restartPolicy=Always")
+
+
+class TestValidation:
+    """Test up-front validation of request selectors"""
+
+    @pytest.mark.parametrize("label_selector, field_selector", [
+        ("app in (web", None),
+        (None, "status.phase"),
+        (None, "status.phase=Running,(")
+    ])
+    def test_malformed_selectors(self, label_selector, field_selector):
+        with pytest.raises(SelectorError):
+            validate_selectors(label_selector, field_selector)
+
+    def test_valid_and_apiserver_only_selectors(self):
+        validate_selectors("app=web", "status.phase=Running")
+        validate_selectors(None, "spec.restartPolicy=Always")
+        validate_selectors()
+
+
+class TestSelectorPushdown:
+    """Test selectors reaching the informer cache and the client"""
+
+    def test_informer_list_filters_by_predicate(self):
+        """The informer applies namespace and selectors on its own store"""
+        informer = Informer("pods", MagicMock(), lambda obj: obj)
+        for pod in PODS:
+            informer._store.setdefault(pod["namespace"], {})[pod["name"]] = pod
+
+        predicate = selector_predicate("app=web", "status.phase=Running")
+        assert [pod["name"] for pod in informer.list("prod", predicate)] == ["web-1"]
+        assert selector_predicate(None, None) is None
+
+    def test_selector_kwargs_only_set_values(self):
+        """Empty selectors are not forwarded to the client"""
+        assert selector_kwargs(None, "") == {}
+        assert selector_kwargs("app=web", "status.phase=Running") == {
+            "label_selector": "app=web",
+            "field_selector": "status.phase=Running"
+        }
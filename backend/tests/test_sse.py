@@ -0,0 +1,81 @@
+import asyncio
+
+from services.sse import EventChannel, format_event, parse_event_id
+
+
+def events_in(chunks):
+    """(id, event, data) of each message in a list of stream chunks"""
+    parsed = []
+    for chunk in chunks:
+        fields = dict(line.split(": ", 1) for line in chunk.strip().split("\n") if line.startswith(("id:", "event:", "data:")))
+        if "id" in fields:
+            parsed.append((int(fields["id"]), fields["event"], fields["data"]))
+    return parsed
+
+
+async def take(stream, count):
+    return [await stream.__anext__() for _ in range(count)]
+
+
+class TestEventChannel:
+    """Test change detection, replay and resume"""
+
+    def test_format_event(self):
+        assert format_event(7, "stats", '{"a":\n1}') == 'id: 7\nevent: stats\ndata: {"a":\ndata: 1}\n\n'
+        assert parse_event_id("12") == 12
+        assert parse_event_id("bogus") is None and parse_event_id(None) is None
+
+    def test_unchanged_data_is_not_published(self):
+        channel = EventChannel()
+        assert channel.publish("stats", "1") is not None
+        assert channel.publish("stats", "1") is None
+        second = channel.publish("stats", "2")
+        assert channel.publish("activity", "x") > second
+
+    def test_first_connect_gets_current_state(self):
+        async def scenario():
+            channel = EventChannel()
+            channel.publish("stats", "1")
+            channel.publish("stats", "2")
+            channel.publish("activity", "a")
+            stream = channel.stream()
+            return await take(stream, 3)
+
+        chunks = asyncio.run(scenario())
+        assert chunks[0] == "retry: 3000\n\n"
+        assert [(event, data) for _, event, data in events_in(chunks)] == [("stats", "2"), ("activity", "a")]
+
+    def test_resume_replays_missed_events(self):
+        channel = EventChannel()
+        first = channel.publish("stats", "1")
+        channel.publish("stats", "2")
+        channel.publish("activity", "a")
+        assert [(e, d) for _, e, d in channel.since(first)] == [("stats", "2"), ("activity", "a")]
+        assert channel.since(channel.last_id) == []
+
+    def test_resume_after_eviction_gets_current_state(self):
+        channel = EventChannel(capacity=2)
+        first = channel.publish("stats", "1")
+        for n in range(2, 6):
+            channel.publish("stats", str(n))
+        assert [(e, d) for _, e, d in channel.since(first)] == [("stats", "5")]
+        # An id from another worker's future is not trusted either
+        assert [(e, d) for _, e, d in channel.since(channel.last_id + 10 ** 6)] == [("stats", "5")]
+
+    def test_live_updates_and_keepalive(self):
+        async def scenario():
+            channel = EventChannel(keepalive_seconds=0.05)
+            channel.publish("stats", "1")
+            stream = channel.stream()
+            initial = await take(stream, 2)
+            waiting = asyncio.ensure_future(stream.__anext__())
+            await asyncio.sleep(0)
+            channel.publish("stats", "2")
+            update = await waiting
+            keepalive = await stream.__anext__()
+            await stream.aclose()
+            return initial, update, keepalive
+
+        initial, update, keepalive = asyncio.run(scenario())
+        assert events_in([update])[0][1:] == ("stats", "2")
+        assert keepalive == ": keepalive\n\n"
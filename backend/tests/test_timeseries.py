@@ -0,0 +1,127 @@
+import numpy as np
+import pytest
+
+from services.timeseries import TimeSeriesStore, RingBuffer, Series
+
+T0 = 1_700_000_000 - 1_700_000_000 % 3600
+
+
+class TestRingBuffer:
+    """Test the fixed-size sample buffer"""
+
+    def test_wraps_and_keeps_order(self):
+        """Old samples are overwritten and ranges come back oldest first"""
+        ring = RingBuffer(4)
+        for i in range(6):
+            ring.append(T0 + i, i)
+
+        timestamps, values = ring.range(0, np.inf)
+        assert values.tolist() == [2, 3, 4, 5]
+        assert ring.range(T0 + 3, T0 + 5)[1].tolist() == [3, 4]
+
+
+class TestRollups:
+    """Test downsampled buckets"""
+
+    def test_rollup_min_max_avg_count(self):
+        """Each bucket keeps min, max, sum and count of its samples"""
+        series = Series(raw_capacity=100)
+        for i, value in enumerate([1, 5, 3, 7]):
+            series.add(T0 + i * 30, value)
+
+        buckets = series.rollups["1m"].range(T0, T0 + 120)
+        assert buckets["timestamps"].tolist() == [T0, T0 + 60]
+        assert buckets["min"].tolist() == [1, 3]
+        assert buckets["max"].tolist() == [5, 7]
+        assert buckets["count"].tolist() == [2, 2]
+        assert (buckets["sum"] / buckets["count"]).tolist() == [3, 5]
+
+    def test_out_of_order_samples_dropped(self):
+        """Samples older than the newest are ignored to keep buffers sorted"""
+        series = Series(raw_capacity=10)
+        series.add(T0 + 60, 1)
+        series.add(T0, 100)
+        assert series.raw.range(0, np.inf)[1].tolist() == [1]
+
+
+class TestResolution:
+    """Test choosing the rollup that serves a stepped query"""
+
+    def make_series(self):
+        # 1m kept for 5 buckets, 5m for 100; raw for 5 samples
+        series = Series(raw_capacity=5, rollups=[("1m", 60, 5), ("5m", 300, 100), ("1h", 3600, 100)])
+        for minute in range(30):
+            series.add(T0 + minute * 60, minute)
+        return series
+
+    def test_coarsest_divisible_rollup(self):
+        series = self.make_series()
+        assert series.resolution_for(None) is None
+        assert series.resolution_for(600, T0) is series.rollups["5m"]
+        assert series.resolution_for(60, T0 + 26 * 60) is series.rollups["1m"]
+        assert series.resolution_for(90, T0 + 26 * 60) is None
+
+    def test_window_past_retention(self):
+        """A step finer than what is retained for start uses the finest rollup reaching back"""
+        series = self.make_series()
+        assert series.resolution_for(60, T0) is series.rollups["5m"]
+        assert series.resolution_for(90, T0) is series.rollups["5m"]
+
+    def test_old_points_are_not_lost(self):
+        store = TimeSeriesStore()
+        store._series[("cpu", ())] = self.make_series()
+        timestamps, values = store.query("cpu", T0, T0 + 1800, step=60)
+        assert len(timestamps) == 30
+        # The 1m rollup no longer covers T0, so each 5m average fills one slot
+        assert values[[0, 5, 10, 15, 20]].tolist() == [2, 7, 12, 17, 22]
+        assert np.isnan(values[1])
+
+
+class TestTimeSeriesStore:
+    """Test range queries"""
+
+    def make_store(self, points=240, interval=30):
+        store = TimeSeriesStore()
+        for i in range(points):
+            store.record("cpu", i % 10, T0 + i * interval)
+        return store
+
+    def test_raw_query(self):
+        """Without a step the raw samples in the window are returned"""
+        store = self.make_store()
+        timestamps, values = store.query("cpu", T0, T0 + 300)
+        assert len(timestamps) == 10
+        assert values.tolist() == list(range(10))
+
+    def test_step_aligned_query(self):
+        """Stepped queries are aligned to multiples of the step"""
+        store = self.make_store()
+        timestamps, values = store.query("cpu", T0 + 10, T0 + 600, step=300, agg="max")
+        assert timestamps.tolist() == [T0, T0 + 300]
+        assert values.tolist() == [9, 9]
+
+        timestamps, values = store.query("cpu", T0, T0 + 120, step=60)
+        assert values.tolist() == [0.5, 2.5]
+
+    def test_gaps_are_nan(self):
+        """Buckets without samples are NaN, unknown series are all NaN"""
+        store = self.make_store(points=2)
+        timestamps, values = store.query("cpu", T0, T0 + 180, step=60)
+        assert values[0] == 0.5
+        assert np.isnan(values[1:]).all()
+        assert np.isnan(store.query("missing", T0, T0 + 180, step=60)[1]).all()
+
+    def test_labels_and_series_limit(self):
+        """Series are keyed by name and labels, and capped in number"""
+        store = TimeSeriesStore(max_series=2)
+        store.record("ns_cpu", 1, T0, {"namespace": "a"})
+        store.record("ns_cpu", 2, T0, {"namespace": "b"})
+        store.record("ns_cpu", 3, T0, {"namespace": "c"})
+
+        assert len(store) == 2
+        assert store.series("ns_cpu") == [{"namespace": "a"}, {"namespace": "b"}]
+        assert store.query("ns_cpu", T0, T0 + 1, labels={"namespace": "b"})[1].tolist() == [2]
+
+    def test_unsupported_aggregation(self):
+        with pytest.raises(ValueError):
+            TimeSeriesStore().query("cpu", T0, T0 + 60, step=60, agg="median")
@@ -0,0 +1,254 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import msgpack
+import pytest
+
+from services.informer import RESYNC
+from services.topics import TopicError, TopicFeed, _Source, merge_patch, parse_topic
+from services.ws_hub import WebSocketHub
+
+
+class FakeInformer:
+    def __init__(self, items):
+        self.items = {f"{i['namespace']}/{i['name']}": i for i in items}
+        self.handlers = []
+
+    def add_handler(self, handler):
+        self.handlers.append(handler)
+        for item in self.items.values():
+            handler("ADDED", None, item)
+
+    def remove_handler(self, handler):
+        self.handlers.remove(handler)
+
+    def list(self, namespace=None):
+        return [i for i in self.items.values() if namespace is None or i["namespace"] == namespace]
+
+    def emit(self, event_type, old, new):
+        item = new or old
+        if new is None:
+            self.items.pop(f"{item['namespace']}/{item['name']}", None)
+        else:
+            self.items[f"{item['namespace']}/{item['name']}"] = new
+        for handler in self.handlers:
+            handler(event_type, old, new)
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, message):
+        self.sent.append(json.loads(message))
+
+    async def send_bytes(self, message):
+        self.sent.append(msgpack.unpackb(message))
+
+
+def pod(name, namespace="prod", phase="Running", restarts=0):
+    return {"name": name, "namespace": namespace, "status": phase, "restarts": restarts}
+
+
+async def settle():
+    # Snapshots are built and encoded in worker threads
+    await asyncio.sleep(0.05)
+
+
+async def take_lease(feed):
+    """Flush the resync published when the feed first takes a watch lease"""
+    await feed.flush()
+    await settle()
+
+
+class TestTopicHelpers:
+    """Test topic parsing and merge patches"""
+
+    def test_parse_topic(self):
+        assert parse_topic("prod/pods") == ("prod", "pods", None)
+        assert parse_topic("prod/pods/web") == ("prod", "pods", "web")
+        for topic in ("prod", "prod/widgets", "prod/nodes/web", "prod//x"):
+            with pytest.raises(TopicError):
+                parse_topic(topic)
+
+    def test_sources_must_implement_snapshot(self):
+        class NoSnapshot(_Source):
+            def close(self):
+                pass
+
+        with pytest.raises(TypeError):
+            NoSnapshot(service=None)
+
+    def test_merge_patch(self):
+        old = {"status": "Pending", "labels": {"app": "web", "tier": "a"}, "ip": "10.0.0.1"}
+        new = {"status": "Running", "labels": {"app": "web"}, "node": "n1"}
+        assert merge_patch(old, new) == {"status": "Running", "labels": {"tier": None}, "ip": None, "node": "n1"}
+        assert merge_patch(new, new) == {}
+
+
+class TestTopicFeed:
+    """Test snapshots, coalesced deltas and namespace filtering"""
+
+    def make_feed(self, informer):
+        service = SimpleNamespace(informer=lambda kind, timeout=None: informer, alert_manager=lambda: None)
+        hub = WebSocketHub()
+        return hub, TopicFeed(hub, lambda cluster_id: service)
+
+    def test_snapshot_then_deltas(self):
+        informer = FakeInformer([pod("web-1"), pod("db-0", namespace="data")])
+
+        async def scenario():
+            hub, feed = self.make_feed(informer)
+            everything = await hub.connect(FakeWebSocket())
+            prod = await hub.connect(FakeWebSocket())
+            await feed.subscribe(everything, "c1/pods")
+            await feed.subscribe(prod, "c1/pods/prod")
+            await take_lease(feed)
+
+            # Ten updates of one pod between flushes collapse into one patch
+            for restarts in range(1, 11):
+                informer.emit("MODIFIED", informer.items["prod/web-1"], pod("web-1", restarts=restarts))
+            informer.emit("ADDED", None, pod("web-2"))
+            informer.emit("ADDED", None, pod("tmp", namespace="data"))
+            informer.emit("DELETED", pod("tmp", namespace="data"), None)
+            informer.emit("MODIFIED", pod("db-0", namespace="data"), pod("db-0", namespace="data"))
+            await feed.flush()
+            await settle()
+            return everything.websocket.sent, prod.websocket.sent
+
+        everything, prod = asyncio.run(scenario())
+        assert everything[0] == {"type": "snapshot", "topic": "c1/pods", "seq": 0, "items": [pod("web-1"), pod("db-0", namespace="data")]}
+        assert prod[0]["items"] == [pod("web-1")]
+        assert [m["type"] for m in everything] == [m["type"] for m in prod] == ["snapshot", "snapshot", "delta"]
+
+        delta = everything[-1]
+        assert delta["type"] == "delta" and delta["seq"] == 1
+        assert [(c["op"], c["key"]) for c in delta["changes"]] == [("modified", "prod/web-1"), ("added", "prod/web-2")]
+        assert delta["changes"][0]["patch"] == {"restarts": 10}
+        assert [c["key"] for c in prod[-1]["changes"]] == ["prod/web-1", "prod/web-2"]
+
+    def test_changes_during_snapshot_are_held(self):
+        informer = FakeInformer([pod("web-1")])
+
+        async def scenario():
+            hub, feed = self.make_feed(informer)
+            await feed.subscribe(await hub.connect(FakeWebSocket()), "c1/pods")
+            await take_lease(feed)
+            late = await hub.connect(FakeWebSocket())
+            hub.subscribe(late, "c1/pods", hold=True)
+            informer.emit("ADDED", None, pod("web-2"))
+            await feed.flush()
+            late.release("c1/pods", json.dumps({"type": "snapshot", "topic": "c1/pods", "seq": 0, "items": []}))
+            await settle()
+            return late.websocket.sent
+
+        sent = asyncio.run(scenario())
+        assert [m["type"] for m in sent] == ["snapshot", "delta"]
+        assert sent[1]["seq"] == 1
+
+    def test_resync_sends_snapshot(self):
+        informer = FakeInformer([pod("web-1")])
+
+        async def scenario():
+            hub, feed = self.make_feed(informer)
+            connection = await hub.connect(FakeWebSocket())
+            await feed.subscribe(connection, "c1/pods")
+            await take_lease(feed)
+            informer.emit("MODIFIED", pod("web-1"), pod("web-1", phase="Failed"))
+            for handler in informer.handlers:
+                handler(RESYNC, None, None)
+            informer.emit("ADDED", None, pod("web-1", phase="Failed"))
+            await feed.flush()
+            await settle()
+            return connection.websocket.sent
+
+        sent = asyncio.run(scenario())
+        assert [m["type"] for m in sent] == ["snapshot", "snapshot", "snapshot"]
+        assert sent[-1]["items"] == [pod("web-1", phase="Failed")]
+
+    def test_msgpack_subscriber(self):
+        informer = FakeInformer([pod("web-1")])
+
+        async def scenario():
+            hub, feed = self.make_feed(informer)
+            text = await hub.connect(FakeWebSocket())
+            binary = await hub.connect(FakeWebSocket(), encoding="msgpack")
+            await feed.subscribe(text, "c1/pods")
+            await feed.subscribe(binary, "c1/pods")
+            await take_lease(feed)
+            informer.emit("MODIFIED", pod("web-1"), pod("web-1", restarts=1))
+            await feed.flush()
+            await settle()
+            return text.websocket.sent, binary.websocket.sent
+
+        text, binary = asyncio.run(scenario())
+        assert text == binary
+        assert [m["type"] for m in binary] == ["snapshot", "snapshot", "delta"]
+        assert binary[-1]["changes"][0]["patch"] == {"restarts": 1}
+
+    def test_evicted_cluster_is_rewatched(self):
+        """Subscribers keep getting deltas from the client rebuilt after the cluster was evicted"""
+        clients = {}
+
+        def get_service(cluster_id):
+            # Like the registry: a client is built on first use after eviction
+            if cluster_id not in clients:
+                informer = FakeInformer([pod("web-1")])
+                clients[cluster_id] = SimpleNamespace(informer=lambda kind, timeout=None: informer, watched=informer)
+            return clients[cluster_id]
+
+        async def scenario():
+            hub = WebSocketHub()
+            feed = TopicFeed(hub, get_service, lease_seconds=0.03)
+            connection = await hub.connect(FakeWebSocket())
+            await feed.subscribe(connection, "c1/pods")
+            await take_lease(feed)
+            old = clients.pop("c1").watched
+
+            await asyncio.sleep(0.02)
+            await feed.flush()
+            await settle()
+            new = clients["c1"].watched
+            assert old.handlers == [] and len(new.handlers) == 1
+            new.emit("ADDED", None, pod("web-2"))
+            await feed.flush()
+            await settle()
+            return connection.websocket.sent
+
+        sent = asyncio.run(scenario())
+        assert [m["type"] for m in sent] == ["snapshot", "snapshot", "snapshot", "delta"]
+        assert sent[-1]["changes"][0]["key"] == "prod/web-2"
+
+    def test_cancelled_subscribe_holds_nothing(self):
+        """A subscribe cancelled mid-snapshot leaves no held or subscribed topic"""
+        async def slow_snapshot(key, namespace):
+            await asyncio.sleep(1)
+
+        async def scenario():
+            hub, feed = self.make_feed(FakeInformer([pod("web-1")]))
+            feed._snapshot = slow_snapshot
+            connection = await hub.connect(FakeWebSocket())
+            task = asyncio.ensure_future(feed.subscribe(connection, "c1/pods"))
+            await settle()
+            task.cancel()
+            await asyncio.wait([task])
+            assert connection.topics == set() and connection._held == {}
+            assert hub.topics() == []
+
+        asyncio.run(scenario())
+
+    def test_unavailable_kind(self):
+        async def scenario():
+            hub, feed = self.make_feed(None)
+            connection = await hub.connect(FakeWebSocket())
+            with pytest.raises(TopicError):
+                await feed.subscribe(connection, "c1/alerts")
+            with pytest.raises(TopicError):
+                await feed.subscribe(connection, "c1/pods")
+            assert connection.topics == set()
+
+        asyncio.run(scenario())
@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from services import tsquery
+
+NAN = np.nan
+
+
+class TestReductions:
+    """Test per-series reductions with missing samples"""
+
+    def test_last_and_delta_skip_gaps(self):
+        """Edges are the newest and oldest samples actually present"""
+        values = np.array([
+            [1.0, 2.0, 3.0],
+            [NAN, 5.0, NAN],
+            [NAN, NAN, NAN]
+        ])
+        np.testing.assert_array_equal(tsquery.last(values), [3.0, 5.0, NAN])
+        np.testing.assert_array_equal(tsquery.delta(values), [2.0, 0.0, NAN])
+
+    def test_percentile_matches_numpy(self):
+        """Sorted percentile agrees with np.nanpercentile, all-NaN rows are NaN"""
+        rng = np.random.default_rng(0)
+        values = rng.uniform(0, 100, size=(50, 20))
+        values[rng.random(values.shape) < 0.2] = NAN
+        values[3] = NAN
+
+        result = tsquery.percentile(values, 95)
+        expected = np.array([np.nanpercentile(row, 95) if not np.isnan(row).all() else NAN for row in values])
+        np.testing.assert_allclose(result, expected)
+
+    def test_reduce_by_name(self):
+        values = np.array([[1.0, NAN, 4.0]])
+        assert tsquery.reduce(values, "avg")[0] == 2.5
+        assert tsquery.reduce(values, "max")[0] == 4.0
+        assert tsquery.reduce(values, "p50")[0] == 2.5
+        with pytest.raises(ValueError):
+            tsquery.reduce(values, "median")
+
+
+class TestWindowOps:
+    """Test rate and moving average"""
+
+    def test_rate_with_counter_reset(self):
+        """A counter decrease is taken as a reset, not a negative rate"""
+        timestamps = np.array([0.0, 10.0, 20.0, 30.0])
+        values = np.array([0.0, 100.0, 20.0, 60.0])
+        np.testing.assert_array_equal(tsquery.rate(timestamps, values), [10.0, -8.0, 4.0])
+        np.testing.assert_array_equal(tsquery.rate(timestamps, values, counter=True), [10.0, 2.0, 4.0])
+
+    def test_moving_average_ignores_missing(self):
+        """Each point averages the samples present in its trailing window"""
+        values = np.array([2.0, NAN, 4.0, 6.0, NAN, NAN])
+        np.testing.assert_array_equal(
+            tsquery.moving_average(values, 2),
+            [2.0, 2.0, 4.0, 5.0, 6.0, NAN]
+        )
+
+
+class TestRanking:
+    """Test top-k selection"""
+
+    def test_topk_orders_highest_first(self):
+        """Series are ranked by the chosen reduction, empty series last"""
+        values = np.array([
+            [10.0, 10.0],
+            [NAN, NAN],
+            [50.0, 1.0],
+            [30.0, 30.0]
+        ])
+        assert tsquery.topk(values, 2, by="last").tolist() == [3, 0]
+        assert tsquery.topk(values, 2, by="max").tolist() == [2, 3]
+        assert tsquery.topk(values, 10).tolist()[-1] == 1
+
+    def test_summarize_is_json_ready(self):
+        summary = tsquery.summarize(np.array([NAN, NAN]))
+        assert summary == {"current": None, "average": None, "min": None, "max": None, "p95": None}
@@ -0,0 +1,175 @@
+import asyncio
+import json
+
+import msgpack
+import pytest
+
+from services.ws_hub import Payload, WebSocketHub
+
+
+class FakeWebSocket:
+    """Records sent messages; sends block while gate is clear"""
+    def __init__(self, gate=None, fail=False):
+        self.sent = []
+        self.gate = gate
+        self.fail = fail
+        self.accepted = False
+        self.close_code = None
+        self.binary = False
+
+    async def accept(self):
+        self.accepted = True
+
+    async def send_text(self, message):
+        if self.fail:
+            raise ConnectionResetError("client went away")
+        if self.gate is not None:
+            await self.gate.wait()
+        self.sent.append(message)
+
+    async def send_bytes(self, message):
+        self.binary = True
+        await self.send_text(message)
+
+    async def close(self, code=1000):
+        self.close_code = code
+
+
+async def settle():
+    for _ in range(50):
+        await asyncio.sleep(0)
+
+
+class TestWebSocketHub:
+    """Test per-connection queues, writers and overflow policies"""
+
+    def test_slow_client_does_not_delay_others(self):
+        async def scenario():
+            hub = WebSocketHub(max_queue=10)
+            gate = asyncio.Event()
+            slow = await hub.connect(FakeWebSocket(gate=gate))
+            fast = await hub.connect(FakeWebSocket())
+            for n in range(5):
+                assert hub.broadcast(str(n)) == 2
+            await settle()
+            assert fast.websocket.sent == ["0", "1", "2", "3", "4"]
+            assert slow.websocket.sent == []
+            gate.set()
+            await settle()
+            assert slow.websocket.sent == ["0", "1", "2", "3", "4"]
+
+        asyncio.run(scenario())
+
+    def test_drop_oldest(self):
+        async def scenario():
+            hub = WebSocketHub(max_queue=3)
+            gate = asyncio.Event()
+            connection = await hub.connect(FakeWebSocket(gate=gate))
+            await settle()
+            for n in range(10):
+                hub.broadcast(str(n))
+            assert connection.queued <= 3
+            gate.set()
+            await settle()
+            # The message already being sent when the queue filled is delivered too
+            assert connection.websocket.sent[-3:] == ["7", "8", "9"]
+            assert connection.dropped == 10 - len(connection.websocket.sent)
+            assert hub.stats()["dropped"] == connection.dropped
+
+        asyncio.run(scenario())
+
+    def test_held_updates_drop_oldest(self):
+        """Updates held during a snapshot keep the newest that fit behind the snapshot"""
+        async def scenario():
+            hub = WebSocketHub(max_queue=3)
+            connection = await hub.connect(FakeWebSocket())
+            hub.subscribe(connection, "c1/pods", hold=True)
+            for n in range(5):
+                hub.publish("c1/pods", str(n))
+            connection.release("c1/pods", "snapshot")
+            await settle()
+            assert connection.websocket.sent == ["snapshot", "3", "4"]
+            assert connection.dropped == 3
+
+        asyncio.run(scenario())
+
+    def test_disconnect_policy_closes_slow_client(self):
+        async def scenario():
+            hub = WebSocketHub(max_queue=2, policy="disconnect")
+            websocket = FakeWebSocket(gate=asyncio.Event())
+            connection = await hub.connect(websocket)
+            await settle()
+            accepted = [hub.broadcast(str(n)) for n in range(5)]
+            assert accepted[:2] == [1, 1] and accepted[-1] == 0
+            assert connection.closed and len(hub) == 0
+            websocket.gate.set()
+            await settle()
+            assert websocket.close_code == 1013
+
+        asyncio.run(scenario())
+
+    def test_failed_send_removes_connection(self):
+        async def scenario():
+            hub = WebSocketHub()
+            dead = await hub.connect(FakeWebSocket(fail=True))
+            alive = await hub.connect(FakeWebSocket())
+            hub.broadcast("hello")
+            await settle()
+            assert dead.closed and len(hub) == 1
+            assert alive.websocket.sent == ["hello"]
+            hub.disconnect(dead)
+            assert hub.broadcast("again") == 1
+
+        asyncio.run(scenario())
+
+    def test_send_timeout(self):
+        async def scenario():
+            hub = WebSocketHub(send_timeout=0.01)
+            connection = await hub.connect(FakeWebSocket(gate=asyncio.Event()))
+            connection.send("stuck")
+            await asyncio.sleep(0.05)
+            assert connection.closed and len(hub) == 0
+
+        asyncio.run(scenario())
+
+    def test_unknown_policy(self):
+        async def scenario():
+            await WebSocketHub(policy="block").connect(FakeWebSocket())
+
+        with pytest.raises(ValueError):
+            asyncio.run(scenario())
+
+
+class TestEncodings:
+    """Test per-client encodings of shared payloads"""
+
+    def test_payload_is_encoded_once_per_encoding(self):
+        async def scenario():
+            hub = WebSocketHub()
+            texts = [await hub.connect(FakeWebSocket()) for _ in range(3)]
+            binary = [await hub.connect(FakeWebSocket(), encoding="msgpack") for _ in range(2)]
+            payload = Payload({"type": "delta", "seq": 1, "changes": []})
+            assert hub.broadcast(payload) == 5
+            await settle()
+            return texts, binary
+
+        texts, binary = asyncio.run(scenario())
+        assert all(not c.websocket.binary and json.loads(c.websocket.sent[0])["seq"] == 1 for c in texts)
+        assert all(c.websocket.binary and msgpack.unpackb(c.websocket.sent[0])["seq"] == 1 for c in binary)
+        # Every connection sent the very same encoded object
+        assert len({id(c.websocket.sent[0]) for c in texts}) == 1
+        assert len({id(c.websocket.sent[0]) for c in binary}) == 1
+
+    def test_payload_encode_is_cached(self):
+        payload = Payload({"items": [1, 2]})
+        assert payload.encode("json") is payload.encode("json")
+        assert msgpack.unpackb(payload.encode("msgpack")) == {"items": [1, 2]}
+
+    def test_unknown_encoding(self):
+        async def scenario():
+            websocket = FakeWebSocket()
+            with pytest.raises(ValueError):
+                await WebSocketHub().connect(websocket, encoding="xml")
+            assert not websocket.accepted
+
+        asyncio.run(scenario())
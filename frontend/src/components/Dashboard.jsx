@@ -99,9 +99,15 @@ const Dashboard = () => {
 
   useEffect(() => {
     fetchData()
-    // Refresh every 30 seconds
-    const interval = setInterval(fetchData, 30000)
-    return () => clearInterval(interval)
+    // Changes are pushed by the server; the browser reconnects and resumes on its own
+    const events = apiService.dashboardEvents()
+    if (!events) {
+      const interval = setInterval(fetchData, 30000)
+      return () => clearInterval(interval)
+    }
+    events.addEventListener('stats', (event) => setStats(JSON.parse(event.data)))
+    events.addEventListener('activity', (event) => setActivity(JSON.parse(event.data)))
+    return () => events.close()
   }, [])
 
   const handleRefresh = () => {
@@ -323,6 +323,13 @@ const apiService = {
     }
   },
 
+  // Server-sent dashboard updates ('stats' and 'activity' events); null when signed out
+  dashboardEvents() {
+    const token = localStorage.getItem('token')
+    if (!token || typeof EventSource === 'undefined') return null
+    return new EventSource(`${API_BASE_URL}/api/dashboard/events?token=${encodeURIComponent(token)}`)
+  },
+
   async getRecentActivity() {
     try {
       const { data } = await apiClient.get('/api/activity')
@@ -349,6 +356,8 @@ class WebSocketService {
   constructor() {
     this.socket = null
     this.listeners = {}
+    // Subscribed topics and the last seq seen on each
+    this.topics = {}
   }
 
   connect() {
@@ -362,11 +371,24 @@ class WebSocketService {
     
     this.socket.onopen = () => {
       console.log('WebSocket connected')
+      Object.keys(this.topics).forEach(topic => this.send('subscribe', { topic }))
     }
     
     this.socket.onmessage = (event) => {
       try {
         const data = JSON.parse(event.data)
+        if (data.topic && data.topic in this.topics && (data.type === 'snapshot' || data.type === 'delta')) {
+          const last = this.topics[data.topic]
+          if (data.type === 'delta' && (last === null || data.seq !== last + 1)) {
+            // Missed updates (or a delta before the snapshot): start over from a snapshot
+            if (last !== null) {
+              this.topics[data.topic] = null
+              this.send('subscribe', { topic: data.topic })
+            }
+            return
+          }
+          this.topics[data.topic] = data.seq
+        }
         if (data.type && this.listeners[data.type]) {
           this.listeners[data.type].forEach(callback => callback(data))
         }
@@ -404,6 +426,20 @@ class WebSocketService {
     }
   }
   
+  // Topics are "<cluster>/<kind>[/<namespace>]"; listen for 'snapshot' and 'delta' messages
+  subscribeTopic(topic) {
+    if (!(topic in this.topics)) {
+      this.topics[topic] = null
+      this.send('subscribe', { topic })
+    }
+    return () => this.unsubscribeTopic(topic)
+  }
+
+  unsubscribeTopic(topic) {
+    delete this.topics[topic]
+    this.send('unsubscribe', { topic })
+  }
+
   send(type, data) {
     if (this.socket && this.socket.readyState === WebSocket.OPEN) {
       this.socket.send(JSON.stringify({ type, data }))